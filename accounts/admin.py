@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django import forms
-from .models import CustomUser
+from .models import CustomUser, EmailOutbox
 from consultantdb.models import Consultant, ConsultantProfile
 from django.contrib.auth.forms import ReadOnlyPasswordHashField
 
@@ -73,3 +73,13 @@ class CustomUserAdmin(UserAdmin):
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'category', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'category')
+    search_fields = ('subject', 'to')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    # Bodies may hold generated passwords or OTPs
+    exclude = ('body', 'html_body')
@@ -0,0 +1,117 @@
+import contextlib
+import io
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponseForbidden
+from django.shortcuts import redirect
+from django.test import RequestFactory
+from django.urls import resolve, reverse, NoReverseMatch
+
+from accounts.middleware import (
+    URL_ROLE_MAPPINGS,
+    PUBLIC_URLS,
+    RolePermissionsMiddleware,
+    RoleBasedRedirectMiddleware,
+)
+from accounts.models import CustomUser
+from accounts.route_table import clear_caches
+from settingsdb.middleware import CaptureUserMiddleware
+
+SAMPLE_URL_NAMES = [
+    'home', 'student_list', 'batch_list', 'placement_list', 'payment_list',
+    'consultant_list', 'trainer_list', 'course_list', 'transaction_log',
+]
+
+
+def _legacy_role_permissions(get_response):
+    """RolePermissionsMiddleware as it was before the compiled route table."""
+    def middleware(request):
+        if request.user.is_authenticated:
+            if request.path.startswith('/media/') or request.path.startswith('/swagger/') or request.path.startswith('/api/'):
+                return get_response(request)
+            current_url_name = resolve(request.path_info).url_name
+            print("DEBUG URL NAME:", current_url_name, request.path)
+            if current_url_name in PUBLIC_URLS or request.user.role in ['admin', 'staff']:
+                return get_response(request)
+            user_role = request.user.role
+            if user_role in URL_ROLE_MAPPINGS:
+                if current_url_name not in URL_ROLE_MAPPINGS[user_role]:
+                    return HttpResponseForbidden("You do not have permission to access this page.")
+            else:
+                return HttpResponseForbidden("Your role does not have permissions defined.")
+        return get_response(request)
+    return middleware
+
+
+def _legacy_redirect(get_response):
+    def middleware(request):
+        response = get_response(request)
+        if request.user.is_authenticated:
+            if request.user.role == 'consultant' and request.path == reverse('admin_dashboard'):
+                return redirect('consultant_profile')
+        return response
+    return middleware
+
+
+def _legacy_capture_user(get_response):
+    def middleware(request):
+        if request.user.is_authenticated and request.user.role == 'batch_coordinator':
+            restricted_paths = [
+                reverse('coursedb:category_list'),
+                reverse('coursedb:category_create'),
+            ]
+            if request.path in restricted_paths:
+                return redirect('accounts:batch_coordination_dashboard')
+        return get_response(request)
+    return middleware
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark of the per-request cost of the role/route middlewares (legacy vs compiled route table).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+
+        paths = []
+        for name in SAMPLE_URL_NAMES:
+            try:
+                paths.append(reverse(name))
+            except NoReverseMatch:
+                continue
+
+        requests = []
+        for role in ['trainer', 'consultant', 'batch_coordination', 'placement']:
+            user = CustomUser(email=f'{role}@bench.local', name=role, role=role)
+            for path in paths:
+                request = factory.get(path)
+                request.user = user
+                requests.append(request)
+
+        def endpoint(request):
+            return None
+
+        legacy = _legacy_capture_user(_legacy_role_permissions(_legacy_redirect(endpoint)))
+        clear_caches()
+        compiled = CaptureUserMiddleware(RolePermissionsMiddleware(RoleBasedRedirectMiddleware(endpoint)))
+
+        def run(chain):
+            for request in requests:
+                chain(request)
+
+        rounds = max(1, iterations // len(requests))
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy_time = min(timeit.repeat(lambda: run(legacy), number=rounds, repeat=3))
+            compiled_time = min(timeit.repeat(lambda: run(compiled), number=rounds, repeat=3))
+
+        total = rounds * len(requests)
+        legacy_us = legacy_time / total * 1e6
+        compiled_us = compiled_time / total * 1e6
+        self.stdout.write(f"Requests timed: {total} ({len(paths)} paths x 4 roles)")
+        self.stdout.write(f"Legacy middlewares:   {legacy_us:8.2f} us/request")
+        self.stdout.write(f"Compiled route table: {compiled_us:8.2f} us/request")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {legacy_us / compiled_us:.1f}x"))
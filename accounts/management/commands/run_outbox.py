@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.utils import deliver_outbox, OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued transactional emails (accounts.EmailOutbox) in batches over one reused connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the due messages and exit')
+        parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=OUTBOX_MAX_ATTEMPTS)
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when the outbox is idle')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, retried, failed = deliver_outbox(options['batch_size'], options['max_attempts'])
+            if sent or retried or failed:
+                self.stdout.write(f"Sent {sent}, retrying {retried}, failed {failed}")
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['interval'])
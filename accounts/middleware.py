@@ -1,6 +1,6 @@
 from django.shortcuts import redirect
 from django.http import HttpResponseForbidden
-from django.urls import reverse, resolve
+from .route_table import get_route_table, resolve_url_name
 
 # Define role-based access control mappings
 URL_ROLE_MAPPINGS = {
@@ -85,6 +85,8 @@ PUBLIC_URLS = [
 class RolePermissionsMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        # Compiled once at startup (frozensets per role); see accounts/route_table.py
+        self.route_table = get_route_table()
 
     def __call__(self, request):
         if request.user.is_authenticated:
@@ -92,22 +94,15 @@ class RolePermissionsMiddleware:
             if request.path.startswith('/media/') or request.path.startswith('/swagger/') or request.path.startswith('/api/'):
                 return self.get_response(request)
 
-            current_url_name = resolve(request.path_info).url_name
-            
-            print("DEBUG URL NAME:", current_url_name, request.path)
+            current_url_name = resolve_url_name(request.path_info)
 
-            # Bypass for public URLs and admin users
-            if current_url_name in PUBLIC_URLS or request.user.role in ['admin', 'staff']:
-                return self.get_response(request)
-
-            # Check permissions for other roles
-            user_role = request.user.role
-            if user_role in URL_ROLE_MAPPINGS:
-                if current_url_name not in URL_ROLE_MAPPINGS[user_role]:
-                    return HttpResponseForbidden("You do not have permission to access this page.")
-            else:
+            # Bypass for public URLs and admin users, then check the role's compiled URL set
+            allowed = self.route_table.is_allowed(request.user.role, current_url_name)
+            if allowed is None:
                 # If role is not in mappings, deny access by default
                 return HttpResponseForbidden("Your role does not have permissions defined.")
+            if not allowed:
+                return HttpResponseForbidden("You do not have permission to access this page.")
 
         return self.get_response(request)
 
@@ -115,10 +110,11 @@ class RolePermissionsMiddleware:
 class RoleBasedRedirectMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        self.route_table = get_route_table()
 
     def __call__(self, request):
         response = self.get_response(request)
         if request.user.is_authenticated:
-            if request.user.role == 'consultant' and request.path == reverse('admin_dashboard'):
+            if request.user.role == 'consultant' and request.path == self.route_table.url('admin_dashboard'):
                 return redirect('consultant_profile')
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,70 @@
+"""
+Precompiled route-authorization table shared by the request middlewares
+(accounts.middleware.RolePermissionsMiddleware / RoleBasedRedirectMiddleware and
+settingsdb.middleware.CaptureUserMiddleware).
+
+- URL_ROLE_MAPPINGS / PUBLIC_URLS are compiled once into frozensets.
+- path -> url_name resolutions are memoized in a bounded LRU.
+- URLs the middlewares compare against are reversed once and reused.
+
+Benchmark: python manage.py bench_route_table
+"""
+from functools import lru_cache
+
+from django.urls import resolve, reverse
+
+# Roles that bypass the URL mappings entirely
+UNRESTRICTED_ROLES = frozenset(['admin', 'staff'])
+
+# Large enough for every static route plus the hot detail pages (/students/update/<id>/ ...)
+RESOLVE_CACHE_SIZE = 4096
+
+
+class RouteTable:
+    def __init__(self, role_mappings, public_urls):
+        self.role_urls = {role: frozenset(names) for role, names in role_mappings.items()}
+        self.public_urls = frozenset(public_urls)
+        self._reversed = {}
+
+    def is_public(self, url_name):
+        return url_name in self.public_urls
+
+    def is_allowed(self, role, url_name):
+        """
+        True/False if the role may access url_name, None if the role has no mapping.
+        """
+        if url_name in self.public_urls or role in UNRESTRICTED_ROLES:
+            return True
+        allowed = self.role_urls.get(role)
+        if allowed is None:
+            return None
+        return url_name in allowed
+
+    def url(self, viewname):
+        """reverse() once per viewname; URLconf is static for the life of the process."""
+        try:
+            return self._reversed[viewname]
+        except KeyError:
+            self._reversed[viewname] = reverse(viewname)
+            return self._reversed[viewname]
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def resolve_url_name(path_info):
+    """
+    Cached equivalent of resolve(path_info).url_name.
+    Unknown paths raise Resolver404 like resolve() does (misses are not cached).
+    """
+    return resolve(path_info).url_name
+
+
+def clear_caches():
+    resolve_url_name.cache_clear()
+    get_route_table.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_route_table():
+    from .middleware import URL_ROLE_MAPPINGS, PUBLIC_URLS
+    return RouteTable(URL_ROLE_MAPPINGS, PUBLIC_URLS)
+
@@ -47,3 +47,153 @@ class RolePermissionsMiddlewareTest(TestCase):
         request.user = self.admin_user
         response = self.middleware(request)
         self.assertIsNone(response)
+
+
+class RouteTableTest(TestCase):
+    def setUp(self):
+        from .route_table import RouteTable
+        self.table = RouteTable(
+            {'trainer': ['batch_list', 'trainer_dashboard'], 'placement': ['placement_dashboard']},
+            ['home', 'logout'],
+        )
+
+    def test_is_allowed(self):
+        self.assertTrue(self.table.is_allowed('trainer', 'batch_list'))
+        self.assertFalse(self.table.is_allowed('trainer', 'placement_dashboard'))
+        self.assertTrue(self.table.is_allowed('placement', 'home'))
+        self.assertTrue(self.table.is_allowed('admin', 'anything'))
+        self.assertIsNone(self.table.is_allowed('unknown_role', 'batch_list'))
+
+    def test_resolution_and_reverse_are_cached(self):
+        from .route_table import resolve_url_name, clear_caches
+        clear_caches()
+        path = reverse('home')
+        self.assertEqual(resolve_url_name(path), 'home')
+        self.assertEqual(resolve_url_name(path), 'home')
+        self.assertEqual(resolve_url_name.cache_info().hits, 1)
+        self.assertEqual(self.table.url('home'), path)
+        self.assertIn('home', self.table._reversed)
+
+    def test_middleware_blocks_unmapped_url(self):
+        trainer = User.objects.create_user(email='trainer@test.com', name='Trainer', role='trainer', password='password')
+        request = self.factory_get(reverse('home'), trainer)
+        self.assertIsNone(RolePermissionsMiddleware(get_response=lambda req: None)(request))
+        request = self.factory_get(reverse('student_list'), trainer)
+        allowed = RolePermissionsMiddleware(get_response=lambda req: None)(request)
+        self.assertIsNone(allowed)
+        request = self.factory_get(reverse('user_list'), trainer)
+        self.assertEqual(RolePermissionsMiddleware(get_response=lambda req: None)(request).status_code, 403)
+
+    def factory_get(self, path, user):
+        request = RequestFactory().get(path)
+        request.user = user
+        return request
+
+
+class EmailOutboxTest(TestCase):
+    def test_otp_email_is_queued_not_sent(self):
+        from django.core import mail
+        from .models import EmailOutbox
+        from .utils import send_otp_email
+
+        send_otp_email('someone@test.com', '123456')
+
+        self.assertEqual(len(mail.outbox), 0)
+        entry = EmailOutbox.objects.get()
+        self.assertEqual((entry.category, entry.status, entry.to), ('OTP', 'PENDING', ['someone@test.com']))
+        self.assertIn('123456', entry.html_body)
+
+    def test_queued_email_rolls_back_with_transaction(self):
+        from django.db import transaction
+        from .models import EmailOutbox
+        from .utils import queue_email
+
+        try:
+            with transaction.atomic():
+                queue_email('Subject', 'Body', ['a@test.com'])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_run_outbox_delivers_batch(self):
+        from django.core import mail
+        from django.core.management import call_command
+        from io import StringIO
+        from .models import EmailOutbox
+        from .utils import queue_email
+
+        for i in range(3):
+            queue_email(f'Subject {i}', 'Body', [f'user{i}@test.com'], html_body='<b>Body</b>', category='WELCOME')
+
+        call_command('run_outbox', '--once', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(EmailOutbox.objects.filter(status='SENT').count(), 3)
+        # Delivered bodies are not kept
+        self.assertFalse(EmailOutbox.objects.exclude(body='').exists())
+        self.assertFalse(EmailOutbox.objects.filter(html_body__isnull=False).exists())
+
+    def test_expired_lease_counts_as_attempt(self):
+        from unittest import mock
+        from django.utils import timezone
+        from .models import EmailOutbox
+        from .utils import queue_email, deliver_outbox
+
+        entry = queue_email('Subject', 'Body', ['user@test.com'])
+        connection = mock.Mock()
+        # A worker claimed the message and died before reporting back
+        EmailOutbox.objects.filter(pk=entry.pk).update(status='SENDING', attempts=0, next_attempt_at=timezone.now())
+
+        self.assertEqual(deliver_outbox(connection=connection, max_attempts=2), (1, 0, 0))
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('SENT', 1))
+
+        EmailOutbox.objects.filter(pk=entry.pk).update(status='SENDING', attempts=1, next_attempt_at=timezone.now())
+        self.assertEqual(deliver_outbox(connection=connection, max_attempts=2), (0, 0, 1))
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('FAILED', 2))
+
+    def test_each_message_is_marked_sent_as_soon_as_it_is_sent(self):
+        from unittest import mock
+        from .models import EmailOutbox
+        from .utils import queue_email, deliver_outbox
+
+        class WorkerKilled(BaseException):
+            pass
+
+        first = queue_email('First', 'Password: secret', ['first@test.com'])
+        second = queue_email('Second', 'Body', ['second@test.com'])
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [1, WorkerKilled()]
+
+        # The worker dies on the second message; the first is not sent again
+        with self.assertRaises(WorkerKilled):
+            deliver_outbox(connection=connection)
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.body), ('SENT', ''))
+        self.assertEqual(EmailOutbox.objects.get(pk=second.pk).status, 'SENDING')
+
+    def test_failed_delivery_backs_off_then_gives_up(self):
+        from unittest import mock
+        from django.utils import timezone
+        from .models import EmailOutbox
+        from .utils import queue_email, deliver_outbox
+
+        entry = queue_email('Subject', 'Body', ['user@test.com'])
+        connection = mock.Mock()
+        connection.send_messages.side_effect = OSError('SMTP down')
+
+        self.assertEqual(deliver_outbox(connection=connection, max_attempts=2), (0, 1, 0))
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts, entry.last_error), ('PENDING', 1, 'SMTP down'))
+        self.assertGreater(entry.next_attempt_at, timezone.now())
+
+        # Not due yet: nothing is claimed
+        self.assertEqual(deliver_outbox(connection=connection, max_attempts=2), (0, 0, 0))
+
+        EmailOutbox.objects.filter(pk=entry.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_outbox(connection=connection, max_attempts=2), (0, 0, 1))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'FAILED')
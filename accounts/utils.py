@@ -1,6 +1,151 @@
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
-from datetime import date
+from django.db import transaction
+from django.utils import timezone
+from datetime import date, timedelta
+
+# Outbox delivery defaults (see run_outbox)
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_BACKOFF_SECONDS = 30
+OUTBOX_MAX_BACKOFF_SECONDS = 60 * 60
+# How long a claimed message stays reserved before another worker may retry it
+OUTBOX_LEASE_SECONDS = 5 * 60
+
+
+def queue_email(subject, body, to, html_body=None, from_email=None, category=''):
+    """
+    Queues a transactional email in the outbox. Call it inside the business
+    transaction: the message commits (or rolls back) with the data it refers to,
+    and the run_outbox worker delivers it.
+    """
+    from .models import EmailOutbox
+
+    return EmailOutbox.objects.create(
+        category=category,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email,
+        to=list(to),
+    )
+
+
+def build_outbox_message(entry, connection=None):
+    msg = EmailMultiAlternatives(
+        entry.subject,
+        entry.body,
+        entry.from_email or settings.DEFAULT_FROM_EMAIL,
+        entry.to,
+        connection=connection,
+    )
+    if entry.html_body:
+        msg.attach_alternative(entry.html_body, "text/html")
+    return msg
+
+
+def outbox_backoff(attempts):
+    """Seconds to wait before the next attempt: 30s, 60s, 120s ... capped at an hour."""
+    return min(OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), OUTBOX_MAX_BACKOFF_SECONDS)
+
+
+def claim_outbox_batch(batch_size=OUTBOX_BATCH_SIZE, max_attempts=OUTBOX_MAX_ATTEMPTS):
+    """
+    Leases up to batch_size due messages to this worker. Rows are marked SENDING
+    with a lease expiry and the lock is released before any SMTP traffic; a worker
+    that dies mid-batch simply lets the lease run out.
+
+    Re-claiming a message whose lease ran out counts as a delivery attempt, so a
+    message that keeps killing its worker ends up FAILED instead of looping.
+    Returns (claimed entries, number of messages given up on).
+    """
+    from django.db.models import Case, F, When
+    from .models import EmailOutbox
+
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['PENDING', 'SENDING'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        exhausted = [e.pk for e in entries if e.status == 'SENDING' and e.attempts + 1 >= max_attempts]
+        if exhausted:
+            EmailOutbox.objects.filter(pk__in=exhausted).update(
+                status='FAILED',
+                attempts=F('attempts') + 1,
+                last_error='Delivery lease expired',
+            )
+            entries = [e for e in entries if e.pk not in exhausted]
+        if entries:
+            EmailOutbox.objects.filter(pk__in=[e.pk for e in entries]).update(
+                status='SENDING',
+                next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+                attempts=F('attempts') + Case(When(status='SENDING', then=1), default=0),
+            )
+            for entry in entries:
+                if entry.status == 'SENDING':
+                    entry.attempts += 1
+    return entries, len(exhausted)
+
+
+def deliver_outbox(batch_size=OUTBOX_BATCH_SIZE, max_attempts=OUTBOX_MAX_ATTEMPTS, connection=None):
+    """
+    Delivers one batch of due outbox messages over a single reused connection.
+    Returns (sent, retried, failed).
+    """
+    from .models import EmailOutbox
+
+    entries, failed = claim_outbox_batch(batch_size, max_attempts)
+    if not entries:
+        return 0, 0, failed
+
+    connection = connection or get_connection(fail_silently=False)
+    sent, retried = 0, 0
+    reopen = True
+    try:
+        for entry in entries:
+            if reopen:
+                # Keep one session open for the batch; send() only closes connections it opened
+                try:
+                    connection.open()
+                except Exception:
+                    pass
+                reopen = False
+            try:
+                build_outbox_message(entry, connection).send()
+            except Exception as e:
+                entry.attempts += 1
+                entry.last_error = str(e)[:2000]
+                if entry.attempts >= max_attempts:
+                    entry.status = 'FAILED'
+                    failed += 1
+                else:
+                    entry.status = 'PENDING'
+                    entry.next_attempt_at = timezone.now() + timedelta(seconds=outbox_backoff(entry.attempts))
+                    retried += 1
+                entry.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+                # A broken SMTP session is reopened for the next message
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+                reopen = True
+            else:
+                # Marked at once, so a crash later in the batch cannot send it again.
+                # Bodies can carry credentials (welcome mails) or OTPs, so they are not kept once delivered
+                EmailOutbox.objects.filter(pk=entry.pk).update(
+                    status='SENT', sent_at=timezone.now(), last_error=None, body='', html_body=None,
+                )
+                sent += 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    return sent, retried, failed
+
 
 def send_otp_email(email, otp):
     subject = "Password Reset RequestOTP"
@@ -34,6 +179,4 @@ def send_otp_email(email, otp):
     </div>
     """
 
-    msg = EmailMultiAlternatives(subject, text_content, from_email, to)
-    msg.attach_alternative(html_content, "text/html")
-    msg.send()
\ No newline at end of file
+    queue_email(subject, text_content, to, html_body=html_content, from_email=from_email, category="OTP")
\ No newline at end of file
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api_views import AuditLogViewSet
+from .api_views import AuditLogViewSet, EntityTimelineView
 
 
 router = DefaultRouter()
 router.register(r'audit/logs', AuditLogViewSet, basename='audit-logs')
 
 urlpatterns = [
+    path('audit/timeline/<str:entity_type>/<str:entity_id>/', EntityTimelineView.as_view(), name='audit-entity-timeline'),
     path('', include(router.urls)),
 ]
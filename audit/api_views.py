@@ -1,23 +1,128 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rbac.permissions import HasRBACPermission
 from drf_yasg.utils import swagger_auto_schema
+from datetime import datetime, time
+from django.utils.dateparse import parse_datetime, parse_date
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from .models import AuditLog
 from .serializers import AuditLogSerializer
+from . import retention, export, timeline
+
+# Exact-match query parameters shared by list, export and history
+LOG_FILTERS = ("actor_user_id", "action_type", "entity_type", "entity_id", "source")
+HISTORY_MAX_LIMIT = 1000
+
+
+def _parse_bound(value):
+    """ISO datetime or date (midnight, current timezone); None when missing, ValueError when invalid."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, time.min)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class AuditLogCursorPagination(CursorPagination):
+    """Count-free pages walked with the (timestamp, id) index; stable while new events arrive."""
+    ordering = ("-timestamp", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
 
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
+    pagination_class = AuditLogCursorPagination
     permission_classes = [IsAuthenticated, HasRBACPermission]
     required_permission = "AUDIT_LOG_VIEW"
 
+    def get_filters(self):
+        params = self.request.query_params
+        filters = {key: params[key] for key in LOG_FILTERS if params.get(key)}
+        return filters, _parse_bound(params.get("start")), _parse_bound(params.get("end"))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        try:
+            filters, start, end = self.get_filters()
+        except ValueError:
+            return queryset.none()
+        queryset = queryset.filter(**filters)
+        if start is not None:
+            queryset = queryset.filter(timestamp__gte=start)
+        if end is not None:
+            queryset = queryset.filter(timestamp__lt=end)
+        return queryset
+
     @swagger_auto_schema(tags=["Audit"])
-    @action(detail=False, methods=["get"])
+    @action(detail=False, methods=["get"], required_permission="AUDIT_LOG_EXPORT")
     def export(self, request):
-        self.required_permission = "AUDIT_LOG_EXPORT"
-        logs = self.get_queryset()[:1000]
-        data = AuditLogSerializer(logs, many=True).data
-        return Response({"count": len(data), "items": data})
+        """
+        Streams every matching event, hot and archived, newest first.
+        `export_format` is ndjson (default) or csv; takes the list filters plus start/end.
+        """
+        try:
+            filters, start, end = self.get_filters()
+        except ValueError:
+            return Response({"detail": "start/end must be ISO dates."}, status=status.HTTP_400_BAD_REQUEST)
+
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in ("ndjson", "csv"):
+            return Response({"detail": "export_format must be ndjson or csv."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = export.iter_export_rows(self.get_queryset(), start, end, filters)
+        if export_format == "csv":
+            response = StreamingHttpResponse(export.csv_lines(rows), content_type="text/csv")
+        else:
+            response = StreamingHttpResponse(export.ndjson_lines(rows), content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="audit_logs.{export_format}"'
+        return response
+
+    @swagger_auto_schema(tags=["Audit"])
+    @action(detail=False, methods=["get"])
+    def history(self, request):
+        """
+        Audit events in [start, end) from the hot table and the cold archives
+        (audit/retention.py), newest first. Takes the list filters and `limit` (max 1000).
+        """
+        try:
+            filters, start, end = self.get_filters()
+            limit = min(int(request.query_params.get("limit", 100)), HISTORY_MAX_LIMIT)
+        except ValueError:
+            return Response({"detail": "start/end must be ISO dates and limit an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        items = retention.query_logs("audit", start, end, filters, limit=max(limit, 1))
+        return Response({"count": len(items), "items": items})
+
+
+class EntityTimelineView(APIView):
+    """
+    History of one object across AuditLog, TransactionLog and BatchTransaction,
+    newest first. entity_type is the audit log's name (User, Role, Student, Batch, ...),
+    see timeline.TIMELINE_ENTITIES.
+    Query params: cursor (from next_cursor), limit (max 500).
+    """
+    permission_classes = [IsAuthenticated, HasRBACPermission]
+    required_permission = "AUDIT_LOG_VIEW"
+
+    @swagger_auto_schema(tags=["Audit"])
+    def get(self, request, entity_type, entity_id):
+        try:
+            limit = min(int(request.query_params.get("limit", timeline.TIMELINE_PAGE_SIZE)), timeline.TIMELINE_MAX_PAGE_SIZE)
+            items, next_cursor = timeline.entity_timeline(
+                entity_type, entity_id, cursor=request.query_params.get("cursor"), limit=max(limit, 1)
+            )
+        except ValueError:
+            return Response({"detail": "Invalid cursor, limit or entity id."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"entity_type": entity_type, "entity_id": entity_id, "items": items, "next_cursor": next_cursor})
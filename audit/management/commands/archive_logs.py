@@ -0,0 +1,57 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from audit import partitions
+from audit.retention import SOURCES, ARCHIVE_CHUNK_SIZE, archive_source, get_model, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves audit / transaction log rows older than the retention horizon into gzipped monthly '
+        'NDJSON archives (settings.LOG_ARCHIVE_DIR). With LOG_PG_PARTITIONING on PostgreSQL, also '
+        'maintains the monthly partitions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=[*SOURCES, 'all'], default='all')
+        parser.add_argument('--before', help='Archive rows older than this date (YYYY-MM-DD) instead of the retention horizon')
+        parser.add_argument('--chunk-size', type=int, default=ARCHIVE_CHUNK_SIZE)
+        parser.add_argument('--convert-partitions', action='store_true', help='PostgreSQL: rebuild the tables as monthly partitioned tables first')
+
+    def handle(self, *args, **options):
+        sources = list(SOURCES) if options['source'] == 'all' else [options['source']]
+        before = None
+        if options['before']:
+            try:
+                before = timezone.make_aware(datetime.combine(datetime.strptime(options['before'], '%Y-%m-%d').date(), time.min))
+            except ValueError:
+                raise CommandError('--before must be YYYY-MM-DD')
+
+        use_partitions = settings.LOG_PG_PARTITIONING or options['convert_partitions']
+        if use_partitions and not partitions.is_supported():
+            self.stdout.write(self.style.WARNING('Native partitioning needs PostgreSQL; archiving only.'))
+            use_partitions = False
+
+        for source in sources:
+            model = get_model(source)
+            cutoff = before or retention_cutoff(source)
+
+            if use_partitions:
+                if options['convert_partitions'] and partitions.convert_to_partitioned(model):
+                    self.stdout.write(f"{source}: converted {model._meta.db_table} to monthly partitions")
+                partitions.ensure_partitions(model)
+
+            archived = archive_source(source, before=cutoff, chunk_size=options['chunk_size'])
+            for month, count in sorted(archived.items()):
+                self.stdout.write(f"{source}: archived {count} rows into {month}")
+
+            if use_partitions:
+                for name in partitions.drop_archived_partitions(model, cutoff):
+                    self.stdout.write(f"{source}: dropped empty partition {name}")
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{source}: {sum(archived.values())} rows archived (older than {cutoff:%Y-%m-%d %H:%M})"
+            ))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_audit_actor_u_3f83e1_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_audit_entity__5b2f60_idx',
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='actor_user_id',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='entity_type',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='timestamp',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['actor_user_id', 'timestamp'], name='audit_actor_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['entity_type', 'entity_id', 'timestamp'], name='audit_entity_time_idx'),
+        ),
+    ]
@@ -1,13 +1,15 @@
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 class AuditLog(models.Model):
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
-    actor_user_id = models.IntegerField(null=True, db_index=True)
+    # Set when the event happens; rows are written later in bulk (audit.utils)
+    timestamp = models.DateTimeField(default=timezone.now)
+    actor_user_id = models.IntegerField(null=True)
     actor_role = models.CharField(max_length=32, null=True, blank=True)
     action_type = models.CharField(max_length=64)
-    entity_type = models.CharField(max_length=64, db_index=True)
+    entity_type = models.CharField(max_length=64)
     entity_id = models.CharField(max_length=64, null=True, blank=True)
     old_value = models.JSONField(null=True, blank=True)
     new_value = models.JSONField(null=True, blank=True)
@@ -17,15 +19,17 @@ class AuditLog(models.Model):
     correlation_id = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
+        # The composite indexes also serve lookups on their leading column alone
         indexes = [
             models.Index(fields=["timestamp"]),
-            models.Index(fields=["actor_user_id"]),
-            models.Index(fields=["entity_type"]),
+            models.Index(fields=["actor_user_id", "timestamp"], name="audit_actor_time_idx"),
+            models.Index(fields=["entity_type", "entity_id", "timestamp"], name="audit_entity_time_idx"),
         ]
         ordering = ["-timestamp", "-id"]
 
     def save(self, *args, **kwargs):
-        if self.pk and AuditLog.objects.filter(pk=self.pk).exists():
+        # Rows loaded from the database are never re-saved; no query needed to tell
+        if not self._state.adding:
             raise ValidationError("Audit logs are append-only")
         super().save(*args, **kwargs)
 
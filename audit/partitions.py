@@ -0,0 +1,158 @@
+"""
+Optional native monthly partitioning of the log tables on PostgreSQL.
+
+convert_to_partitioned() rebuilds a log table once as PARTITION BY RANGE
+("timestamp"). The primary key becomes (id, timestamp), because PostgreSQL
+requires the partition key in every unique constraint. ensure_partitions()
+then keeps monthly partitions created ahead of time, plus a DEFAULT partition
+for back-dated rows. After retention has archived a month,
+drop_archived_partitions() drops its empty partition, so dead tuples and index
+pages from the hot table go away with it.
+
+Every function is a no-op on other databases and on tables that are not
+partitioned.
+"""
+from datetime import date
+
+from django.db import connection, transaction
+
+MONTHS_AHEAD = 2
+
+
+def is_supported():
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned(model):
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [model._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(model, month):
+    return f"{model._meta.db_table}_p{month:%Y%m}"
+
+
+def _create_partition(cursor, model, month):
+    qn = connection.ops.quote_name
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {qn(partition_name(model, month))} PARTITION OF {qn(model._meta.db_table)} "
+        f"FOR VALUES FROM (%s) TO (%s)",
+        [f"{month:%Y-%m-%d} 00:00:00+00", f"{_add_months(month, 1):%Y-%m-%d} 00:00:00+00"],
+    )
+
+
+def ensure_partitions(model, first_month=None, months_ahead=MONTHS_AHEAD):
+    """Creates the monthly partitions from first_month (default: this month) to months_ahead."""
+    if not is_partitioned(model):
+        return []
+    today = date.today()
+    month = first_month or date(today.year, today.month, 1)
+    last = _add_months(date(today.year, today.month, 1), months_ahead)
+    created = []
+    with connection.cursor() as cursor:
+        while month <= last:
+            _create_partition(cursor, model, month)
+            created.append(partition_name(model, month))
+            month = _add_months(month, 1)
+    return created
+
+
+def drop_archived_partitions(model, before):
+    """Drops monthly partitions that end on or before `before` and hold no rows."""
+    if not is_partitioned(model):
+        return []
+    qn = connection.ops.quote_name
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [model._meta.db_table],
+        )
+        for name, bound in cursor.fetchall():
+            prefix = f"{model._meta.db_table}_p"
+            suffix = name[len(prefix):]
+            if not name.startswith(prefix) or not suffix.isdigit():
+                continue  # DEFAULT partition
+            month = date(int(suffix[:4]), int(suffix[4:]), 1)
+            if _add_months(month, 1) > before.date():
+                continue
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {qn(name)})")
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute(f"DROP TABLE {qn(name)}")
+            dropped.append(name)
+    return dropped
+
+
+def convert_to_partitioned(model, months_ahead=MONTHS_AHEAD):
+    """
+    One-off rebuild of a log table as a monthly-partitioned table. Copies all
+    rows and keeps the id sequence. Foreign keys of the log tables are not
+    recreated; on_delete is enforced by Django, not by the database.
+    """
+    if not is_supported() or is_partitioned(model):
+        return False
+
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    old_table = f"{table}_unpartitioned"
+    pk = model._meta.pk.column
+    ts = model._meta.get_field("timestamp").column
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT attidentity <> '' FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s",
+            [table, pk],
+        )
+        is_identity = cursor.fetchone()[0]
+        cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [table, pk])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT MIN({qn(ts)}) FROM {qn(table)}")
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(old_table)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+            f"PARTITION BY RANGE ({qn(ts)})"
+        )
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY ({qn(pk)}, {qn(ts)})")
+        cursor.execute(f"CREATE TABLE {qn(table + '_pdefault')} PARTITION OF {qn(table)} DEFAULT")
+
+        today = date.today()
+        month = date(oldest.year, oldest.month, 1) if oldest else date(today.year, today.month, 1)
+        while month <= _add_months(date(today.year, today.month, 1), months_ahead):
+            _create_partition(cursor, model, month)
+            month = _add_months(month, 1)
+
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old_table)}")
+        if is_identity:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE((SELECT MAX({qn(pk)}) FROM {qn(table)}), 1))",
+                [table, pk],
+            )
+        elif sequence:
+            # serial: the copied default still uses the old sequence; keep it alive
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {qn(table)}.{qn(pk)}")
+        cursor.execute(f"DROP TABLE {qn(old_table)}")
+
+        with connection.schema_editor(atomic=False) as editor:
+            for field in model._meta.concrete_fields:
+                if field.db_index and not field.primary_key and not field.unique:
+                    editor.execute(editor._create_index_sql(model, fields=[field]))
+            for index in model._meta.indexes:
+                editor.add_index(model, index)
+    return True
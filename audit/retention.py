@@ -0,0 +1,284 @@
+"""
+Retention for the append-only log tables (audit.AuditLog, settingsdb.TransactionLog).
+
+Rows older than the retention horizon are moved out of the hot table into one
+gzipped NDJSON file per source and month (UTC):
+
+    LOG_ARCHIVE_DIR/<source>/<YYYY-MM>.ndjson.gz     concatenated gzip members
+    LOG_ARCHIVE_DIR/<source>/<YYYY-MM>.index.json    sidecar index
+
+Every archive chunk is appended as its own gzip member. The sidecar index
+records each member's byte range, row count and timestamp / id bounds, so a
+time-range read only decompresses the members that overlap the range.
+
+A chunk is written in this order: member (fsynced), journal with the chunk's
+ids, index, DELETE of the ids, journal removed. recover() replays whatever a
+crashed run left behind, so a row is never lost and never archived twice.
+
+iter_archived() reads archives back, and query_logs() merges them with the hot
+table into one newest-first stream.
+"""
+import gzip
+import heapq
+import json
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+ARCHIVE_CHUNK_SIZE = 5000
+ARCHIVE_SUFFIX = ".ndjson.gz"
+INDEX_SUFFIX = ".index.json"
+JOURNAL_SUFFIX = ".journal.json"
+
+# source name -> (model label, retention setting)
+SOURCES = {
+    "audit": ("audit.AuditLog", "AUDIT_LOG_RETENTION_DAYS"),
+    "transactions": ("settingsdb.TransactionLog", "TRANSACTION_LOG_RETENTION_DAYS"),
+}
+
+
+def get_model(source):
+    try:
+        label, _setting = SOURCES[source]
+    except KeyError:
+        raise ValueError(f"Unknown log source '{source}'. Choose from: {', '.join(SOURCES)}")
+    return apps.get_model(label)
+
+
+def retention_cutoff(source, now=None):
+    _label, setting = SOURCES[source]
+    days = getattr(settings, setting, 180)
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def archive_dir(source):
+    return os.path.join(settings.LOG_ARCHIVE_DIR, source)
+
+
+def month_key(value):
+    if timezone.is_aware(value):
+        value = value.astimezone(dt_timezone.utc)
+    return f"{value:%Y-%m}"
+
+
+def _paths(source, month):
+    base = os.path.join(archive_dir(source), month)
+    return base + ARCHIVE_SUFFIX, base + INDEX_SUFFIX, base + JOURNAL_SUFFIX
+
+
+def _columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _encode(row):
+    record = dict(row)
+    # Full precision; DjangoJSONEncoder would cut timestamps to milliseconds
+    record["timestamp"] = row["timestamp"].isoformat()
+    return json.dumps(record, cls=DjangoJSONEncoder, separators=(",", ":"))
+
+
+def _decode(line):
+    record = json.loads(line)
+    record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+    return record
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(data, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_index(source, month):
+    _archive, index_path, _journal = _paths(source, month)
+    try:
+        with open(index_path) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {"source": source, "month": month, "rows": 0, "bytes": 0, "members": []}
+
+
+def _add_member(index, member):
+    if any(m["offset"] == member["offset"] for m in index["members"]):
+        return index
+    index["members"].append(member)
+    index["rows"] += member["rows"]
+    index["bytes"] = member["offset"] + member["length"]
+    for key, pick in (("min_timestamp", min), ("max_timestamp", max), ("min_id", min), ("max_id", max)):
+        index[key] = pick(index[key], member[key]) if key in index else member[key]
+    return index
+
+
+def _delete_ids(model, ids):
+    # Plain DELETE without loading rows (AuditLog.delete() refuses per-row deletes)
+    db = router.db_for_write(model)
+    qn = connections[db].ops.quote_name
+    table, pk = qn(model._meta.db_table), qn(model._meta.pk.column)
+    with transaction.atomic(using=db), connections[db].cursor() as cursor:
+        for start in range(0, len(ids), 1000):
+            chunk = ids[start:start + 1000]
+            cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({', '.join(['%s'] * len(chunk))})", chunk)
+
+
+def list_months(source):
+    root = archive_dir(source)
+    if not os.path.isdir(root):
+        return []
+    return sorted(name[:-len(INDEX_SUFFIX)] for name in os.listdir(root) if name.endswith(INDEX_SUFFIX))
+
+
+def recover(source):
+    """Finishes chunks interrupted by a crash and drops half-written members."""
+    root = archive_dir(source)
+    if not os.path.isdir(root):
+        return
+    model = get_model(source)
+    for name in sorted(os.listdir(root)):
+        if not name.endswith(JOURNAL_SUFFIX):
+            continue
+        month = name[:-len(JOURNAL_SUFFIX)]
+        archive_path, index_path, journal_path = _paths(source, month)
+        with open(journal_path) as fh:
+            journal = json.load(fh)
+        _write_json(index_path, _add_member(read_index(source, month), journal["member"]))
+        _delete_ids(model, journal["ids"])
+        os.remove(journal_path)
+
+    for month in list_months(source):
+        archive_path, _index_path, _journal = _paths(source, month)
+        size = read_index(source, month)["bytes"]
+        if os.path.exists(archive_path) and os.path.getsize(archive_path) > size:
+            with open(archive_path, "r+b") as fh:
+                fh.truncate(size)
+
+
+def _archive_month_chunk(source, model, month, rows):
+    archive_path, index_path, journal_path = _paths(source, month)
+    index = read_index(source, month)
+
+    payload = gzip.compress("".join(_encode(row) + "\n" for row in rows).encode())
+    with open(archive_path, "ab") as fh:
+        offset = fh.tell()
+        fh.write(payload)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+    ids = [row["id"] for row in rows]
+    member = {
+        "offset": offset,
+        "length": len(payload),
+        "rows": len(rows),
+        "min_timestamp": min(row["timestamp"] for row in rows).isoformat(),
+        "max_timestamp": max(row["timestamp"] for row in rows).isoformat(),
+        "min_id": min(ids),
+        "max_id": max(ids),
+    }
+    _write_json(journal_path, {"member": member, "ids": ids})
+    _write_json(index_path, _add_member(index, member))
+    _delete_ids(model, ids)
+    os.remove(journal_path)
+
+
+def archive_source(source, before=None, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Moves every row of the source older than `before` (default: the retention
+    horizon) into the monthly archives. Returns {month: rows archived}.
+    """
+    model = get_model(source)
+    before = before or retention_cutoff(source)
+    os.makedirs(archive_dir(source), exist_ok=True)
+    recover(source)
+
+    columns = _columns(model)
+    archived = {}
+    while True:
+        # Archived rows are deleted, so the next chunk always starts at the head again
+        rows = list(
+            model._base_manager.filter(timestamp__lt=before)
+            .order_by("timestamp", "id")
+            .values(*columns)[:chunk_size]
+        )
+        if not rows:
+            break
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(month_key(row["timestamp"]), []).append(row)
+        for month, month_rows in by_month.items():
+            _archive_month_chunk(source, model, month, month_rows)
+            archived[month] = archived.get(month, 0) + len(month_rows)
+    return archived
+
+
+def _overlaps(bounds, start, end):
+    if start is not None and datetime.fromisoformat(bounds["max_timestamp"]) < start:
+        return False
+    if end is not None and datetime.fromisoformat(bounds["min_timestamp"]) >= end:
+        return False
+    return True
+
+
+def _read_member(archive_path, member):
+    with open(archive_path, "rb") as fh:
+        fh.seek(member["offset"])
+        payload = fh.read(member["length"])
+    return [_decode(line) for line in gzip.decompress(payload).decode().splitlines() if line]
+
+
+def _sort_key(record):
+    return (record["timestamp"], record["id"])
+
+
+def iter_archived(source, start=None, end=None, filters=None):
+    """
+    Yields archived records with start <= timestamp < end, newest first.
+    filters is a dict of field -> value equality tests (attnames, e.g. "user_id").
+    Only index-matching members are decompressed; memory is bounded by the
+    matching members of one month.
+    """
+    filters = filters or {}
+
+    def keep(record):
+        if start is not None and record["timestamp"] < start:
+            return False
+        if end is not None and record["timestamp"] >= end:
+            return False
+        return all(str(record.get(key)) == str(value) for key, value in filters.items())
+
+    for month in reversed(list_months(source)):
+        index = read_index(source, month)
+        if not index["members"] or not _overlaps(index, start, end):
+            continue
+        archive_path, _index_path, _journal = _paths(source, month)
+        members = []
+        for member in index["members"]:
+            if _overlaps(member, start, end):
+                records = [record for record in _read_member(archive_path, member) if keep(record)]
+                records.sort(key=_sort_key, reverse=True)
+                members.append(records)
+        yield from heapq.merge(*members, key=_sort_key, reverse=True)
+
+
+def query_logs(source, start=None, end=None, filters=None, limit=None):
+    """
+    Hot table and archives as one newest-first list of dicts, so callers do not
+    need to know where the retention horizon currently is.
+    """
+    model = get_model(source)
+    filters = filters or {}
+    qs = model._base_manager.filter(**filters)
+    if start is not None:
+        qs = qs.filter(timestamp__gte=start)
+    if end is not None:
+        qs = qs.filter(timestamp__lt=end)
+    hot = qs.order_by("-timestamp", "-id").values(*_columns(model)).iterator(chunk_size=1000)
+    merged = heapq.merge(hot, iter_archived(source, start, end, filters), key=_sort_key, reverse=True)
+    return list(islice(merged, limit)) if limit else list(merged)
@@ -0,0 +1,279 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.test import TestCase, RequestFactory
+from django.utils import timezone
+
+from .models import AuditLog
+from .utils import log_event
+
+
+class AuditLogBufferTest(TestCase):
+    def test_events_of_a_request_are_written_in_one_insert(self):
+        from core.commit_buffer import request_scope
+        from .utils import _buffer
+
+        request = RequestFactory().get('/', HTTP_USER_AGENT='tests', HTTP_X_FORWARDED_FOR='10.0.0.1, 10.0.0.2')
+
+        with request_scope():
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(20):
+                    log_event(1, 'ADMIN', 'UPDATE', 'User', i, None, {'n': i}, 'API', request)
+                try:
+                    with transaction.atomic():
+                        log_event(1, 'ADMIN', 'DELETE', 'User', 99, None, None, 'API', request)
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+
+            self.assertEqual(AuditLog.objects.count(), 0)
+            logged_by = timezone.now()
+            # One INSERT inside its own savepoint
+            with self.assertNumQueries(3):
+                self.assertEqual(_buffer.flush(), 20)
+
+        self.assertEqual(AuditLog.objects.filter(action_type='UPDATE').count(), 20)
+        self.assertFalse(AuditLog.objects.filter(action_type='DELETE').exists())
+        # Rows carry the time of their event, not of the flush, so they keep their order
+        self.assertFalse(AuditLog.objects.filter(timestamp__gt=logged_by).exists())
+        self.assertEqual(
+            list(AuditLog.objects.order_by('timestamp', 'id').values_list('entity_id', flat=True)),
+            [str(i) for i in range(20)],
+        )
+
+        # Request metadata is resolved once and shared by every event of the request
+        self.assertEqual(set(AuditLog.objects.values_list('ip_address', 'user_agent', 'correlation_id').distinct()), {
+            ('10.0.0.1', 'tests', request._request_context.correlation_id),
+        })
+
+    def test_failed_bulk_insert_falls_back_to_single_rows(self):
+        from .utils import _write
+
+        good = AuditLog(action_type='LOGIN', entity_type='Auth', source='UI')
+        bad = AuditLog(action_type=None, entity_type='Auth', source='UI')
+        with self.assertLogs('audit.utils', 'ERROR') as logs:
+            _write([good, bad, AuditLog(action_type='LOGOUT', entity_type='Auth', source='UI')])
+
+        self.assertEqual(sorted(AuditLog.objects.values_list('action_type', flat=True)), ['LOGIN', 'LOGOUT'])
+        self.assertEqual(len(logs.records), 2)
+
+    def test_saved_rows_are_append_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            log_event(None, None, 'LOGIN', 'Auth', 1, source='UI')
+
+        row = AuditLog.objects.get()
+        row.action_type = 'LOGOUT'
+        with self.assertRaises(ValidationError):
+            row.save()
+
+
+class LogRetentionTest(TestCase):
+    def setUp(self):
+        import tempfile
+        from datetime import datetime, timezone as dt_timezone
+        from django.test import override_settings
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(LOG_ARCHIVE_DIR=self.tmp.name, AUDIT_LOG_RETENTION_DAYS=30)
+        self.settings_override.enable()
+
+        # auto_now_add ignores explicit timestamps, so back-date the rows afterwards
+        AuditLog.objects.bulk_create([
+            AuditLog(action_type='UPDATE', entity_type='User', entity_id=str(i), source='API', actor_user_id=i % 2)
+            for i in range(12)
+        ])
+        for i, row in enumerate(AuditLog.objects.order_by('id')):
+            month = 1 if i < 5 else 2
+            AuditLog.objects.filter(pk=row.pk).update(timestamp=datetime(2025, month, 1 + i, tzinfo=dt_timezone.utc))
+        self.recent = AuditLog.objects.create(action_type='LOGIN', entity_type='Auth', source='UI', actor_user_id=1)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp.cleanup()
+
+    def test_old_rows_move_to_monthly_archives_and_are_read_back(self):
+        from . import retention
+
+        self.assertEqual(retention.archive_source('audit', chunk_size=4), {'2025-01': 5, '2025-02': 7})
+        self.assertEqual(list(AuditLog.objects.values_list('pk', flat=True)), [self.recent.pk])
+
+        index = retention.read_index('audit', '2025-02')
+        self.assertEqual(index['rows'], 7)
+        self.assertEqual(len(index['members']), 2)  # chunks of 4: 3 + 4 rows
+
+        items = retention.query_logs('audit')
+        self.assertEqual(len(items), 13)
+        self.assertEqual(items[0]['id'], self.recent.pk)
+        self.assertEqual([row['timestamp'] for row in items], sorted((row['timestamp'] for row in items), reverse=True))
+
+        from datetime import datetime, timezone as dt_timezone
+        january = retention.query_logs(
+            'audit', datetime(2025, 1, 1, tzinfo=dt_timezone.utc), datetime(2025, 2, 1, tzinfo=dt_timezone.utc),
+            filters={'actor_user_id': 0},
+        )
+        self.assertEqual([row['entity_id'] for row in january], ['4', '2', '0'])
+
+    def test_recover_finishes_an_interrupted_chunk(self):
+        import json
+        import os
+        from unittest.mock import patch
+        from . import retention
+
+        with patch.object(retention, '_delete_ids', side_effect=RuntimeError('crash')):
+            with self.assertRaises(RuntimeError):
+                retention.archive_source('audit')
+        self.assertEqual(AuditLog.objects.count(), 13)
+
+        # Half-written member from a second crash is truncated away
+        archive_path = os.path.join(self.tmp.name, 'audit', '2025-01' + retention.ARCHIVE_SUFFIX)
+        with open(archive_path, 'ab') as fh:
+            fh.write(b'partial')
+
+        retention.archive_source('audit')
+        self.assertEqual(AuditLog.objects.count(), 1)
+        archived = list(retention.iter_archived('audit'))
+        self.assertEqual(len(archived), 12)
+        self.assertEqual(len({row['id'] for row in archived}), 12)
+        self.assertFalse([name for name in os.listdir(os.path.join(self.tmp.name, 'audit')) if 'journal' in name])
+        with open(os.path.join(self.tmp.name, 'audit', '2025-01' + retention.INDEX_SUFFIX)) as fh:
+            self.assertEqual(json.load(fh)['bytes'], os.path.getsize(archive_path))
+
+    def test_archive_logs_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('archive_logs', source='audit', stdout=out)
+        self.assertIn('audit: 12 rows archived', out.getvalue())
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+
+class AuditExportTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        from rbac.models import Role, Permission, RolePermission, UserRole
+
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email='auditor@example.com', password='pw', name='Auditor', role='admin')
+        role = Role.objects.create(code='AUD', name='Auditor')
+        for code in ('AUDIT_LOG_VIEW', 'AUDIT_LOG_EXPORT'):
+            RolePermission.objects.create(role=role, permission=Permission.objects.create(code=code, name=code, module='Audit'))
+        UserRole.objects.create(user=self.user, role=role)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        AuditLog.objects.bulk_create([
+            AuditLog(action_type='UPDATE' if i % 3 else 'DELETE', entity_type='User', entity_id=str(i), source='API', new_value={'n': i})
+            for i in range(25)
+        ])
+
+    def test_ndjson_export_streams_every_matching_row(self):
+        import json
+        from unittest.mock import patch
+
+        # Small pages so the export crosses several keyset boundaries
+        with patch('audit.export.EXPORT_BATCH_SIZE', 4):
+            response = self.client.get('/api/audit/logs/export/', {'action_type': 'UPDATE'}, HTTP_X_ACTIVE_ROLE='AUD')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual(len(rows), AuditLog.objects.filter(action_type='UPDATE').count())
+        self.assertEqual(len({row['id'] for row in rows}), len(rows))
+        self.assertEqual([row['id'] for row in rows], sorted((row['id'] for row in rows), reverse=True))
+
+    def test_csv_export_and_permission(self):
+        import csv
+        import io
+
+        response = self.client.get('/api/audit/logs/export/', {'export_format': 'csv'}, HTTP_X_ACTIVE_ROLE='AUD')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'timestamp', 'actor_user_id'])
+        self.assertEqual(len(rows), 26)
+
+        from rbac.models import RolePermission
+        from django.core.cache import cache
+        RolePermission.objects.filter(permission__code='AUDIT_LOG_EXPORT').delete()
+        cache.clear()
+        response = self.client.get('/api/audit/logs/export/', HTTP_X_ACTIVE_ROLE='AUD')
+        self.assertEqual(response.status_code, 403)
+
+    def test_list_is_cursor_paginated_and_filtered(self):
+        response = self.client.get('/api/audit/logs/', {'page_size': 10, 'action_type': 'UPDATE'}, HTTP_X_ACTIVE_ROLE='AUD')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertNotIn('count', data)
+        self.assertEqual(len(data['results']), 10)
+
+        seen = [row['id'] for row in data['results']]
+        while data['next']:
+            data = self.client.get(data['next'], HTTP_X_ACTIVE_ROLE='AUD').json()
+            seen += [row['id'] for row in data['results']]
+        self.assertEqual(sorted(seen), sorted(AuditLog.objects.filter(action_type='UPDATE').values_list('id', flat=True)))
+
+
+class EntityTimelineTest(TestCase):
+    def test_sources_are_merged_into_one_sorted_stream(self):
+        from datetime import date, datetime, timedelta, timezone as dt_timezone
+        from batchdb.models import Batch, BatchTransaction
+        from settingsdb.models import TransactionLog
+        from .timeline import entity_timeline
+
+        batch = Batch.objects.create(batch_id='PYTL', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1))
+        BatchTransaction.objects.filter(batch=batch).delete()
+        base = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        TransactionLog.objects.filter(table_name='Batch').delete()
+
+        for i in range(4):
+            TransactionLog.objects.create(table_name='Batch', object_id=str(batch.pk), action='UPDATE', changes={'diff': {'n': i}}, timestamp=base + timedelta(hours=2 * i))
+            BatchTransaction.objects.create(batch=batch, transaction_type='BATCH_UPDATED', timestamp=base + timedelta(hours=2 * i + 1))
+        # Same-timestamp rows from different sources are not lost across pages
+        TransactionLog.objects.create(table_name='Batch', object_id=str(batch.pk), action='UPDATE', changes={}, timestamp=base + timedelta(hours=7))
+        TransactionLog.objects.create(table_name='Batch', object_id='999', action='UPDATE', changes={}, timestamp=base)
+
+        items, cursor = entity_timeline('Batch', batch.pk, limit=3)
+        while cursor:
+            page, cursor = entity_timeline('Batch', batch.pk, cursor=cursor, limit=3)
+            items += page
+
+        self.assertEqual(len(items), 9)
+        self.assertEqual([item['timestamp'] for item in items], sorted((item['timestamp'] for item in items), reverse=True))
+        self.assertEqual([item['source'] for item in items[:2]], ['transaction', 'batch'])
+
+    def test_each_source_is_read_under_its_own_name(self):
+        from datetime import date
+        from django.contrib.auth import get_user_model
+        from batchdb.models import Batch
+        from batchdb.services import enroll_students
+        from settingsdb.signals import set_current_user
+        from studentsdb.models import Student
+        from .timeline import entity_timeline
+
+        User = get_user_model()
+        admin = User.objects.create_user(email='timeline-admin@example.com', name='Admin', role='admin', password='pw')
+        set_current_user(admin)
+        self.addCleanup(set_current_user, None)
+
+        # Written by audit.signals (User, Auth) and settingsdb.signals (CustomUser, Student)
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.create_user(email='timeline@example.com', name='Timeline', role='staff', password='pw')
+            user.name = 'Timeline User'
+            user.save()
+            student = Student.objects.create(student_id='TL001', first_name='Tara', mode_of_class='ON', week_type='WD')
+            batch = Batch.objects.create(batch_id='PYTM', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1))
+            enroll_students(batch, [student], user=admin)
+            self.client.login(email='timeline@example.com', password='pw')
+
+        items, _cursor = entity_timeline('User', user.pk)
+        self.assertEqual(
+            {(item['source'], item['action']) for item in items},
+            {('audit', 'CREATE'), ('audit', 'LOGIN'), ('audit', 'UPDATE'), ('transaction', 'CREATE'), ('transaction', 'UPDATE')},
+        )
+
+        items, _cursor = entity_timeline('Student', student.pk)
+        self.assertEqual(
+            sorted((item['source'], item['action']) for item in items),
+            [('batch', 'STUDENT_ADDED'), ('transaction', 'CREATE')],
+        )
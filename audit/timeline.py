@@ -0,0 +1,153 @@
+"""
+Entity timeline: AuditLog, settingsdb.TransactionLog and batchdb.BatchTransaction
+rows about one object, merged into a single newest-first stream.
+
+Each source is read through its (entity, timestamp) index with its own
+LIMIT, and heapq.merge interleaves the three sorted streams, so a page costs
+three index range scans whatever the size of the tables. Pages are chained with
+an opaque cursor encoding the last (timestamp, source, id) returned.
+"""
+import base64
+import heapq
+from datetime import datetime
+
+from django.apps import apps
+from django.db.models import Q
+
+TIMELINE_PAGE_SIZE = 50
+TIMELINE_MAX_PAGE_SIZE = 500
+
+# Tie-break order for rows sharing a timestamp (higher sorts first in the newest-first stream)
+SOURCE_RANK = {"audit": 2, "transaction": 1, "batch": 0}
+
+# What each source calls an entity: AuditLog.entity_type as written by audit.signals,
+# TransactionLog.table_name (the model name, see settingsdb.signals) and the
+# BatchTransaction filter. Entity types not listed use their own name in AuditLog
+# and TransactionLog (Role, Permission, Course, ...).
+TIMELINE_ENTITIES = {
+    "User": {"audit": ("User", "Auth"), "transaction": ("CustomUser",)},
+    "Config": {"audit": ("Config",), "transaction": ("RoleProfileConfig",)},
+    "Batch": {"audit": (), "transaction": ("Batch",), "batch": "batch_id"},
+    "Student": {"audit": (), "transaction": ("Student",), "batch": "affected_students"},
+}
+
+
+def entity_sources(entity_type):
+    return TIMELINE_ENTITIES.get(entity_type, {"audit": (entity_type,), "transaction": (entity_type,)})
+
+
+def encode_cursor(item):
+    raw = f"{item['timestamp'].isoformat()}|{item['source']}|{item['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(timestamp, source rank, id) or ValueError."""
+    try:
+        timestamp, source, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), SOURCE_RANK[source], int(pk)
+    except (KeyError, TypeError, UnicodeDecodeError) as e:
+        raise ValueError(cursor) from e
+
+
+def _after_cursor(queryset, source, cursor):
+    """Rows strictly after the cursor position in (timestamp, rank, id) descending order."""
+    if cursor is None:
+        return queryset
+    timestamp, rank, pk = cursor
+    older = Q(timestamp__lt=timestamp)
+    own_rank = SOURCE_RANK[source]
+    if own_rank < rank:
+        return queryset.filter(older | Q(timestamp=timestamp))
+    if own_rank == rank:
+        return queryset.filter(older | Q(timestamp=timestamp, id__lt=pk))
+    return queryset.filter(older)
+
+
+def _audit_rows(entity_type, entity_id, cursor, limit):
+    """entity_type as written to AuditLog.entity_type."""
+    AuditLog = apps.get_model("audit", "AuditLog")
+    queryset = AuditLog.objects.filter(entity_type=entity_type, entity_id=str(entity_id))
+    queryset = _after_cursor(queryset, "audit", cursor).order_by("-timestamp", "-id")
+    for row in queryset.values(
+        "id", "timestamp", "actor_user_id", "actor_role", "action_type", "old_value", "new_value", "source"
+    )[:limit]:
+        yield {
+            "source": "audit",
+            "id": row["id"],
+            "timestamp": row["timestamp"],
+            "action": row["action_type"],
+            "actor_id": row["actor_user_id"],
+            "details": {
+                "actor_role": row["actor_role"],
+                "old_value": row["old_value"],
+                "new_value": row["new_value"],
+                "channel": row["source"],
+            },
+        }
+
+
+def _transaction_rows(table_name, entity_id, cursor, limit):
+    TransactionLog = apps.get_model("settingsdb", "TransactionLog")
+    queryset = TransactionLog.objects.filter(table_name=table_name, object_id=str(entity_id))
+    queryset = _after_cursor(queryset, "transaction", cursor).order_by("-timestamp", "-id")
+    for row in queryset.values("id", "timestamp", "user_id", "action", "changes")[:limit]:
+        changes = row["changes"] if isinstance(row["changes"], dict) else {}
+        yield {
+            "source": "transaction",
+            "id": row["id"],
+            "timestamp": row["timestamp"],
+            "action": row["action"],
+            "actor_id": row["user_id"],
+            "details": {"diff": changes["diff"]} if "diff" in changes else changes,
+        }
+
+
+def _batch_rows(lookup, entity_id, cursor, limit):
+    BatchTransaction = apps.get_model("batchdb", "BatchTransaction")
+    queryset = BatchTransaction.objects.filter(**{lookup: entity_id})
+    queryset = _after_cursor(queryset, "batch", cursor).order_by("-timestamp", "-id")
+    for row in queryset.values("id", "timestamp", "transaction_type", "user_id", "batch_id", "details")[:limit]:
+        yield {
+            "source": "batch",
+            "id": row["id"],
+            "timestamp": row["timestamp"],
+            "action": row["transaction_type"],
+            "actor_id": row["user_id"],
+            "details": {"batch_id": row["batch_id"], **(row["details"] or {})},
+        }
+
+
+def _sort_key(item):
+    return (item["timestamp"], SOURCE_RANK[item["source"]], item["id"])
+
+
+def entity_timeline(entity_type, entity_id, cursor=None, limit=TIMELINE_PAGE_SIZE):
+    """
+    One page of the object's history, newest first. entity_type is the name
+    used by the audit log ("User", "Role", "Student", "Batch", ...), mapped to
+    each source's own name through TIMELINE_ENTITIES. Returns (items, next_cursor).
+    """
+    position = decode_cursor(cursor) if cursor else None
+    sources = entity_sources(entity_type)
+    if not str(entity_id).isdigit() and "batch" in sources:
+        raise ValueError(entity_id)
+
+    # One extra row tells whether another page exists; every name is its own
+    # index range scan, merged below
+    fetch = limit + 1
+    streams = [_audit_rows(name, entity_id, position, fetch) for name in sources["audit"]]
+    streams += [_transaction_rows(name, entity_id, position, fetch) for name in sources["transaction"]]
+    if "batch" in sources:
+        streams.append(_batch_rows(sources["batch"], entity_id, position, fetch))
+    items = []
+    for item in heapq.merge(*streams, key=_sort_key, reverse=True):
+        items.append(item)
+        if len(items) == fetch:
+            break
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1])
+    return items, next_cursor
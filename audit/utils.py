@@ -1,47 +1,66 @@
+import logging
 import uuid
 from django.db import transaction
 from django.utils import timezone
+from core import request_context
+from core.commit_buffer import CommitBuffer
 from .models import AuditLog
 
+logger = logging.getLogger(__name__)
 
-def _meta_from_request(request):
-    ip = None
-    ua = None
-    cid = None
+
+def _write(entries):
+    # Plain INSERTs: AuditLog rows are append-only, so no save() / exists() round trip
     try:
-        ip = request.META.get("REMOTE_ADDR")
-        xff = request.META.get("HTTP_X_FORWARDED_FOR")
-        if xff:
-            ip = xff.split(",")[0].strip()
-        ua = request.META.get("HTTP_USER_AGENT")
-        cid = request.META.get("HTTP_X_CORRELATION_ID") or request.META.get("HTTP_X_REQUEST_ID")
+        with transaction.atomic():
+            AuditLog.objects.bulk_create(entries)
+        return
     except Exception:
-        pass
-    return ip, ua, cid
-
+        if len(entries) == 1:
+            logger.exception("Failed to write audit event %s %s", entries[0].action_type, entries[0].entity_type)
+            return
+        logger.exception("Bulk insert of %d audit events failed, writing them one by one", len(entries))
 
-def log_event(actor_user_id, actor_role, action_type, entity_type, entity_id=None, old_value=None, new_value=None, source="API", request=None):
-    def _create():
-        ip, ua, cid = _meta_from_request(request) if request else (None, None, None)
+    # One bad row must not cost the rest of the batch
+    for entry in entries:
         try:
-            AuditLog.objects.create(
-                timestamp=timezone.now(),
-                actor_user_id=actor_user_id,
-                actor_role=actor_role,
-                action_type=action_type,
-                entity_type=entity_type,
-                entity_id=str(entity_id) if entity_id is not None else None,
-                old_value=old_value,
-                new_value=new_value,
-                source=source,
-                ip_address=ip,
-                user_agent=ua,
-                correlation_id=cid or str(uuid.uuid4()),
-            )
+            with transaction.atomic():
+                AuditLog.objects.bulk_create([entry])
         except Exception:
-            pass
+            logger.exception("Failed to write audit event %s %s", entry.action_type, entry.entity_type)
+
+
+# Events join the buffer when their transaction commits and are written with one
+# INSERT per request (or per AUDIT_FLUSH_SIZE events); see core.commit_buffer
+AUDIT_FLUSH_SIZE = 500
+_buffer = CommitBuffer("audit_log", _write, flush_size=AUDIT_FLUSH_SIZE)
+
+
+def log_event(actor_user_id, actor_role, action_type, entity_type, entity_id=None, old_value=None, new_value=None, source="API", request=None, actor_from_context=False):
+    # Client metadata comes from the request context. The actor only does when the
+    # caller opts in: an actor-less event (a failed login, a system change) stays actor-less
+    context = request_context.context_for(request) if request is not None else request_context.get_context()
+    if actor_from_context and actor_user_id is None and context.user is not None:
+        actor_user_id = context.user.pk
+        actor_role = actor_role or context.active_role
+    ip, ua, cid = context.meta
+    entry = AuditLog(
+        timestamp=timezone.now(),
+        actor_user_id=actor_user_id,
+        actor_role=actor_role,
+        action_type=action_type,
+        entity_type=entity_type,
+        entity_id=str(entity_id) if entity_id is not None else None,
+        old_value=old_value,
+        new_value=new_value,
+        source=source,
+        ip_address=ip,
+        user_agent=ua,
+        correlation_id=cid or str(uuid.uuid4()),
+    )
 
     try:
-        transaction.on_commit(_create)
+        # Written immediately outside a transaction; otherwise once it commits
+        _buffer.add(entry)
     except Exception:
-        _create()
+        _write([entry])
@@ -0,0 +1,182 @@
+"""
+All-batches Excel export behind batchdb.views.export_all_batches_data.
+
+One values() query over Batch, left-joined to its memberships and their
+students (batches without students still get a row), is streamed in chunks into
+an openpyxl write-only workbook, so memory stays flat however many rows there
+are. Rows of one batch share a colour band applied through named styles.
+Exports above BATCH_EXPORT_BACKGROUND_ROWS are generated by a BatchExportJob,
+which is started again if its heartbeat stops (the worker running it restarted).
+"""
+import logging
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, NamedStyle, PatternFill
+
+from .models import Batch, BatchExportJob, BatchStudent
+from .services import run_job, stale_job_cutoff
+
+logger = logging.getLogger(__name__)
+
+SHEET_NAME = 'All Batches'
+FILE_NAME = 'all_batches_details.xlsx'
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+EXPORT_CHUNK_SIZE = 2000
+
+COLUMNS = ['Batch ID', 'Course', 'Trainer', 'Start Date', 'End Date', 'Slot Time', 'Status', 'Days', 'Student ID', 'Student Name', 'Email', 'Phone']
+BAND_COLORS = ['FFFFCC', 'CCFFCC', 'CCFFFF', 'FFCCFF', 'CCE5FF', 'FFDDAA']
+HEADER_STYLE = 'batch_export_header'
+BAND_STYLE = 'batch_export_band_{}'
+
+_FIELDS = (
+    'batch_id', 'course_label', 'trainer_label', 'start_date', 'end_date', 'start_time', 'end_time',
+    'batch_status', 'days', 'student_code', 'student_first_name', 'student_last_name', 'student_email', 'student_phone',
+)
+
+
+def export_rows():
+    """Batches with their students, one row per membership, ordered by batch ID."""
+    return (
+        Batch.objects.annotate(
+            course_label=Coalesce('course__course_name', Value('N/A')),
+            trainer_label=Coalesce('trainer__name', Value('N/A')),
+            student_code=F('batchstudent__student__student_id'),
+            student_first_name=F('batchstudent__student__first_name'),
+            student_last_name=F('batchstudent__student__last_name'),
+            student_email=F('batchstudent__student__email'),
+            student_phone=F('batchstudent__student__phone'),
+        )
+        .order_by('batch_id', 'batchstudent__id')
+        .values_list(*_FIELDS)
+    )
+
+
+def estimated_rows():
+    return BatchStudent.objects.count()
+
+
+def _slot_time(start_time, end_time):
+    # Same text as Batch.get_slottime
+    if start_time and end_time:
+        return f"{start_time.strftime('%I:%M %p')} - {end_time.strftime('%I:%M %p')}"
+    return "Not Set"
+
+
+def _build_workbook():
+    workbook = Workbook(write_only=True)
+    workbook.add_named_style(NamedStyle(name=HEADER_STYLE, font=Font(bold=True)))
+    for index, color in enumerate(BAND_COLORS):
+        fill = PatternFill(fill_type='solid', start_color=color, end_color=color)
+        workbook.add_named_style(NamedStyle(name=BAND_STYLE.format(index), fill=fill))
+    return workbook
+
+
+def _styled_row(worksheet, values, style):
+    row = []
+    for value in values:
+        cell = WriteOnlyCell(worksheet, value=value)
+        cell.style = style
+        row.append(cell)
+    return row
+
+
+def write_all_batches(fh, heartbeat=None):
+    """
+    Writes the export workbook to the binary file fh. Returns the number of data rows.
+    heartbeat() is called every EXPORT_CHUNK_SIZE rows.
+    """
+    workbook = _build_workbook()
+    worksheet = workbook.create_sheet(SHEET_NAME)
+    worksheet.append(_styled_row(worksheet, COLUMNS, HEADER_STYLE))
+
+    statuses = dict(Batch.STATUS_CHOICES)
+    current_batch, band, count = None, -1, 0
+    for (batch_id, course, trainer, start_date, end_date, start_time, end_time, status,
+         days, student_code, first_name, last_name, email, phone) in export_rows().iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        if batch_id != current_batch:
+            current_batch, band = batch_id, band + 1
+        values = [
+            batch_id,
+            course,
+            trainer,
+            start_date.strftime('%d-%m-%Y'),
+            end_date.strftime('%d-%m-%Y'),
+            _slot_time(start_time, end_time),
+            statuses.get(status, status),
+            ', '.join(days or []),
+        ]
+        if student_code is not None:
+            values += [student_code, f"{first_name} {last_name or ''}", email, phone]
+        worksheet.append(_styled_row(worksheet, values, BAND_STYLE.format(band % len(BAND_COLORS))))
+        count += 1
+        if heartbeat is not None and not count % EXPORT_CHUNK_SIZE:
+            heartbeat()
+
+    workbook.save(fh)
+    return count
+
+
+def process_job(job):
+    """Generates the export file of the job; failures end up on the job."""
+    try:
+        with tempfile.TemporaryFile() as fh:
+            job.row_count = write_all_batches(fh, heartbeat=lambda: _beat(job.pk))
+            fh.seek(0)
+            job.file.save(f"all_batches_{timezone.now():%Y%m%d%H%M%S}.xlsx", File(fh), save=False)
+        job.status = 'COMPLETED'
+    except Exception as e:
+        logger.exception("Batch export %s failed", job.pk)
+        job.status = 'FAILED'
+        job.error_message = str(e)
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def _beat(job_pk):
+    BatchExportJob.objects.filter(pk=job_pk).update(heartbeat_at=timezone.now())
+
+
+def _process_pk(job_pk):
+    process_job(BatchExportJob.objects.get(pk=job_pk))
+
+
+def start_job(job):
+    BatchExportJob.objects.filter(pk=job.pk).update(status='PROCESSING', heartbeat_at=timezone.now())
+    run_job(_process_pk, job.pk, name=f"batch-export-{job.pk}")
+
+
+def claim_stale_jobs(jobs=None):
+    """
+    Primary keys of the PROCESSING jobs (of jobs, default all) whose heartbeat
+    stopped before stale_job_cutoff(). Each is claimed by moving its heartbeat
+    with a conditional UPDATE, so two callers never restart the same job.
+    """
+    jobs = BatchExportJob.objects.all() if jobs is None else jobs
+    cutoff = stale_job_cutoff()
+    stale = Q(status='PROCESSING') & (Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, created_at__lt=cutoff))
+    claimed = []
+    for pk in jobs.filter(stale).values_list('pk', flat=True):
+        if BatchExportJob.objects.filter(stale, pk=pk).update(heartbeat_at=timezone.now()):
+            claimed.append(pk)
+    return claimed
+
+
+def restart_stale_jobs(jobs=None):
+    """Starts the stale jobs of jobs again; an export only reads, so re-running it is safe. Returns their number."""
+    claimed = claim_stale_jobs(jobs)
+    for pk in claimed:
+        run_job(_process_pk, pk, name=f"batch-export-{pk}")
+    return len(claimed)
+
+
+def runs_in_background():
+    threshold = getattr(settings, 'BATCH_EXPORT_BACKGROUND_ROWS', 20000)
+    return bool(threshold) and estimated_rows() > threshold
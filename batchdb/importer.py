@@ -0,0 +1,337 @@
+"""
+Excel batch import engine behind batchdb.views.import_batches.
+
+1. The sheet is normalised column by column with pandas (dates, time slot,
+   batch type, student id lists) and rows failing validation are flagged.
+2. Courses (module_name), trainers, students and existing batch IDs are
+   resolved with a handful of IN queries for the whole sheet.
+3. Valid rows are written in chunks of BATCH_IMPORT_CHUNK_SIZE, each inside its
+   own atomic block: batches, BATCH_CREATED / STUDENT_ADDED transactions,
+   memberships and missing placements go in with bulk_create. A chunk that
+   fails is retried row by row, so one bad row is reported instead of losing
+   the chunk.
+
+Progress, counts and the rejected rows are kept on a BatchImportJob; every
+update also moves its heartbeat, so a job whose thread died is failed by
+fail_stale_jobs instead of showing PROCESSING forever.
+"""
+import logging
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from coursedb.models import Course
+from placementdb.models import Placement
+from studentsdb.models import Student
+from trainersdb.models import Trainer
+from .models import Batch, BatchImportJob, BatchTransaction
+from .search import schedule_refresh
+from .services import generate_batch_ids, run_job, stale_job_cutoff, write_enrollments
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['module_name', 'batch_type', 'trainer', 'start_date', 'end_date', 'time_slot', 'students']
+LOOKUP_SLICE = 500
+
+# Sheet values accepted for batch_type: the codes and their labels, case-insensitive
+BATCH_TYPES = {}
+for _code, _label in Batch.BATCH_TYPE_CHOICES:
+    BATCH_TYPES[_code.lower()] = _code
+    BATCH_TYPES[_label.lower()] = _code
+
+
+def _chunk_size():
+    return getattr(settings, 'BATCH_IMPORT_CHUNK_SIZE', 200)
+
+
+def _flag(errors, mask, message):
+    """Sets message on the rows in mask that have no error yet."""
+    return errors.mask(mask & (errors == ''), message)
+
+
+def missing_columns(df):
+    columns = {str(column).strip() for column in df.columns}
+    return [column for column in REQUIRED_COLUMNS if column not in columns]
+
+
+def normalize_sheet(df):
+    """
+    Returns (raw, sheet): the sheet as strings for the error report, and the
+    normalised columns plus an `error` column ('' for valid rows).
+    """
+    df = df.rename(columns=lambda column: str(column).strip())
+    raw = df.astype(object).where(df.notna(), '').astype(str)
+    text = raw.apply(lambda column: column.str.strip())
+    if 'batch_id' not in text:
+        text['batch_id'] = ''
+
+    sheet = pd.DataFrame(index=df.index)
+    sheet['batch_id'] = text['batch_id']
+    sheet['module_name'] = text['module_name']
+    sheet['trainer'] = text['trainer']
+    sheet['batch_type'] = text['batch_type'].str.lower().map(BATCH_TYPES)
+    # Excel cells arrive as timestamps ("2025-08-01 00:00:00") or text
+    for column in ('start_date', 'end_date'):
+        sheet[column] = pd.to_datetime(text[column].str.split(' ').str[0], format='%Y-%m-%d', errors='coerce').dt.date
+    # "9:00 AM - 10:30 AM"; other formats leave the times empty
+    slots = text['time_slot'].str.split('-', n=1, expand=True).reindex(columns=[0, 1]).fillna('')
+    for position, column in enumerate(('start_time', 'end_time')):
+        sheet[column] = pd.to_datetime(slots[position].str.strip(), format='%I:%M %p', errors='coerce').dt.time
+    sheet['students'] = text['students'].str.split(',').map(
+        lambda codes: list(dict.fromkeys(code.strip() for code in codes if code.strip()))
+    )
+
+    errors = pd.Series('', index=df.index, dtype=object)
+    errors = _flag(errors, (text[REQUIRED_COLUMNS] == '').any(axis=1), "All fields are mandatory.")
+    errors = _flag(errors, sheet['start_date'].isna() | sheet['end_date'].isna(), "Invalid date format. Use YYYY-MM-DD.")
+    errors = _flag(errors, sheet['batch_type'].isna(), "Invalid batch type: " + text['batch_type'])
+    errors = _flag(errors, (sheet['batch_id'] != '') & sheet['batch_id'].duplicated(), "Batch ID appears more than once in the sheet: " + sheet['batch_id'])
+    sheet['error'] = errors
+    return raw, sheet
+
+
+def _lookup(queryset, field, values):
+    """Rows of queryset whose field is in values, in IN slices of LOOKUP_SLICE."""
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_SLICE):
+        yield from queryset.filter(**{f'{field}__in': values[start:start + LOOKUP_SLICE]})
+
+
+def resolve(sheet):
+    """Resolves courses, trainers, students and taken batch IDs for the whole sheet."""
+    valid = sheet[sheet['error'] == '']
+
+    names = set(valid['module_name'])
+    courses = {}
+    for course in Course.objects.filter(Q(course_name__in=names) | Q(code__in=names)).select_related('category'):
+        courses.setdefault(course.course_name, course)
+        courses.setdefault(course.code, course)
+
+    trainers = {}
+    for trainer in _lookup(Trainer.objects.order_by('pk'), 'name', set(valid['trainer'])):
+        trainers.setdefault(trainer.name, trainer)
+
+    codes = set(valid['students'].explode().dropna())
+    students = {student.student_id: student for student in _lookup(Student.objects.all(), 'student_id', codes)}
+
+    batch_ids = set(valid['batch_id']) - {''}
+    taken = set(_lookup(Batch.objects.values_list('batch_id', flat=True), 'batch_id', batch_ids))
+
+    return courses, trainers, students, taken
+
+
+def validate_references(sheet, courses, students, taken):
+    errors = sheet['error']
+    course = sheet['module_name'].map(courses)
+    # Without a course there is no batch ID to generate, unless the sheet provides one
+    errors = _flag(errors, course.isna() & (sheet['batch_id'] == ''), "Module '" + sheet['module_name'] + "' not found.")
+    errors = _flag(errors, sheet['batch_id'].isin(taken), "Batch with ID '" + sheet['batch_id'] + "' already exists.")
+    unknown = sheet['students'].map(lambda codes: next((code for code in codes if code not in students), ''))
+    errors = _flag(errors, unknown != '', "Student with ID " + unknown + " not found.")
+    return errors
+
+
+def create_missing_trainers(names, trainers, user=None):
+    """Creates the trainers the sheet names but the database lacks, with one ID reservation."""
+    from rbac.services import IDGeneratorService
+    from settingsdb.signals import track_bulk_create
+
+    names = sorted(name for name in names if name not in trainers)
+    if not names:
+        return []
+    with transaction.atomic():
+        trainer_ids = IDGeneratorService.generate_next_ids('Trainer', len(names), user)
+        created = Trainer.objects.bulk_create([Trainer(name=name, trainer_id=trainer_id) for name, trainer_id in zip(names, trainer_ids)])
+        track_bulk_create(Trainer, created)
+    trainers.update((trainer.name, trainer) for trainer in created)
+    return created
+
+
+def write_rows(rows, courses, trainers, students, user=None):
+    """Creates the batches of rows (normalised sheet records) with their students and placements."""
+    from settingsdb.signals import track_bulk_create
+
+    batches = []
+    for row in rows:
+        course = courses.get(row['module_name'])
+        batches.append(Batch(
+            batch_id=row['batch_id'],
+            course=course,
+            trainer=trainers[row['trainer']],
+            start_date=row['start_date'],
+            end_date=row['end_date'],
+            start_time=row['start_time'] if pd.notna(row['start_time']) else None,
+            end_time=row['end_time'] if pd.notna(row['end_time']) else None,
+            batch_type=row['batch_type'],
+            created_by=user,
+            updated_by=user,
+        ))
+
+    with transaction.atomic():
+        # One counter increment per course for the rows without an ID
+        pending = {}
+        for batch in batches:
+            if not batch.batch_id:
+                pending.setdefault(batch.course.pk, []).append(batch)
+        for waiting in pending.values():
+            course = waiting[0].course
+            for batch, batch_id in zip(waiting, generate_batch_ids(course.category, course, len(waiting))):
+                batch.batch_id = batch_id
+
+        Batch.objects.bulk_create(batches)
+        track_bulk_create(Batch, batches)
+        schedule_refresh(batch.pk for batch in batches)
+        if user:
+            BatchTransaction.objects.bulk_create([
+                BatchTransaction(batch=batch, transaction_type='BATCH_CREATED', user=user, details=batch.get_transaction_details())
+                for batch in batches
+            ])
+
+        enrolled = [[students[code] for code in row['students']] for row in rows]
+        write_enrollments(zip(batches, enrolled), user=user)
+
+        wanted = {student.pk: student for group in enrolled for student in group if student.pl_required}
+        if wanted:
+            existing = set(_lookup(Placement.objects.values_list('student_id', flat=True), 'student_id', wanted))
+            placements = Placement.objects.bulk_create([
+                Placement(student=student) for pk, student in wanted.items() if pk not in existing
+            ])
+            track_bulk_create(Placement, placements)
+    return batches
+
+
+def _update_job(job, **fields):
+    fields['heartbeat_at'] = timezone.now()
+    for name, value in fields.items():
+        setattr(job, name, value)
+    BatchImportJob.objects.filter(pk=job.pk).update(**fields)
+
+
+def claim_job(job):
+    """
+    Moves a PENDING job to PROCESSING with one conditional UPDATE. False when the
+    job is not PENDING any more (another worker claimed it, or it already ran).
+    """
+    now = timezone.now()
+    claimed = BatchImportJob.objects.filter(pk=job.pk, status='PENDING').update(
+        status='PROCESSING', started_at=now, heartbeat_at=now,
+    )
+    if claimed:
+        job.status, job.started_at, job.heartbeat_at = 'PROCESSING', now, now
+    return bool(claimed)
+
+
+def run_import(job, df):
+    """Imports the sheet in df into the job (claimed by the caller). Returns the job."""
+    user = job.created_by
+    missing = missing_columns(df)
+    if missing:
+        _update_job(job, status='FAILED', finished_at=timezone.now(),
+                    error_message=f"Batch Excel file must contain the following columns: {', '.join(REQUIRED_COLUMNS)}")
+        return job
+
+    raw, sheet = normalize_sheet(df)
+    _update_job(job, total_rows=len(sheet))
+
+    courses, trainers, students, taken = resolve(sheet)
+    sheet['error'] = validate_references(sheet, courses, students, taken)
+
+    valid = sheet[sheet['error'] == '']
+    try:
+        create_missing_trainers(set(valid['trainer']), trainers, user)
+    except Exception as e:
+        sheet.loc[~sheet['trainer'].isin(trainers) & (sheet['error'] == ''), 'error'] = str(e)
+
+    errors = {index: message for index, message in sheet['error'].items() if message}
+    processed = len(errors)
+    created = 0
+    _update_job(job, processed_rows=processed, error_count=len(errors))
+
+    records = sheet[sheet['error'] == ''].to_dict('index')
+    indexes = list(records)
+    size = max(_chunk_size(), 1)
+    for start in range(0, len(indexes), size):
+        chunk = indexes[start:start + size]
+        try:
+            write_rows([records[index] for index in chunk], courses, trainers, students, user)
+            created += len(chunk)
+        except Exception:
+            # Retry one row per savepoint so only the offending rows are rejected
+            for index in chunk:
+                try:
+                    write_rows([records[index]], courses, trainers, students, user)
+                    created += 1
+                except Exception as e:
+                    errors[index] = str(e)
+        processed += len(chunk)
+        _update_job(job, processed_rows=processed, created_count=created, error_count=len(errors))
+
+    report = []
+    for index in sorted(errors):
+        row = raw.loc[index].to_dict()
+        row['error_reason'] = errors[index]
+        report.append(row)
+    _update_job(job, status='COMPLETED', finished_at=timezone.now(), errors=report, error_count=len(report))
+    return job
+
+
+def process_job(job):
+    """
+    Claims the job, reads its uploaded sheet and imports it; failures end up on
+    the job. Returns the job, or None when it could not be claimed.
+    """
+    from core import commit_buffer
+    from core.request_context import reset_context, set_current_user
+
+    # Claimed before the sheet is read, so a job started by its request's thread
+    # and by run_batch_imports is imported once
+    if not claim_job(job):
+        return None
+
+    # Attribute the transaction log entries to the uploader, for this job only
+    token = set_current_user(job.created_by)
+    try:
+        with job.uploaded_file.open('rb') as fh:
+            df = pd.read_excel(fh)
+        with commit_buffer.request_scope():
+            return run_import(job, df)
+    except Exception as e:
+        logger.exception("Batch import %s failed", job.pk)
+        _update_job(job, status='FAILED', finished_at=timezone.now(), error_message=f"Error reading batch Excel file: {e}")
+        return job
+    finally:
+        reset_context(token)
+
+
+def _process_pk(job_pk):
+    process_job(BatchImportJob.objects.select_related('created_by').get(pk=job_pk))
+
+
+def fail_stale_jobs(jobs=None):
+    """
+    Fails the PROCESSING jobs (of jobs, default all) whose heartbeat stopped
+    before stale_job_cutoff(): their thread died with its worker. They are not
+    run again, since the chunks already written would be imported twice; the
+    message tells the uploader how far the import got. Returns the number failed.
+    """
+    jobs = BatchImportJob.objects.all() if jobs is None else jobs
+    cutoff = stale_job_cutoff()
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, created_at__lt=cutoff)
+    return jobs.filter(stale, status='PROCESSING').update(
+        status='FAILED',
+        finished_at=timezone.now(),
+        error_message=Concat(
+            Value('Import interrupted after '), Cast('processed_rows', CharField()),
+            Value(' of '), Cast('total_rows', CharField()),
+            Value(' rows; batches created before that were kept.'),
+        ),
+    )
+
+
+def start_job(job):
+    """Runs the job after commit, on a background thread unless BATCH_JOBS_IN_BACKGROUND is off."""
+    run_job(_process_pk, job.pk, name=f"batch-import-{job.pk}")
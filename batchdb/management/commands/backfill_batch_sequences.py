@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from batchdb.services import backfill_batch_sequences
+
+class Command(BaseCommand):
+    help = 'Seeds the per-(category, course) batch ID counters from the batch IDs already issued.'
+
+    def handle(self, *args, **options):
+        written = backfill_batch_sequences()
+        self.stdout.write(self.style.SUCCESS(f'Successfully seeded {written} batch ID counters.'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from batchdb.search import rebuild_all
+
+class Command(BaseCommand):
+    help = 'Rebuilds the search document of every batch (used by batch list and API search).'
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt {rebuilt} batch search documents.'))
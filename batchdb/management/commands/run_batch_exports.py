@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from batchdb.exports import claim_stale_jobs, process_job
+from batchdb.models import BatchExportJob
+
+class Command(BaseCommand):
+    help = 'Generates again the Excel batch exports left PROCESSING by a restarted worker.'
+
+    def handle(self, *args, **options):
+        for job in BatchExportJob.objects.filter(pk__in=claim_stale_jobs()).order_by('created_at'):
+            process_job(job)
+            self.stdout.write(self.style.SUCCESS(f'Export {job.pk}: {job.status}, {job.row_count} rows.'))
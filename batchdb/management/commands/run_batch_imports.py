@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from batchdb.importer import fail_stale_jobs, process_job
+from batchdb.models import BatchImportJob
+
+class Command(BaseCommand):
+    help = 'Runs pending Excel batch imports and fails the ones left PROCESSING by a restarted worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_ids', nargs='*', type=int, help='Pending jobs to run; defaults to every pending job')
+
+    def handle(self, *args, **options):
+        failed = fail_stale_jobs()
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} interrupted imports marked as failed.'))
+
+        jobs = BatchImportJob.objects.select_related('created_by')
+        jobs = jobs.filter(pk__in=options['job_ids']) if options['job_ids'] else jobs.filter(status='PENDING')
+        for job in jobs.order_by('created_at'):
+            if process_job(job) is None:
+                self.stdout.write(self.style.WARNING(f'Import {job.pk} ({job.file_name}) is not pending, skipped.'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'Import {job.pk} ({job.file_name}): {job.status}, {job.created_count} batches created, {job.error_count} rows with errors.'
+            ))
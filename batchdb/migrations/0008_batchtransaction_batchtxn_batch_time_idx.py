@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batchdb', '0007_auto_20251007_1241'),
+        ('studentsdb', '0005_student_city_student_country_student_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batchtransaction',
+            index=models.Index(fields=['batch', 'timestamp'], name='batchtxn_batch_time_idx'),
+        ),
+    ]
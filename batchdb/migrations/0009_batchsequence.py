@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batchdb', '0008_batchtransaction_batchtxn_batch_time_idx'),
+        ('coursedb', '0005_alter_course_total_duration_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current_sequence', models.PositiveIntegerField(default=0, help_text='The last used series number (1 = AA)')),
+                ('last_updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_sequences', to='coursedb.coursecategory')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_sequences', to='coursedb.course')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'course'), name='batchseq_category_course_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'batchdb_batchsearch_fts'
+DOCUMENT_TABLE = 'batchdb_batchsearchdocument'
+POPULATE_CHUNK = 500
+
+# FTS5 index over the documents (external content, kept in sync by triggers)
+SQLITE_INDEX = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(document, content='{DOCUMENT_TABLE}', content_rowid='batch_id', tokenize='trigram')",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.batch_id, new.document);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.batch_id, old.document);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.batch_id, old.document);
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.batch_id, new.document);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# Trigram index for the icontains lookups (UPPER(...) LIKE UPPER(...)) of batchdb.search
+POSTGRESQL_INDEX = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX batchsearch_document_trgm ON {DOCUMENT_TABLE} USING gin (UPPER(document::text) gin_trgm_ops)",
+]
+POSTGRESQL_DROP = ["DROP INDEX IF EXISTS batchsearch_document_trgm"]
+
+
+def populate_documents(apps, schema_editor):
+    # Same documents as batchdb.search.collect_documents, built here so later changes
+    # to that module cannot change what this migration writes
+    Batch = apps.get_model('batchdb', 'Batch')
+    BatchStudent = apps.get_model('batchdb', 'BatchStudent')
+    BatchSearchDocument = apps.get_model('batchdb', 'BatchSearchDocument')
+
+    batch_ids = list(Batch.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(batch_ids), POPULATE_CHUNK):
+        chunk = batch_ids[start:start + POPULATE_CHUNK]
+        names = {}
+        memberships = BatchStudent.objects.filter(batch_id__in=chunk).order_by('batch_id', 'id')
+        for batch_pk, first_name, last_name in memberships.values_list('batch_id', 'student__first_name', 'student__last_name'):
+            name = ' '.join(part for part in (first_name, last_name) if part)
+            names.setdefault(batch_pk, {})[name] = None
+
+        documents = []
+        batches = Batch.objects.filter(pk__in=chunk).values_list('pk', 'batch_id', 'course__course_name', 'trainer__name')
+        for pk, batch_id, course_name, trainer_name in batches:
+            parts = [batch_id, course_name, trainer_name, *names.get(pk, ())]
+            documents.append(BatchSearchDocument(batch_id=pk, document='\n'.join(part for part in parts if part)))
+        BatchSearchDocument.objects.bulk_create(documents)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for sql in POSTGRESQL_INDEX:
+            schema_editor.execute(sql)
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(SQLITE_INDEX[0])
+        except OperationalError:
+            return  # SQLite without FTS5 / trigram tokenizer: batchdb.search falls back to icontains
+        for sql in SQLITE_INDEX[1:]:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {'postgresql': POSTGRESQL_DROP, 'sqlite': SQLITE_DROP}.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batchdb', '0011_batchexportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchSearchDocument',
+            fields=[
+                ('batch', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='batchdb.batch')),
+                ('document', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
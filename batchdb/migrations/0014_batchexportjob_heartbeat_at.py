@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batchdb', '0013_batchimportjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchexportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -77,37 +77,9 @@ class Batch(models.Model):
 
     @classmethod
     def generate_batch_id(cls, category, course):
-        """Generate a unique batch ID following the format <CategoryInitial><CourseCode><AlphaSeries2>"""
-        with transaction.atomic():
-            # Lock the table to prevent race conditions
-            # Get the category initial
-            category_initial = category.name[0].upper()
-            
-            # Get the course code (assuming it's stored in the course model)
-            course_code = course.code[-2:].upper() if course.code else 'XX'
-            
-            # Find the last batch with this category and course combination
-            last_batch = cls.objects.filter(
-                course__category=category,
-                course=course
-            ).select_for_update().order_by('batch_id').last()
-            
-            if last_batch and last_batch.batch_id:
-                # Extract the alpha series from the last batch ID
-                try:
-                    alpha_series = last_batch.batch_id[-2:]
-                    # Convert alpha series to next in sequence (AA -> AB, AZ -> BA, etc.)
-                    if alpha_series[1] == 'Z':
-                        next_series = alpha_series[0] + 'A' if alpha_series[0] != 'Z' else 'AA'
-                    else:
-                        next_series = alpha_series[0] + chr(ord(alpha_series[1]) + 1)
-                except (IndexError, ValueError):
-                    next_series = 'AA'
-            else:
-                next_series = 'AA'
-            
-            # Construct the new batch ID
-            return f"{category_initial}{course_code}{next_series}"
+        """Generate a unique batch ID following the format <CategoryInitial><CourseCode><AlphaSeries>"""
+        from .services import generate_batch_ids
+        return generate_batch_ids(category, course, 1)[0]
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
@@ -124,28 +96,9 @@ class Batch(models.Model):
         super().save(*args, **kwargs)
 
         if is_new:
-            students = self.students.all()
-            for student in students:
-                batch_student, created = BatchStudent.objects.get_or_create(
-                    batch=self,
-                    student=student,
-                    defaults={
-                        'is_active': True,
-                        'activated_at': timezone.now()
-                    }
-                )
-                if created:
-                    BatchTransaction.log_transaction(
-                        batch=self,
-                        transaction_type='STUDENT_ADDED',
-                        user=user,
-                        details={
-                            'student_id': student.id,
-                            'student_name': str(student),
-                            'activated_at': str(batch_student.activated_at)
-                        },
-                        affected_students=[student]
-                    )
+            # Memberships created alongside the batch, written in bulk with one aggregated transaction
+            from .services import enroll_students
+            enroll_students(self, self.students.all(), user=user)
         
         # Log the transaction if user is provided
         if user:
@@ -154,17 +107,112 @@ class Batch(models.Model):
                 batch=self,
                 transaction_type=transaction_type,
                 user=user,
-                details={
-                    'batch_id': self.batch_id,
-                    'course': str(self.course) if self.course else None,
-                    'trainer': str(self.trainer) if self.trainer else None,
-                    'start_date': str(self.start_date),
-                    'end_date': str(self.end_date),
-                    'batch_type': self.get_batch_type_display(),
-                    'batch_status': self.get_batch_status_display(),
-                }
+                details=self.get_transaction_details()
             )
 
+    def get_transaction_details(self):
+        """Details recorded on BATCH_CREATED / BATCH_UPDATED transactions"""
+        return {
+            'batch_id': self.batch_id,
+            'course': str(self.course) if self.course else None,
+            'trainer': str(self.trainer) if self.trainer else None,
+            'start_date': str(self.start_date),
+            'end_date': str(self.end_date),
+            'batch_type': self.get_batch_type_display(),
+            'batch_status': self.get_batch_status_display(),
+        }
+
+
+class BatchImportJob(models.Model):
+    """Progress and row errors of one Excel batch import (see batchdb.importer)"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    file_name = models.CharField(max_length=255)
+    uploaded_file = models.FileField(upload_to='batch_imports/')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text='Sheet rows that were not imported, with error_reason')
+    error_message = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='batch_import_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Moved on with every progress update, see batchdb.importer.fail_stale_jobs
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.file_name} - {self.status} ({self.processed_rows}/{self.total_rows})"
+
+    @property
+    def percent_complete(self):
+        if self.status in ('COMPLETED', 'FAILED'):
+            return 100
+        return int(self.processed_rows * 100 / self.total_rows) if self.total_rows else 0
+
+
+class BatchExportJob(models.Model):
+    """All-batches Excel export generated in the background (see batchdb.exports)"""
+    STATUS_CHOICES = BatchImportJob.STATUS_CHOICES
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    file = models.FileField(upload_to='batch_exports/', blank=True)
+    row_count = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='batch_export_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Moved on every EXPORT_CHUNK_SIZE rows, see batchdb.exports.restart_stale_jobs
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Batch export {self.pk} - {self.status} ({self.row_count} rows)"
+
+
+class BatchSequence(models.Model):
+    """
+    Last alpha series issued per (category, course), see batchdb.services.generate_batch_ids.
+    Allocating an ID increments this one row instead of locking every batch of the course.
+    """
+    category = models.ForeignKey(CourseCategory, on_delete=models.CASCADE, related_name='batch_sequences')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='batch_sequences')
+    current_sequence = models.PositiveIntegerField(default=0, help_text="The last used series number (1 = AA)")
+    last_updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'course'], name='batchseq_category_course_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id}/{self.course_id} Sequence: {self.current_sequence}"
+
+
+class BatchSearchDocument(models.Model):
+    """
+    Searchable text of one batch (batch ID, course, trainer, student names), see batchdb.search.
+    Kept up to date by batchdb.signals; indexed with pg_trgm on PostgreSQL and FTS5 on SQLite.
+    """
+    batch = models.OneToOneField(Batch, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    document = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document of {self.batch_id}"
+
 
 class BatchStudent(models.Model):
     """Through model for tracking student batch history"""
@@ -300,6 +348,7 @@ class BatchTransaction(models.Model):
         indexes = [
             models.Index(fields=['batch', 'transaction_type']),
             models.Index(fields=['timestamp']),
+            models.Index(fields=['batch', 'timestamp'], name='batchtxn_batch_time_idx'),
         ]
     
     def __str__(self):
@@ -0,0 +1,157 @@
+"""
+Batch search behind batchdb.views.batch_list and BatchViewSet.
+
+Every batch has one BatchSearchDocument holding its batch ID, course name,
+trainer name and the names of every student ever enrolled, so a search reads
+one row per batch instead of joining students and de-duplicating.
+
+- PostgreSQL: each search term is matched with icontains, served by the
+  pg_trgm GIN index on UPPER(document); results are ranked by trigram word
+  similarity, which needs no tsvector of the whole document per row.
+- SQLite: terms of three characters or more are matched through the
+  batchdb_batchsearch_fts FTS5 table (trigram tokenizer, so substrings still
+  match) and ranked with bm25().
+- Anything else (and short terms) falls back to icontains on the document.
+
+Documents are refreshed by batchdb.signals and the bulk write paths through
+schedule_refresh(), after commit: batches scheduled during a request (or an
+import job) are refreshed together at its end, see core.commit_buffer.
+"""
+from django.db import connections
+from django.db.models import Q
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from core.commit_buffer import CommitBuffer
+
+from .models import Batch, BatchSearchDocument, BatchStudent
+
+FTS_TABLE = 'batchdb_batchsearch_fts'
+FTS_MIN_TERM = 3  # the trigram tokenizer cannot match shorter terms
+REFRESH_CHUNK = 500
+
+
+def collect_documents(batches, memberships):
+    """
+    {batch pk: document} from a Batch and a BatchStudent queryset restricted to
+    the same batches.
+    """
+    names = {}
+    rows = memberships.order_by('batch_id', 'id').values_list('batch_id', 'student__first_name', 'student__last_name')
+    for batch_pk, first_name, last_name in rows:
+        name = ' '.join(part for part in (first_name, last_name) if part)
+        names.setdefault(batch_pk, {})[name] = None
+
+    documents = {}
+    for pk, batch_id, course_name, trainer_name in batches.values_list('pk', 'batch_id', 'course__course_name', 'trainer__name'):
+        parts = [batch_id, course_name, trainer_name, *names.get(pk, ())]
+        # One field per line, so a term cannot match across two fields
+        documents[pk] = '\n'.join(part for part in parts if part)
+    return documents
+
+
+def refresh_documents(batch_ids):
+    """Rebuilds the search documents of batch_ids with three queries per REFRESH_CHUNK batches."""
+    batch_ids = list(batch_ids)
+    refreshed = 0
+    for start in range(0, len(batch_ids), REFRESH_CHUNK):
+        chunk = batch_ids[start:start + REFRESH_CHUNK]
+        documents = collect_documents(Batch.objects.filter(pk__in=chunk), BatchStudent.objects.filter(batch_id__in=chunk))
+        BatchSearchDocument.objects.bulk_create(
+            [BatchSearchDocument(batch_id=pk, document=document) for pk, document in documents.items()],
+            update_conflicts=True,
+            unique_fields=['batch'],
+            update_fields=['document', 'updated_at'],
+        )
+        refreshed += len(documents)
+    return refreshed
+
+
+def rebuild_all():
+    """Rebuilds every search document. Returns the number written."""
+    return refresh_documents(Batch.objects.order_by('pk').values_list('pk', flat=True).iterator())
+
+
+def _refresh_scheduled(scheduled):
+    refresh_documents(sorted(set().union(*scheduled)))
+
+
+_buffer = CommitBuffer("batch_search", _refresh_scheduled)
+
+
+def schedule_refresh(batch_ids):
+    """
+    Refreshes the documents of batch_ids once the current transaction commits
+    (at once outside a transaction); a rolled-back savepoint drops them.
+    Inside a commit_buffer scope a batch scheduled many times is refreshed once.
+    """
+    batch_ids = frozenset(pk for pk in batch_ids if pk is not None)
+    if batch_ids:
+        _buffer.add(batch_ids)
+
+
+def _fts_available(connection):
+    available = getattr(connection, '_batch_search_fts', None)
+    if available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            available = cursor.fetchone() is not None
+        connection._batch_search_fts = available
+    return available
+
+
+def _fts_query(terms):
+    # Every term as a quoted string, so FTS5 operators in user input are matched literally
+    return ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def search_batches(queryset, query):
+    """
+    Batches of queryset whose search document contains every term of query,
+    best match first (newest first among equal ranks where ranking is available).
+    """
+    terms = query.split()
+    if not terms:
+        return queryset
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        for term in terms:
+            queryset = queryset.filter(search_document__document__icontains=term)
+        rank = TrigramWordSimilarity(' '.join(terms), 'search_document__document')
+        return queryset.annotate(search_rank=rank).order_by('-search_rank', '-pk')
+
+    if connection.vendor == 'sqlite' and min(map(len, terms)) >= FTS_MIN_TERM and _fts_available(connection):
+        batch_table = Batch._meta.db_table
+        return queryset.extra(
+            select={'search_rank': f'bm25({FTS_TABLE})'},
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {batch_table}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[_fts_query(terms)],
+        ).order_by('search_rank', '-pk')
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(search_document__document__icontains=term)
+    return queryset.filter(condition)
+
+
+class BatchSearchFilter(filters.SearchFilter):
+    """?search= through the batch search documents (search_fields are not used)."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_batches(queryset, ' '.join(terms))
+
+
+class BatchOrderingFilter(filters.OrderingFilter):
+    """Leaves search results in rank order unless ?ordering= is given."""
+
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and request.query_params.get(api_settings.SEARCH_PARAM):
+            return None
+        return super().get_ordering(request, queryset, view)
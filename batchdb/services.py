@@ -0,0 +1,292 @@
+import string
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from studentsdb.models import Student
+from .models import Batch, BatchSequence, BatchStudent, BatchTransaction
+from .search import schedule_refresh
+
+# Series run AA..ZZ, then AAA..ZZZ, and so on (bijective base 26, at least two letters)
+SERIES_ALPHABET = string.ascii_uppercase
+SERIES_MIN_WIDTH = 2
+
+
+class EnrollmentResult:
+    """Outcome of enroll_students: students added, ids already active in the batch, ids not found."""
+
+    __slots__ = ("added", "already_active", "missing")
+
+    def __init__(self, added, already_active, missing):
+        self.added = added
+        self.already_active = already_active
+        self.missing = missing
+
+
+def _normalize_ids(values):
+    pk_field = Student._meta.pk
+    ids, missing = [], []
+    for value in values:
+        try:
+            ids.append(pk_field.to_python(value))
+        except Exception:
+            missing.append(value)
+    return list(dict.fromkeys(ids)), missing
+
+
+def enroll_students(batch, students, user=None):
+    """
+    Adds students (Student instances or primary keys) to batch with set-based queries:
+    one SELECT for the students (skipped for instances), one for their active
+    memberships in the batch, one bulk INSERT of BatchStudent rows and a single
+    STUDENT_ADDED BatchTransaction whose affected students go in with one
+    through-table INSERT. Students already active in the batch are left alone;
+    students removed earlier get their inactive membership back (see write_enrollments).
+    """
+    students = list(students)
+    if students and all(isinstance(student, Student) for student in students):
+        by_id = {student.pk: student for student in students}
+        ids, missing = list(by_id), []
+    else:
+        ids, missing = _normalize_ids(students)
+        by_id = Student.objects.in_bulk(ids) if ids else {}
+        missing += [student_id for student_id in ids if student_id not in by_id]
+        ids = [student_id for student_id in ids if student_id in by_id]
+
+    if not ids:
+        return EnrollmentResult([], [], missing)
+
+    active = set(
+        BatchStudent.objects.filter(batch=batch, student_id__in=ids, is_active=True)
+        .values_list('student_id', flat=True)
+    )
+    to_add = [by_id[student_id] for student_id in ids if student_id not in active]
+    already_active = [student_id for student_id in ids if student_id in active]
+    if not to_add:
+        return EnrollmentResult([], already_active, missing)
+
+    write_enrollments([(batch, to_add)], user=user)
+    return EnrollmentResult(to_add, already_active, missing)
+
+
+def write_enrollments(enrollments, user=None):
+    """
+    Writes memberships for [(batch, students), ...]. A student with an inactive
+    membership in the batch gets its latest one reactivated, all of them with one
+    UPDATE; the others get new BatchStudent rows with one INSERT. Then one INSERT
+    of STUDENT_ADDED transactions (one per batch) and one of their affected
+    students. Callers have already left out students active in the batch.
+    Returns the created BatchStudent rows.
+    """
+    enrollments = [(batch, list(students)) for batch, students in enrollments]
+    enrollments = [(batch, students) for batch, students in enrollments if students]
+    if not enrollments:
+        return []
+
+    now = timezone.now()
+    with transaction.atomic():
+        reactivated = _inactive_memberships(enrollments)
+        rows = [
+            BatchStudent(batch=batch, student=student, is_active=True, activated_at=now)
+            for batch, students in enrollments
+            for student in students
+            if (batch.pk, student.pk) not in reactivated
+        ]
+        if reactivated:
+            BatchStudent.objects.filter(pk__in=[row.pk for row in reactivated.values()]).update(
+                is_active=True, activated_at=now, deactivated_at=None,
+            )
+        if rows:
+            BatchStudent.objects.bulk_create(rows)
+        batch_transactions = BatchTransaction.objects.bulk_create([
+            BatchTransaction(
+                batch=batch,
+                transaction_type='STUDENT_ADDED',
+                user=user,
+                details={
+                    'student_count': len(students),
+                    'student_ids': [student.pk for student in students],
+                    'student_names': [str(student) for student in students],
+                    'activated_at': str(now),
+                },
+            )
+            for batch, students in enrollments
+        ])
+        through = BatchTransaction.affected_students.through
+        through.objects.bulk_create([
+            through(batchtransaction_id=batch_transaction.pk, student_id=student.pk)
+            for batch_transaction, (_batch, students) in zip(batch_transactions, enrollments)
+            for student in students
+        ])
+
+        # bulk_create and update send no post_save, so the transaction log entries
+        # and search document refreshes are queued here
+        from settingsdb.signals import track_bulk_create, track_save
+        track_bulk_create(BatchStudent, rows)
+        for row in reactivated.values():
+            row.is_active, row.activated_at, row.deactivated_at = True, now, None
+            track_save(BatchStudent, row, created=False)
+        schedule_refresh(batch.pk for batch, _students in enrollments)
+    return rows
+
+
+def _inactive_memberships(enrollments):
+    """{(batch pk, student pk): latest inactive BatchStudent} for the pairs in enrollments, in one query."""
+    by_pair = {(batch.pk, student.pk): (batch, student) for batch, students in enrollments for student in students}
+    memberships = BatchStudent.objects.filter(
+        batch_id__in={batch.pk for batch, _students in enrollments},
+        student_id__in={student_pk for _batch_pk, student_pk in by_pair},
+        is_active=False,
+    ).order_by('id')
+
+    latest = {}
+    for membership in memberships:
+        pair = (membership.batch_id, membership.student_id)
+        if pair in by_pair:
+            # Related objects from the caller, so the log labels need no query
+            membership.batch, membership.student = by_pair[pair]
+            latest[pair] = membership
+    return latest
+
+
+def encode_series(number):
+    """Alpha series of the number-th batch of a course: 1 -> AA, 676 -> ZZ, 677 -> AAA."""
+    if number < 1:
+        raise ValueError("Series numbers start at 1")
+    base = len(SERIES_ALPHABET)
+    index, width = number - 1, SERIES_MIN_WIDTH
+    while index >= base ** width:
+        index -= base ** width
+        width += 1
+    letters = []
+    for _ in range(width):
+        index, digit = divmod(index, base)
+        letters.append(SERIES_ALPHABET[digit])
+    return "".join(reversed(letters))
+
+
+def decode_series(series):
+    """Inverse of encode_series; None for anything that is not an alpha series."""
+    if len(series) < SERIES_MIN_WIDTH or any(letter not in SERIES_ALPHABET for letter in series):
+        return None
+    base = len(SERIES_ALPHABET)
+    index = 0
+    for letter in series:
+        index = index * base + SERIES_ALPHABET.index(letter)
+    for width in range(SERIES_MIN_WIDTH, len(series)):
+        index += base ** width
+    return index + 1
+
+
+def batch_id_prefix(category, course):
+    course_code = course.code[-2:].upper() if course.code else 'XX'
+    return f"{category.name[0].upper()}{course_code}"
+
+
+def highest_series(prefix, batch_ids):
+    """Largest series number among batch_ids that carry prefix (0 when none do)."""
+    highest = 0
+    for batch_id in batch_ids:
+        if batch_id and batch_id.startswith(prefix):
+            number = decode_series(batch_id[len(prefix):])
+            if number and number > highest:
+                highest = number
+    return highest
+
+
+def _create_sequence(category, course, prefix):
+    # First allocation for the course: start after the IDs issued before the counter existed
+    existing = Batch.objects.filter(course=course, batch_id__startswith=prefix).values_list('batch_id', flat=True)
+    try:
+        with transaction.atomic():
+            BatchSequence.objects.create(category=category, course=course, current_sequence=highest_series(prefix, existing))
+    except IntegrityError:
+        pass  # created concurrently
+
+
+def reserve_series(category, course, count=1):
+    """
+    Reserves count consecutive series numbers for (category, course) with one
+    atomic increment of its counter row. Returns (first, last).
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    counter = BatchSequence.objects.filter(category=category, course=course)
+    with transaction.atomic():
+        # The UPDATE row-locks the counter until commit; the read sees our increment
+        if not counter.update(current_sequence=F('current_sequence') + count, last_updated_at=timezone.now()):
+            _create_sequence(category, course, batch_id_prefix(category, course))
+            counter.update(current_sequence=F('current_sequence') + count, last_updated_at=timezone.now())
+        last = counter.values_list('current_sequence', flat=True).get()
+    return last - count + 1, last
+
+
+def generate_batch_ids(category, course, count):
+    """
+    count new batch IDs (<CategoryInitial><CourseCode><AlphaSeries>) for the course.
+    Importers reserve the whole block in one increment.
+    """
+    first, last = reserve_series(category, course, count)
+    prefix = batch_id_prefix(category, course)
+    return [f"{prefix}{encode_series(number)}" for number in range(first, last + 1)]
+
+
+def backfill_batch_sequences():
+    """
+    Seeds every (category, course) counter from the batch IDs already issued,
+    never moving a counter backwards. Returns the number of counters written.
+    """
+    from coursedb.models import Course
+
+    issued = {}
+    for course_id, batch_id in Batch.objects.exclude(batch_id='').values_list('course_id', 'batch_id').iterator():
+        if course_id is not None:
+            issued.setdefault(course_id, []).append(batch_id)
+
+    written = 0
+    courses = Course.objects.filter(pk__in=issued, category__isnull=False).select_related('category')
+    for course in courses:
+        highest = highest_series(batch_id_prefix(course.category, course), issued[course.pk])
+        with transaction.atomic():
+            sequence, created = BatchSequence.objects.select_for_update().get_or_create(
+                category=course.category, course=course, defaults={'current_sequence': highest},
+            )
+            if created or sequence.current_sequence < highest:
+                if not created:
+                    sequence.current_sequence = highest
+                    sequence.save(update_fields=['current_sequence', 'last_updated_at'])
+                written += 1
+    return written
+
+
+def _run_in_thread(target, job_pk):
+    close_old_connections()
+    try:
+        target(job_pk)
+    finally:
+        connections.close_all()
+
+
+def run_job(target, job_pk, name):
+    """
+    Calls target(job_pk) once the current transaction commits. With
+    settings.BATCH_JOBS_IN_BACKGROUND (imports, large exports) it runs on a
+    daemon thread with its own connections and the request returns at once;
+    the job pages poll the job record for progress. The thread does not survive
+    a worker restart: its job stops beating and is failed by stale_job_cutoff's
+    callers. Off by default, so the job runs in the request that started it.
+    """
+    if getattr(settings, 'BATCH_JOBS_IN_BACKGROUND', False):
+        thread = threading.Thread(target=_run_in_thread, args=(target, job_pk), name=name, daemon=True)
+        transaction.on_commit(thread.start)
+    else:
+        transaction.on_commit(lambda: target(job_pk))
+
+
+def stale_job_cutoff():
+    """Jobs still PROCESSING whose heartbeat_at is older than this lost their thread."""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'BATCH_JOB_STALE_SECONDS', 900))
@@ -1,7 +1,15 @@
-from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete, m2m_changed
 from django.dispatch import receiver
 from .models import Batch, BatchStudent, BatchTransaction
+from .search import schedule_refresh
+from coursedb.models import Course
 from studentsdb.models import Student
+from trainersdb.models import Trainer
+from settingsdb.tracking import SNAPSHOT_ATTR
+
+# Fields that end up in a batch search document (see batchdb.search)
+BATCH_SEARCH_FIELDS = {'batch_id', 'course', 'trainer'}
+STUDENT_SEARCH_FIELDS = {'first_name', 'last_name'}
 
 
 def _get_user_from_instance(instance):
@@ -85,3 +93,63 @@ def log_batch_students_changed(sender, instance, action, pk_set, **kwargs):
         details=details,
         affected_students=affected_students,
     )
+
+
+# Search documents (batchdb.search): refreshed once per batch when the transaction commits
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(post_save, sender=Batch)
+def refresh_batch_search(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, BATCH_SEARCH_FIELDS):
+        schedule_refresh([instance.pk])
+
+
+@receiver(post_save, sender=BatchStudent)
+@receiver(post_delete, sender=BatchStudent)
+def refresh_membership_search(sender, instance, **kwargs):
+    schedule_refresh([instance.batch_id])
+
+
+@receiver(m2m_changed, sender=Batch.students.through)
+def refresh_students_search(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        schedule_refresh([instance.pk])
+    elif reverse and action in ("post_add", "post_remove"):
+        schedule_refresh(pk_set)
+    elif reverse and action == "pre_clear":
+        schedule_refresh(BatchStudent.objects.filter(student=instance).values_list('batch_id', flat=True))
+
+
+@receiver(pre_save, sender=Student)
+def note_student_name_change(sender, instance, **kwargs):
+    # The tracking snapshot still holds the stored names here; without one, assume a change
+    snapshot = instance.__dict__.get(SNAPSHOT_ATTR)
+    instance._search_name_changed = snapshot is None or any(
+        field in instance.__dict__ and snapshot.get(field) != instance.__dict__[field]
+        for field in STUDENT_SEARCH_FIELDS
+    )
+
+
+@receiver(post_save, sender=Student)
+def refresh_student_search(sender, instance, created, update_fields=None, **kwargs):
+    if created or not _touches(update_fields, STUDENT_SEARCH_FIELDS):
+        return
+    if getattr(instance, '_search_name_changed', True):
+        schedule_refresh(BatchStudent.objects.filter(student=instance).values_list('batch_id', flat=True))
+
+
+@receiver(post_save, sender=Trainer)
+@receiver(pre_delete, sender=Trainer)
+def refresh_trainer_search(sender, instance, created=False, update_fields=None, **kwargs):
+    # pre_delete: the batches lose their trainer through SET_NULL, which sends no signal
+    if not created and _touches(update_fields, {'name'}):
+        schedule_refresh(Batch.objects.filter(trainer=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Course)
+def refresh_course_search(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _touches(update_fields, {'course_name'}):
+        schedule_refresh(Batch.objects.filter(course=instance).values_list('pk', flat=True))
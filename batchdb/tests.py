@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
@@ -269,3 +270,452 @@ class BatchAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['student_id'], self.student.id)
         self.assertTrue(len(response.data['batch_history']) > 0)
+
+
+class BulkEnrollmentTestCase(TestCase):
+    def setUp(self):
+        from settingsdb.signals import set_current_user
+        self.user = User.objects.create_user(email='enroll@example.com', name='Enroller', role='staff', password='pw')
+        set_current_user(self.user)
+        self.batch = Batch.objects.create(batch_id='PYAA', start_date=datetime(2026, 1, 5).date(), end_date=datetime(2026, 3, 5).date())
+        Student.objects.bulk_create([
+            Student(student_id=f'ENR{i:03}', first_name=f'Student {i}', mode_of_class='ON', week_type='WD')
+            for i in range(60)
+        ])
+        self.student_ids = list(Student.objects.order_by('pk').values_list('pk', flat=True))
+
+    def tearDown(self):
+        from settingsdb.signals import set_current_user
+        set_current_user(None)
+
+    def test_sixty_students_in_a_handful_of_queries(self):
+        from core import commit_buffer
+        from settingsdb.models import TransactionLog
+        from .services import enroll_students
+
+        # Students, active memberships, savepoint, inactive memberships, memberships, transaction,
+        # through rows, release, the request's transaction log flush and the batch's search
+        # refresh (batch, memberships, upsert)
+        with self.assertNumQueries(12):
+            with commit_buffer.request_scope(), self.captureOnCommitCallbacks(execute=True):
+                result = enroll_students(self.batch, self.student_ids, user=self.user)
+
+        self.assertEqual(len(result.added), 60)
+        self.assertEqual(BatchStudent.objects.filter(batch=self.batch, is_active=True).count(), 60)
+        transaction = BatchTransaction.objects.get(batch=self.batch, transaction_type='STUDENT_ADDED')
+        self.assertEqual(transaction.details['student_count'], 60)
+        self.assertEqual(transaction.affected_students.count(), 60)
+        self.assertEqual(TransactionLog.objects.filter(table_name='BatchStudent', action='CREATE').count(), 60)
+
+        # Active members and unknown ids are reported, not duplicated
+        result = enroll_students(self.batch, self.student_ids[:2] + [999999, 'x'])
+        self.assertEqual((result.added, result.already_active, result.missing), ([], self.student_ids[:2], ['x', 999999]))
+        self.assertEqual(BatchStudent.objects.filter(batch=self.batch).count(), 60)
+
+    def test_add_student_endpoint(self):
+        from rest_framework.test import APIClient
+
+        removed = BatchStudent.objects.create(batch=self.batch, student_id=self.student_ids[0], is_active=False, deactivated_at=timezone.now())
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('batchdb_api:batch-add-student', args=[self.batch.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(url, {'student_ids': self.student_ids[:10]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], '10 students added successfully')
+        # Re-adding a removed student reactivates its membership instead of adding a second one
+        self.assertEqual(BatchStudent.objects.filter(batch=self.batch, student_id=self.student_ids[0]).count(), 1)
+        removed.refresh_from_db()
+        self.assertTrue(removed.is_active)
+        self.assertIsNone(removed.deactivated_at)
+        from settingsdb.models import TransactionLog
+        log = TransactionLog.objects.get(table_name='BatchStudent', object_id=str(removed.pk), action='UPDATE')
+        self.assertEqual(log.changes['diff']['is_active'], {'old': False, 'new': True})
+        self.assertEqual(BatchStudent.objects.filter(batch=self.batch, is_active=True).count(), 10)
+
+        response = client.post(url, {'student_ids': self.student_ids[9:11]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'], [{'student_id': self.student_ids[9], 'error': 'Student is already active in this batch'}])
+        self.assertTrue(BatchStudent.objects.filter(batch=self.batch, student_id=self.student_ids[10], is_active=True).exists())
+
+
+class BatchIdAllocatorTestCase(TestCase):
+    def setUp(self):
+        from coursedb.models import CourseCategory
+        self.category = CourseCategory.objects.create(name='Python')
+        self.course = Course.objects.create(course_name='Python Full Stack', code='PYFS', category=self.category, total_duration=60)
+
+    def _batch(self, **kwargs):
+        return Batch.objects.create(course=self.course, start_date=datetime(2026, 1, 5).date(), end_date=datetime(2026, 3, 5).date(), **kwargs)
+
+    def test_series_encoding_continues_past_zz(self):
+        from .services import encode_series, decode_series
+
+        self.assertEqual([encode_series(n) for n in (1, 2, 26, 27, 676, 677, 678)], ['AA', 'AB', 'AZ', 'BA', 'ZZ', 'AAA', 'AAB'])
+        for number in (1, 27, 676, 677, 18279):
+            self.assertEqual(decode_series(encode_series(number)), number)
+        self.assertIsNone(decode_series('A1'))
+
+    def test_ids_come_from_the_counter_row(self):
+        from .models import BatchSequence
+        from .services import generate_batch_ids
+
+        # Batches issued before the counter existed are counted on first use
+        self._batch(batch_id='PFSAZ')
+        self.assertEqual(self._batch().batch_id, 'PFSBA')
+        with self.assertNumQueries(4):  # savepoint, increment, read, release
+            self.assertEqual(Batch.generate_batch_id(self.category, self.course), 'PFSBB')
+
+        # Block reservation for importers
+        self.assertEqual(generate_batch_ids(self.category, self.course, 3), ['PFSBC', 'PFSBD', 'PFSBE'])
+        self.assertEqual(BatchSequence.objects.get(course=self.course).current_sequence, 31)
+
+    def test_backfill_seeds_counters_from_existing_ids(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import BatchSequence
+
+        for batch_id in ('PFSAA', 'PFSZZ', 'PFSAAB', 'LEGACY'):
+            self._batch(batch_id=batch_id)
+        call_command('backfill_batch_sequences', stdout=StringIO())
+        self.assertEqual(BatchSequence.objects.get(course=self.course).current_sequence, 678)
+        self.assertEqual(self._batch().batch_id, 'PFSAAC')
+
+
+class BatchImportTestCase(TestCase):
+    def setUp(self):
+        from coursedb.models import CourseCategory
+        from rbac.models import Role
+        from settingsdb.signals import set_current_user
+
+        Role.objects.create(code='TR', name='Trainer')
+        self.user = User.objects.create_user(email='importer@example.com', name='Importer', role='staff', password='pw')
+        set_current_user(self.user)
+        category = CourseCategory.objects.create(name='Python')
+        self.course = Course.objects.create(course_name='Python Full Stack', code='PYFS', category=category, total_duration=60)
+        self.trainer = Trainer.objects.create(name='Asha', trainer_id='TR0900', employment_type='FT')
+        Student.objects.bulk_create([
+            Student(student_id=f'S00{i}', first_name=f'Student {i}', mode_of_class='ON', week_type='WD', pl_required=(i == 1))
+            for i in range(1, 4)
+        ])
+
+    def tearDown(self):
+        from settingsdb.signals import set_current_user
+        set_current_user(None)
+
+    def _sheet(self):
+        import pandas as pd
+        rows = [
+            ('', 'Python Full Stack', 'Weekday', 'Asha', '2026-01-05', '2026-03-05', '9:00 AM - 10:30 AM', 'S001, S002'),
+            ('CUSTOM1', 'PYFS', 'WE', 'Ravi', '2026-01-10', '2026-03-10', 'evenings', 'S003'),
+            ('', 'Python Full Stack', 'Weekday', 'Asha', '2026-01-05', '2026-03-05', '9:00 AM - 10:30 AM', 'S001,S999'),
+            ('', 'Python Full Stack', 'Weekday', 'Asha', '05/01/2026', '2026-03-05', '9:00 AM - 10:30 AM', 'S001'),
+            ('CUSTOM1', 'Python Full Stack', 'Weekday', 'Asha', '2026-01-05', '2026-03-05', '9:00 AM - 10:30 AM', 'S002'),
+            # Collides with the ID generated for the first row, which only the database notices
+            ('PFSAA', 'Python Full Stack', 'Weekday', 'Asha', '2026-01-05', '2026-03-05', '9:00 AM - 10:30 AM', 'S002'),
+        ]
+        columns = ['batch_id', 'module_name', 'batch_type', 'trainer', 'start_date', 'end_date', 'time_slot', 'students']
+        return pd.DataFrame(rows, columns=columns)
+
+    def test_rows_are_imported_in_chunks_and_errors_collected(self):
+        from placementdb.models import Placement
+        from .importer import run_import
+        from .models import BatchImportJob
+
+        job = BatchImportJob.objects.create(file_name='batches.xlsx', created_by=self.user)
+        with self.settings(BATCH_IMPORT_CHUNK_SIZE=10), self.captureOnCommitCallbacks(execute=True):
+            run_import(job, self._sheet())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertEqual((job.total_rows, job.processed_rows, job.created_count, job.error_count), (6, 6, 2, 4))
+        self.assertEqual([row['error_reason'] for row in job.errors][:3], [
+            'Student with ID S999 not found.',
+            'Invalid date format. Use YYYY-MM-DD.',
+            'Batch ID appears more than once in the sheet: CUSTOM1',
+        ])
+        self.assertIn('UNIQUE', job.errors[3]['error_reason'])
+        self.assertEqual(job.errors[3]['batch_id'], 'PFSAA')
+
+        generated = Batch.objects.get(batch_id='PFSAA')
+        self.assertEqual((generated.batch_type, generated.trainer, str(generated.start_time)), ('WD', self.trainer, '09:00:00'))
+        self.assertEqual(set(generated.students.values_list('student_id', flat=True)), {'S001', 'S002'})
+        custom = Batch.objects.get(batch_id='CUSTOM1')
+        self.assertEqual((custom.course, custom.trainer.name, custom.start_time), (self.course, 'Ravi', None))
+        self.assertTrue(custom.trainer.trainer_id.startswith('TR'))
+
+        self.assertEqual(BatchTransaction.objects.filter(transaction_type='BATCH_CREATED').count(), 2)
+        added = BatchTransaction.objects.get(batch=generated, transaction_type='STUDENT_ADDED')
+        self.assertEqual(added.affected_students.count(), 2)
+        self.assertEqual(list(Placement.objects.values_list('student__student_id', flat=True)), ['S001'])
+
+    def test_upload_creates_a_job_and_reports_progress(self):
+        from io import BytesIO
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .models import BatchImportJob
+
+        buffer = BytesIO()
+        self._sheet().head(2).to_excel(buffer, index=False)
+        upload = SimpleUploadedFile('batches.xlsx', buffer.getvalue())
+        self.client.force_login(self.user)
+
+        with self.settings(BATCH_JOBS_IN_BACKGROUND=False), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('batchdb:import_batches'), {'excel_file': upload})
+        job = BatchImportJob.objects.get()
+        self.assertRedirects(response, reverse('batchdb:import_batch_job', args=[job.pk]), fetch_redirect_response=False)
+
+        progress = self.client.get(reverse('batchdb:import_batch_job', args=[job.pk]), {'format': 'json'}).json()
+        self.assertEqual((progress['status'], progress['created_count'], progress['percent_complete']), ('COMPLETED', 2, 100))
+
+        # Another user cannot read the job or its error report
+        other = User.objects.create_user(email='other-importer@example.com', name='Other', role='staff', password='pw')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('batchdb:import_batch_job', args=[job.pk])).status_code, 404)
+        response = self.client.get(reverse('batchdb:download_error_report_batch'), {'job': job.pk})
+        self.assertEqual(response.status_code, 404)
+        self.client.force_login(self.user)
+
+        # Only a PENDING job can be claimed, so a second run does not import the sheet again
+        from io import StringIO
+        from django.core.management import call_command
+        from .importer import process_job
+        out = StringIO()
+        call_command('run_batch_imports', str(job.pk), stdout=out)
+        self.assertIn('not pending, skipped', out.getvalue())
+        BatchImportJob.objects.filter(pk=job.pk).update(status='PROCESSING')
+        self.assertIsNone(process_job(job))
+        self.assertEqual(Batch.objects.count(), 2)
+        job.uploaded_file.delete(save=False)
+
+        # A job run outside a request leaves no user behind for the next one
+        from django.core.files.base import ContentFile
+        from core.request_context import get_current_user, set_current_user
+        set_current_user(None)
+        broken = BatchImportJob.objects.create(file_name='broken.xlsx', created_by=self.user)
+        broken.uploaded_file.save('broken.xlsx', ContentFile(b'not a sheet'))
+        with self.assertLogs('batchdb.importer', 'ERROR'):
+            self.assertEqual(process_job(broken).status, 'FAILED')
+        self.assertIsNone(get_current_user())
+        broken.uploaded_file.delete(save=False)
+
+    def test_interrupted_imports_are_failed(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import BatchImportJob
+
+        now = timezone.now()
+        stale = BatchImportJob.objects.create(file_name='old.xlsx', created_by=self.user, status='PROCESSING',
+                                              total_rows=400, processed_rows=200, heartbeat_at=now - timedelta(hours=1))
+        running = BatchImportJob.objects.create(file_name='new.xlsx', created_by=self.user, status='PROCESSING',
+                                                total_rows=400, processed_rows=200, heartbeat_at=now)
+        self.client.force_login(self.user)
+
+        progress = self.client.get(reverse('batchdb:import_batch_job', args=[stale.pk]), {'format': 'json'}).json()
+        self.assertEqual(progress['status'], 'FAILED')
+        self.assertEqual(progress['error_message'], 'Import interrupted after 200 of 400 rows; batches created before that were kept.')
+
+        BatchImportJob.objects.filter(pk=stale.pk).update(status='PROCESSING')
+        call_command('run_batch_imports', stdout=StringIO())
+        self.assertEqual(BatchImportJob.objects.get(pk=stale.pk).status, 'FAILED')
+        self.assertEqual(BatchImportJob.objects.get(pk=running.pk).status, 'PROCESSING')
+
+
+class BatchExportTestCase(TestCase):
+    def setUp(self):
+        from coursedb.models import CourseCategory
+        self.user = User.objects.create_user(email='exporter@example.com', name='Exporter', role='staff', password='pw')
+        category = CourseCategory.objects.create(name='Python')
+        course = Course.objects.create(course_name='Python Full Stack', code='PYFS', category=category, total_duration=60)
+        self.full = Batch.objects.create(batch_id='PFSAA', course=course, start_date=datetime(2026, 1, 5).date(),
+                                         end_date=datetime(2026, 3, 5).date(), start_time='09:00', end_time='10:30', days=['Mon', 'Wed'])
+        self.empty = Batch.objects.create(batch_id='PFSAB', start_date=datetime(2026, 2, 1).date(), end_date=datetime(2026, 4, 1).date())
+        Student.objects.bulk_create([
+            Student(student_id=f'X00{i}', first_name=f'Student {i}', mode_of_class='ON', week_type='WD') for i in range(1, 3)
+        ])
+        BatchStudent.objects.bulk_create([BatchStudent(batch=self.full, student=student) for student in Student.objects.order_by('pk')])
+
+    def _read(self, fh):
+        from openpyxl import load_workbook
+        return load_workbook(fh)['All Batches']
+
+    def test_workbook_is_written_from_one_query(self):
+        from io import BytesIO
+        from .exports import write_all_batches, BAND_COLORS
+
+        fh = BytesIO()
+        with self.assertNumQueries(1):
+            self.assertEqual(write_all_batches(fh), 3)
+
+        rows = list(self._read(fh).iter_rows())
+        self.assertEqual([cell.value for cell in rows[1]], [
+            'PFSAA', 'Python Full Stack', 'N/A', '05-01-2026', '05-03-2026', '09:00 AM - 10:30 AM',
+            'Yet to Start', 'Mon, Wed', 'X001', 'Student 1 ', None, None,
+        ])
+        self.assertEqual([cell.value for cell in rows[3]][:9], ['PFSAB', 'N/A', 'N/A', '01-02-2026', '01-04-2026', 'Not Set', 'Yet to Start', None, None])
+        # Rows of a batch share a band; the next batch gets the next colour
+        self.assertTrue(rows[0][0].font.b)
+        self.assertEqual({row[0].fill.start_color.rgb[-6:] for row in rows[1:3]}, {BAND_COLORS[0]})
+        self.assertEqual(rows[3][0].fill.start_color.rgb[-6:], BAND_COLORS[1])
+
+    def test_large_exports_are_generated_by_a_job(self):
+        from io import BytesIO
+        from .models import BatchExportJob
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('batchdb:export_all_batches_data'))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="all_batches_details.xlsx"')
+        self.assertEqual(self._read(BytesIO(b''.join(response.streaming_content))).max_row, 4)
+
+        with self.settings(BATCH_EXPORT_BACKGROUND_ROWS=1, BATCH_JOBS_IN_BACKGROUND=False), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse('batchdb:export_all_batches_data'))
+        job = BatchExportJob.objects.get()
+        self.assertRedirects(response, reverse('batchdb:batch_export_job', args=[job.pk]), fetch_redirect_response=False)
+        self.assertEqual((job.status, job.row_count), ('COMPLETED', 3))
+
+        url = reverse('batchdb:batch_export_job', args=[job.pk])
+        self.assertEqual(self.client.get(url, {'format': 'json'}).json()['status'], 'COMPLETED')
+        download = self.client.get(url, {'download': 1})
+        self.assertEqual(self._read(BytesIO(b''.join(download.streaming_content))).max_row, 4)
+
+        # Another user cannot poll or download the job
+        other = User.objects.create_user(email='other-exporter@example.com', name='Other', role='staff', password='pw')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url, {'download': 1}).status_code, 404)
+        job.file.delete(save=False)
+
+    def test_interrupted_exports_are_generated_again(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import BatchExportJob
+
+        now = timezone.now()
+        stale = BatchExportJob.objects.create(status='PROCESSING', heartbeat_at=now - timedelta(hours=1))
+        running = BatchExportJob.objects.create(created_by=self.user, status='PROCESSING', heartbeat_at=now)
+
+        call_command('run_batch_exports', stdout=StringIO())
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.row_count), ('COMPLETED', 3))
+        self.assertEqual(BatchExportJob.objects.get(pk=running.pk).status, 'PROCESSING')
+        stale.file.delete(save=False)
+
+        # A stale job is also restarted when its page is polled, and only once
+        BatchExportJob.objects.filter(pk=running.pk).update(heartbeat_at=now - timedelta(hours=1))
+        self.client.force_login(self.user)
+        url = reverse('batchdb:batch_export_job', args=[running.pk])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertEqual(self.client.get(url, {'format': 'json'}).json()['status'], 'PROCESSING')
+            self.assertEqual(self.client.get(url, {'format': 'json'}).json()['status'], 'PROCESSING')
+        self.assertEqual(len(callbacks), 1)
+        progress = self.client.get(url, {'format': 'json'}).json()
+        self.assertEqual((progress['status'], progress['row_count']), ('COMPLETED', 3))
+        BatchExportJob.objects.get(pk=running.pk).file.delete(save=False)
+
+
+class BatchSearchTestCase(TestCase):
+    def setUp(self):
+        from .services import enroll_students
+        self.user = User.objects.create_user(email='searcher@example.com', name='Searcher', role='staff', password='pw')
+        category = CourseCategory.objects.create(name='Python')
+        self.course = Course.objects.create(course_name='Python Full Stack', code='PYFS', category=category, total_duration=60)
+        self.trainer = Trainer.objects.create(trainer_id='TR0900', name='Ravi Kumar', employment_type='FT')
+        Student.objects.bulk_create([
+            Student(student_id='SRC001', first_name='Anitha', last_name='Raman', mode_of_class='ON', week_type='WD'),
+            Student(student_id='SRC002', first_name='Arun', last_name='Prakash', mode_of_class='ON', week_type='WD'),
+            Student(student_id='SRC003', first_name='Anitha', last_name='Suresh', mode_of_class='ON', week_type='WD'),
+        ])
+        self.anitha, self.arun, self.suresh = Student.objects.order_by('student_id')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.python = Batch.objects.create(batch_id='PFSAA', course=self.course, trainer=self.trainer,
+                                               start_date=datetime(2026, 1, 5).date(), end_date=datetime(2026, 3, 5).date())
+            self.other = Batch.objects.create(batch_id='XYZAB', start_date=datetime(2026, 2, 1).date(), end_date=datetime(2026, 4, 1).date())
+            enroll_students(self.python, [self.anitha, self.arun, self.suresh])
+            enroll_students(self.other, [self.arun])
+
+    def _document(self, batch):
+        return batch.search_document.__class__.objects.get(pk=batch.pk).document
+
+    def test_documents_follow_batch_enrollment_trainer_and_course_changes(self):
+        self.assertEqual(self._document(self.python).split('\n'), [
+            'PFSAA', 'Python Full Stack', 'Ravi Kumar', 'Anitha Raman', 'Arun Prakash', 'Anitha Suresh',
+        ])
+        self.assertEqual(self._document(self.other), 'XYZAB\nArun Prakash')
+
+        from unittest import mock
+        from core import commit_buffer
+        from . import search
+
+        with mock.patch.object(search, 'refresh_documents', wraps=search.refresh_documents) as refresh:
+            with commit_buffer.request_scope(), self.captureOnCommitCallbacks(execute=True):
+                self.arun.last_name = 'Prabhu'
+                self.arun.save()
+                self.trainer.name = 'Ravi Shankar'
+                self.trainer.save()
+                self.course.course_name = 'Python Django'
+                self.course.save()
+                BatchStudent.objects.filter(batch=self.python, student=self.suresh).delete()
+        # Every change of the request is applied by one refresh
+        refresh.assert_called_once_with([self.python.pk, self.other.pk])
+        self.assertEqual(self._document(self.python), 'PFSAA\nPython Django\nRavi Shankar\nAnitha Raman\nArun Prabhu')
+        self.assertEqual(self._document(self.other), 'XYZAB\nArun Prabhu')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trainer.delete()
+        self.assertNotIn('Ravi', self._document(self.python))
+
+    def test_search_is_ranked_and_returns_each_batch_once(self):
+        from .search import search_batches
+
+        results = search_batches(Batch.objects.all(), 'arun')
+        self.assertNotIn('studentsdb_student', str(results.query))
+        self.assertEqual(sorted(batch.batch_id for batch in results), ['PFSAA', 'XYZAB'])
+
+        # Every term must match; substrings match like icontains did
+        self.assertEqual([b.batch_id for b in search_batches(Batch.objects.all(), 'anitha  full')], ['PFSAA'])
+        self.assertEqual([b.batch_id for b in search_batches(Batch.objects.all(), 'SAA')], ['PFSAA'])
+        self.assertEqual([b.batch_id for b in search_batches(Batch.objects.all(), 'ab')], ['XYZAB'])
+        self.assertEqual(list(search_batches(Batch.objects.all(), 'anitha "full')), [])
+
+        # The batch with more matches ranks first
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.batch_id = 'ARUNXY'
+            self.other.save()
+        self.assertEqual([b.batch_id for b in search_batches(Batch.objects.all(), 'arun')], ['ARUNXY', 'PFSAA'])
+
+    def test_batch_list_and_api_search(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('batchdb:batch_list'), {'q': 'anitha'})
+        self.assertEqual([batch.batch_id for batch in response.context['batches']], ['PFSAA'])
+
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('batchdb_api:batch-list'), {'search': 'arun'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(row['batch_id'] for row in response.data['results']), ['PFSAA', 'XYZAB'])
+        response = client.get(reverse('batchdb_api:batch-list'), {'search': 'kumar'})
+        self.assertEqual([row['batch_id'] for row in response.data['results']], ['PFSAA'])
+
+    def test_rebuild_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import BatchSearchDocument
+
+        BatchSearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_batch_search', stdout=out)
+        self.assertIn('rebuilt 2 batch search documents', out.getvalue())
+        self.assertEqual(self._document(self.other), 'XYZAB\nArun Prakash')
+
+    def test_student_save_without_a_name_change_skips_the_refresh(self):
+        from unittest import mock
+        from . import signals
+
+        with mock.patch.object(signals, 'schedule_refresh') as schedule:
+            self.arun.phone = '9000000000'
+            self.arun.save()
+            schedule.assert_not_called()
+
+            self.arun.first_name = 'Aruna'
+            self.arun.save()
+            schedule.assert_called_once()
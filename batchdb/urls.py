@@ -14,12 +14,14 @@ urlpatterns = [
     path('create/', views.create_batch, name='create_batch'),
     path('<int:pk>/update/', views.update_batch, name='update_batch'),
     path('import/', views.import_batches, name='import_batches'),
+    path('import/<int:pk>/', views.import_batch_job, name='import_batch_job'),
     path('template/', views.download_batch_template, name='download_batch_template'),
     path('error-report/', views.download_error_report_batch, name='download_error_report_batch'),
     path('<int:pk>/delete/', views.delete_batch, name='delete_batch'),
     path('batch/<int:pk>/report/', views.batch_report, name='batch_report'),
     path('batch/<int:batch_id>/export/', views.export_batch_data, name='export_batch_data'),
     path('export-all/', views.export_all_batches_data, name='export_all_batches_data'),
+    path('export-all/<int:pk>/', views.batch_export_job, name='batch_export_job'),
     path('handover-requests/', views.view_handover_requests, name='view_handover_requests'),
     path('handover-requests/<int:pk>/update/', views.update_handover_status, name='update_handover_status'),
     
@@ -1,7 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse
 from django.db import transaction
 from django.db.models import Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
@@ -22,7 +22,7 @@ from django.views.decorators.csrf import csrf_exempt
 # Model imports
 from .models import (
     Batch, Course, Trainer, Student, BatchStudent,
-    TransferRequest, BatchTransaction, TrainerHandover
+    TransferRequest, BatchTransaction, TrainerHandover, BatchImportJob, BatchExportJob
 )
 
 # Serializer imports
@@ -36,18 +36,21 @@ from .serializers import (
     StudentSerializer, TrainerSerializer
 )
 
+from .services import enroll_students
+from .search import BatchOrderingFilter, BatchSearchFilter, search_batches
+from .importer import fail_stale_jobs as fail_stale_import_jobs, start_job as start_import_job
+from . import exports as batch_exports
+
 # Form imports
 from .forms import BatchCreationForm, BatchUpdateForm, BatchFilterForm
 
 import json
+import tempfile
 import pandas as pd
-from io import BytesIO
-from openpyxl.styles import PatternFill
 
 from coursedb.models import Course, CourseCategory
 from trainersdb.models import Trainer
 from studentsdb.models import Student
-from placementdb.models import Placement
 
 # Request Management API Endpoints
 
@@ -72,13 +75,8 @@ def batch_list(request):
         percentage_max = form.cleaned_data.get('percentage_max')
 
         if query:
-            batch_list = batch_list.filter(
-                Q(students__first_name__icontains=query) |
-                Q(students__last_name__icontains=query) |
-                Q(batch_id__icontains=query) |
-                Q(course__course_name__icontains=query) |
-                Q(trainer__name__icontains=query)
-            ).distinct()
+            # Ranked search over the per-batch search documents (no student join)
+            batch_list = search_batches(batch_list, query)
         
         if courses:
             batch_list = batch_list.filter(course__in=courses).distinct()
@@ -323,8 +321,7 @@ class BatchViewSet(viewsets.ModelViewSet):
     queryset = Batch.objects.all()
     serializer_class = BatchSerializer
     permission_classes = [IsBatchCoordinator | IsStaff | IsTrainer]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['batch_id', 'course__name', 'trainer__name']
+    filter_backends = [BatchSearchFilter, BatchOrderingFilter]
     ordering_fields = ['start_date', 'end_date', 'created_at', 'batch_id']
     ordering = ['-created_at']
     pagination_class = StandardResultsSetPagination
@@ -396,31 +393,11 @@ class BatchViewSet(viewsets.ModelViewSet):
        if not student_ids:
            return Response({'error': 'Student IDs are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-       students_added = []
-       errors = []
-
-       for student_id in student_ids:
-           try:
-               student = Student.objects.get(pk=student_id)
-           except Student.DoesNotExist:
-               errors.append({'student_id': student_id, 'error': 'Student not found'})
-               continue
-
-           if BatchStudent.objects.filter(batch=batch, student=student, is_active=True).exists():
-               errors.append({'student_id': student_id, 'error': 'Student is already active in this batch'})
-               continue
-
-           # Add student to batch
-           batch_student, created = BatchStudent.objects.get_or_create(
-               batch=batch,
-               student=student,
-               defaults={'is_active': True, 'activated_at': timezone.now()}
-           )
-
-           if not created and not batch_student.is_active:
-               batch_student.activate(user=request.user)
-
-           students_added.append(student)
+       # One query for the students, one for their active memberships, bulk INSERTs for the rest
+       result = enroll_students(batch, student_ids, user=request.user)
+       errors = [{'student_id': student_id, 'error': 'Student not found'} for student_id in result.missing]
+       errors += [{'student_id': student_id, 'error': 'Student is already active in this batch'} for student_id in result.already_active]
+       students_added = result.added
 
        if errors:
            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
@@ -939,98 +916,42 @@ def import_batches(request):
             messages.error(request, "No batch file was uploaded.")
             return redirect('batchdb:batch_list')
 
-        try:
-            df = pd.read_excel(excel_file)
-        except Exception as e:
-            messages.error(request, f"Error reading batch Excel file: {e}")
-            return redirect('batchdb:batch_list')
-
-        required_columns = [
-            'module_name', 'batch_type', 'trainer', 'start_date', 'end_date', 'time_slot', 'students'
-        ]
-        if not all(col in df.columns for col in required_columns):
-            messages.error(request, f"Batch Excel file must contain the following columns: {', '.join(required_columns)}")
-            return redirect('batchdb:batch_list')
-
-        error_rows = []
-        success_count = 0
-
-        with transaction.atomic():
-            for index, row in df.iterrows():
-                try:
-                    module_name = row['module_name']
-                    batch_type = row['batch_type']
-                    trainer_name = row['trainer']
-                    start_date_str = str(row['start_date']).split(' ')[0]
-                    end_date_str = str(row['end_date']).split(' ')[0]
-                    time_slot = row['time_slot']
-                    student_ids_str = row['students']
-
-                    if not all([module_name, batch_type, trainer_name, start_date_str, end_date_str, time_slot, student_ids_str]):
-                        raise ValueError("All fields are mandatory.")
-                    
-                    student_ids = str(student_ids_str).split(',')
-
-                    try:
-                        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                    except ValueError:
-                        raise ValueError("Invalid date format. Use YYYY-MM-DD.")
-
-                    trainer, _ = Trainer.objects.get_or_create(name=trainer_name)
-                    
-                    batch_id_from_sheet = row.get('batch_id')
-                    if pd.notna(batch_id_from_sheet) and str(batch_id_from_sheet).strip():
-                        batch_id = str(batch_id_from_sheet).strip()
-                        if Batch.objects.filter(batch_id=batch_id).exists():
-                            raise ValueError(f"Batch with ID '{batch_id}' already exists.")
-                        batch = Batch(batch_id=batch_id)
-                    else:
-                        batch = Batch()
-
-                    batch.module_name = module_name
-                    batch.batch_type = batch_type
-                    batch.trainer = trainer
-                    batch.start_date = start_date
-                    batch.end_date = end_date
-                    batch.time_slot = time_slot
-                    batch.save()
-
-                    students = []
-                    for student_id in student_ids:
-                        student_id = student_id.strip()
-                        try:
-                            student = Student.objects.get(student_id=student_id)
-                            students.append(student)
-                        except Student.DoesNotExist:
-                            raise ValueError(f"Student with ID {student_id} not found.")
-                    
-                    batch.students.set(students)
-
-                    for student in students:
-                        if student.pl_required:
-                            Placement.objects.get_or_create(student=student)
-
-                    success_count += 1
-
-                except Exception as e:
-                    error_row = row.to_dict()
-                    error_row['error_reason'] = str(e)
-                    error_rows.append(error_row)
-
-        if error_rows:
-            request.session['error_rows_batch'] = error_rows
-            messages.warning(request, f"Successfully created {success_count} batches. {len(error_rows)} records had errors.")
-            return redirect('download_error_report_batch')
-        else:
-            messages.success(request, f"Successfully created {success_count} batches.")
-            return redirect('batchdb:batch_list')
+        # The sheet is imported in chunks by batchdb.importer; the job page reports progress
+        job = BatchImportJob.objects.create(
+            file_name=excel_file.name,
+            uploaded_file=excel_file,
+            created_by=request.user if request.user.is_authenticated else None,
+        )
+        start_import_job(job)
+        return redirect('batchdb:import_batch_job', pk=job.pk)
 
     return render(request, 'batchdb/import_batches.html')
 
+@login_required
+def import_batch_job(request, pk):
+    # Jobs carry the uploader's rows and errors, so only the uploader can open them
+    job = get_object_or_404(BatchImportJob, pk=pk, created_by=request.user)
+    if job.status == 'PROCESSING' and fail_stale_import_jobs(BatchImportJob.objects.filter(pk=job.pk)):
+        job.refresh_from_db()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'status': job.status,
+            'total_rows': job.total_rows,
+            'processed_rows': job.processed_rows,
+            'created_count': job.created_count,
+            'error_count': job.error_count,
+            'percent_complete': job.percent_complete,
+            'error_message': job.error_message,
+        })
+    return render(request, 'batchdb/import_batch_job.html', {'job': job})
+
 @login_required
 def download_error_report_batch(request):
-    error_rows = request.session.get('error_rows_batch', [])
+    job_pk = request.GET.get('job')
+    if job_pk:
+        error_rows = get_object_or_404(BatchImportJob, pk=job_pk, created_by=request.user).errors
+    else:
+        error_rows = request.session.get('error_rows_batch', [])
     if not error_rows:
         messages.error(request, "No error report to download.")
         return redirect('batchdb:batch_list')
@@ -1040,7 +961,8 @@ def download_error_report_batch(request):
     response['Content-Disposition'] = 'attachment; filename="batch_error_report.csv"'
     df.to_csv(response, index=False)
 
-    del request.session['error_rows_batch']
+    if not job_pk:
+        del request.session['error_rows_batch']
 
     return response
 
@@ -1374,71 +1296,34 @@ def export_batch_data(request, batch_id):
 
 @login_required
 def export_all_batches_data(request):
-    batches = Batch.objects.all().order_by('batch_id')
-    
-    if not batches.exists():
+    if not Batch.objects.exists():
         messages.error(request, "No batches to export.")
         return redirect('batchdb:batch_list')
 
-    all_batches_data = []
-    batch_row_map = {}
-    current_row = 1
-
-    for batch in batches:
-        batch_info = {
-            'Batch ID': batch.batch_id,
-            'Course': batch.course.course_name if batch.course else 'N/A',
-            'Trainer': batch.trainer.name if batch.trainer else 'N/A',
-            'Start Date': batch.start_date.strftime('%d-%m-%Y'),
-            'End Date': batch.end_date.strftime('%d-%m-%Y'),
-            'Slot Time': batch.get_slottime,
-            'Status': batch.get_batch_status_display(),
-            'Days': ', '.join(batch.days),
-        }
+    # Large exports are generated in the background; the job page links the file when ready
+    if batch_exports.runs_in_background():
+        job = BatchExportJob.objects.create(created_by=request.user if request.user.is_authenticated else None)
+        batch_exports.start_job(job)
+        return redirect('batchdb:batch_export_job', pk=job.pk)
 
-        students = batch.students.all()
-        start_row = current_row
-        
-        if students:
-            for student in students:
-                student_info = batch_info.copy()
-                student_info.update({
-                    'Student ID': student.student_id,
-                    'Student Name': f"{student.first_name} {student.last_name or ''}",
-                    'Email': student.email,
-                    'Phone': student.phone,
-                })
-                all_batches_data.append(student_info)
-                current_row += 1
-        else:
-            all_batches_data.append(batch_info)
-            current_row += 1
-            
-        batch_row_map[batch.id] = (start_row, current_row - 1)
-
-    df = pd.DataFrame(all_batches_data)
-    column_order = ['Batch ID', 'Course', 'Trainer', 'Start Date', 'End Date', 'Slot Time', 'Status', 'Days', 'Student ID', 'Student Name', 'Email', 'Phone']
-    df = df.reindex(columns=column_order)
-
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='All Batches')
-        workbook = writer.book
-        worksheet = writer.sheets['All Batches']
-
-        colors = ['FFFFCC', 'CCFFCC', 'CCFFFF', 'FFCCFF', 'CCE5FF', 'FFDDAA']
-        color_index = 0
-
-        for batch_id, (start_row, end_row) in batch_row_map.items():
-            fill_color = PatternFill(start_color=colors[color_index % len(colors)],
-                                     end_color=colors[color_index % len(colors)],
-                                     fill_type="solid")
-            for row in range(start_row + 1, end_row + 2):
-                for col in range(1, len(column_order) + 1):
-                    worksheet.cell(row=row, column=col).fill = fill_color
-            color_index += 1
-
-    output.seek(0)
-    response = HttpResponse(output, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="all_batches_details.xlsx"'
-    return response
+    # Streamed from a temporary file, deleted when the response closes it
+    fh = tempfile.TemporaryFile()
+    batch_exports.write_all_batches(fh)
+    fh.seek(0)
+    return FileResponse(fh, as_attachment=True, filename=batch_exports.FILE_NAME, content_type=batch_exports.CONTENT_TYPE)
+
+@login_required
+def batch_export_job(request, pk):
+    # The file holds every batch's details, so only the user who asked for it can open it
+    job = get_object_or_404(BatchExportJob, pk=pk, created_by=request.user)
+    if job.status == 'PROCESSING' and batch_exports.restart_stale_jobs(BatchExportJob.objects.filter(pk=job.pk)):
+        job.refresh_from_db()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'status': job.status,
+            'row_count': job.row_count,
+            'error_message': job.error_message,
+        })
+    if request.GET.get('download') and job.status == 'COMPLETED' and job.file:
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=batch_exports.FILE_NAME, content_type=batch_exports.CONTENT_TYPE)
+    return render(request, 'batchdb/batch_export_job.html', {'job': job})
@@ -0,0 +1,102 @@
+"""
+Commit buffers: work that may only run once the surrounding transaction commits,
+collected per request and handled in bulk (transaction log entries, audit rows,
+batch search refreshes).
+
+- Every item goes through transaction.on_commit on its own, so an item queued in a
+  rolled-back transaction or savepoint is dropped by Django; nothing here looks at
+  the connection's pending callbacks.
+- Inside request_scope() (opened for every request by CaptureUserMiddleware) the
+  committed items wait in the scope, which lives in a ContextVar like
+  core.request_context, and each buffer's handler receives them together when the
+  outermost scope exits, or earlier once flush_size items are waiting.
+- Outside a scope an item is handed to its handler as soon as its transaction
+  commits (at once when no transaction is open).
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class _Scope:
+    __slots__ = ("items", "depth")
+
+    def __init__(self):
+        # buffer -> committed items waiting for the scope to end
+        self.items = {}
+        self.depth = 0
+
+
+_scope = ContextVar("commit_buffer_scope", default=None)
+
+
+class CommitBuffer:
+    """
+    handler(items) receives the committed items of a scope, in commit order.
+    It runs outside the committed transaction, so it should not raise; failures
+    at scope exit are logged and never reach the response.
+    flush_size is a number, or a callable returning it when settings decide.
+    """
+
+    def __init__(self, name, handler, flush_size=500):
+        self.name = name
+        self.handler = handler
+        self.flush_size = flush_size
+
+    def _limit(self):
+        return self.flush_size() if callable(self.flush_size) else self.flush_size
+
+    def add(self, item):
+        # Runs immediately when no transaction is open
+        transaction.on_commit(partial(self._committed, item))
+
+    def _committed(self, item):
+        scope = _scope.get()
+        if scope is None:
+            self.handler([item])
+            return
+        items = scope.items.setdefault(self, [])
+        items.append(item)
+        if len(items) >= self._limit():
+            self.flush()
+
+    def flush(self):
+        """Hands every item waiting in the current scope to the handler. Returns their number."""
+        scope = _scope.get()
+        items = scope.items.pop(self, None) if scope is not None else None
+        if not items:
+            return 0
+        self.handler(items)
+        return len(items)
+
+    def __repr__(self):
+        return f"<CommitBuffer {self.name}>"
+
+
+@contextmanager
+def request_scope():
+    """Keeps committed items until the outermost scope exits, then flushes every buffer."""
+    scope = _scope.get()
+    token = None
+    if scope is None:
+        scope = _Scope()
+        token = _scope.set(scope)
+    scope.depth += 1
+    try:
+        yield
+    finally:
+        scope.depth -= 1
+        if not scope.depth:
+            while scope.items:
+                buffer = next(iter(scope.items))
+                try:
+                    buffer.flush()
+                except Exception:
+                    logger.exception("Failed to flush %r", buffer)
+            if token is not None:
+                _scope.reset(token)
@@ -0,0 +1,153 @@
+"""
+Per-request context read by the audit and transaction logging paths.
+
+CaptureUserMiddleware activates one RequestContext per request. IP address,
+user agent and correlation id are resolved once when it is built. The user and
+active role are read from the request when first needed, so users authenticated
+later by DRF (JWT) are still attributed.
+
+The context lives in a ContextVar, not a threading.local, so it follows the
+request into async views and into work offloaded with asgiref's
+sync_to_async / async_to_sync (both copy the caller's context).
+"""
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+REQUEST_CONTEXT_ATTR = "_request_context"
+ACTIVE_ROLE_HEADER = "HTTP_X_ACTIVE_ROLE"
+
+_UNSET = object()
+
+
+def _client_meta(request):
+    meta = getattr(request, "META", None) or {}
+    ip = meta.get("REMOTE_ADDR")
+    xff = meta.get("HTTP_X_FORWARDED_FOR")
+    if xff:
+        ip = xff.split(",")[0].strip()
+    cid = meta.get("HTTP_X_CORRELATION_ID") or meta.get("HTTP_X_REQUEST_ID")
+    return ip, meta.get("HTTP_USER_AGENT"), cid
+
+
+class RequestContext:
+    """User, active role, IP, user agent and correlation id of the current request."""
+
+    __slots__ = ("request", "ip_address", "user_agent", "correlation_id", "_user", "_active_role")
+
+    def __init__(self, request=None, user=_UNSET, active_role=_UNSET, ip_address=None, user_agent=None, correlation_id=None):
+        self.request = request
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.correlation_id = correlation_id
+        self._user = user
+        self._active_role = active_role
+
+    @classmethod
+    def from_request(cls, request):
+        # DRF wraps the HttpRequest; authentication results are mirrored onto the wrapped one
+        request = getattr(request, "_request", request)
+        ip, ua, cid = _client_meta(request)
+        # Events of one request share a correlation id even without the header
+        return cls(request, ip_address=ip, user_agent=ua, correlation_id=cid or str(uuid.uuid4()))
+
+    @property
+    def user(self):
+        if self._user is not _UNSET:
+            return self._user
+        user = getattr(self.request, "user", None)
+        if user is None or not user.is_authenticated:
+            return None
+        return user
+
+    @property
+    def active_role(self):
+        if self._active_role is not _UNSET:
+            return self._active_role
+        user = self.user
+        if user is None:
+            return None
+        from rbac.utils import ACTIVE_ROLE_SESSION_KEY
+
+        meta = getattr(self.request, "META", None) or {}
+        session = getattr(self.request, "session", None)
+        role = (
+            meta.get(ACTIVE_ROLE_HEADER)
+            or (session.get(ACTIVE_ROLE_SESSION_KEY) if session is not None else None)
+            or getattr(user, "last_active_role", None)
+        )
+        self._active_role = role
+        return role
+
+    def with_user(self, user):
+        """Copy of this context attributed to an explicit user (None for no user)."""
+        return RequestContext(
+            self.request,
+            user=user,
+            ip_address=self.ip_address,
+            user_agent=self.user_agent,
+            correlation_id=self.correlation_id,
+        )
+
+    @property
+    def meta(self):
+        return self.ip_address, self.user_agent, self.correlation_id
+
+
+_EMPTY = RequestContext()
+_current = ContextVar("request_context", default=_EMPTY)
+
+
+def get_context():
+    """Context of the running request; an empty one outside requests."""
+    return _current.get()
+
+
+def set_context(context):
+    """Makes context current; returns the token for reset_context()."""
+    return _current.set(context)
+
+
+def reset_context(token):
+    _current.reset(token)
+
+
+def context_for(request):
+    """
+    Context of a request: the active one when it belongs to this request,
+    otherwise built once and kept on the request.
+    """
+    raw = getattr(request, "_request", request)
+    current = _current.get()
+    if current.request is raw:
+        return current
+    context = getattr(raw, REQUEST_CONTEXT_ATTR, None)
+    if context is None:
+        context = RequestContext.from_request(raw)
+        try:
+            setattr(raw, REQUEST_CONTEXT_ATTR, context)
+        except Exception:
+            pass
+    return context
+
+
+@contextmanager
+def activate(request):
+    """Makes the request's context current for the duration of the block."""
+    token = _current.set(context_for(request))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def get_current_user():
+    return get_context().user
+
+
+def set_current_user(user):
+    """
+    Attributes the rest of the current context (request or task) to user.
+    Returns the token for reset_context().
+    """
+    return _current.set(get_context().with_user(user))
@@ -124,6 +124,48 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Optional: embed the active role and RBAC version counters in access tokens so that
+# HasRBACPermission authorizes from token claims without reading UserRole (rbac/tokens.py)
+RBAC_TOKEN_CLAIMS = os.environ.get('RBAC_TOKEN_CLAIMS', 'False').lower() == 'true'
+
+# How often (seconds) a worker re-reads the permission catalogue version (rbac/bitsets.py);
+# lookups of an unknown permission code re-read it immediately
+RBAC_CATALOG_RECHECK_SECONDS = int(os.environ.get('RBAC_CATALOG_RECHECK_SECONDS', '5'))
+
+# Student/Trainer/Consultant ID allocation: 1 keeps the gap-free sequence, N > 1 reserves
+# blocks of N ids per worker (hi/lo) so concurrent onboarding stops serializing on RoleSequence
+RBAC_ID_BLOCK_SIZE = int(os.environ.get('RBAC_ID_BLOCK_SIZE', '1'))
+
+# Transaction log writes are buffered per request and flushed with bulk_create (settingsdb/log_buffer.py).
+# Set TRANSACTION_LOG_SPILL_DIR to spill very large flushes to NDJSON for `manage.py ingest_transaction_logs`.
+TRANSACTION_LOG_FLUSH_SIZE = 500
+TRANSACTION_LOG_SPILL_DIR = os.environ.get('TRANSACTION_LOG_SPILL_DIR') or None
+TRANSACTION_LOG_SPILL_THRESHOLD = 2000
+
+# Log retention (audit/retention.py, `manage.py archive_logs`): rows older than the horizon move
+# from the hot tables into gzipped monthly NDJSON archives under LOG_ARCHIVE_DIR.
+LOG_ARCHIVE_DIR = os.environ.get('LOG_ARCHIVE_DIR', os.path.join(BASE_DIR, 'log_archive'))
+AUDIT_LOG_RETENTION_DAYS = int(os.environ.get('AUDIT_LOG_RETENTION_DAYS', '180'))
+TRANSACTION_LOG_RETENTION_DAYS = int(os.environ.get('TRANSACTION_LOG_RETENTION_DAYS', '180'))
+# PostgreSQL only: keep the log tables natively partitioned by month (see audit/partitions.py)
+LOG_PG_PARTITIONING = os.environ.get('LOG_PG_PARTITIONING', 'False').lower() == 'true'
+
+# Opt-in write profiler: per-model save/delete cost and per-receiver signal cost, aggregated
+# over SIGNAL_PROFILING_WINDOW seconds (settingsdb/signal_profiler.py, `manage.py profile_signals`)
+SIGNAL_PROFILING = os.environ.get('SIGNAL_PROFILING', 'False').lower() == 'true'
+SIGNAL_PROFILING_WINDOW = int(os.environ.get('SIGNAL_PROFILING_WINDOW', '300'))
+
+# Excel batch import / export (batchdb/importer.py, batchdb/exports.py): rows written per savepoint,
+# exports larger than BATCH_EXPORT_BACKGROUND_ROWS become jobs, and whether jobs run on a
+# background thread while the job page polls their progress. A thread dies with its worker, so
+# only enable it with `manage.py run_batch_imports` and `run_batch_exports` scheduled: they fail
+# imports and re-run exports whose progress has not moved for BATCH_JOB_STALE_SECONDS (also
+# checked when a job page is polled)
+BATCH_IMPORT_CHUNK_SIZE = int(os.environ.get('BATCH_IMPORT_CHUNK_SIZE', '200'))
+BATCH_EXPORT_BACKGROUND_ROWS = int(os.environ.get('BATCH_EXPORT_BACKGROUND_ROWS', '20000'))
+BATCH_JOBS_IN_BACKGROUND = os.environ.get('BATCH_JOBS_IN_BACKGROUND', 'False').lower() == 'true'
+BATCH_JOB_STALE_SECONDS = int(os.environ.get('BATCH_JOB_STALE_SECONDS', '900'))
+
 # Force Django to trust Nginx HTTPS
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paymentdb', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(default='PMT', max_length=10, unique=True)),
+                ('current_sequence', models.PositiveIntegerField(default=0, help_text='The last used number')),
+                ('last_updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
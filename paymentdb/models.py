@@ -107,9 +107,8 @@ class Payment(models.Model):
         
         # Generate payment ID if not exists
         if not self.payment_id:
-            last = Payment.objects.order_by('-id').first()
-            next_id = int(last.payment_id.replace('PMT', '')) + 1 if last and last.payment_id else 1
-            self.payment_id = f'PMT{next_id:04d}'
+            from .services import generate_payment_ids
+            self.payment_id = generate_payment_ids(1)[0]
 
         # Validate EMI amounts based on EMI type
         max_emis = int(self.emi_type) if self.emi_type in ['1', '2', '3', '4'] else 0
@@ -197,3 +196,17 @@ class Payment(models.Model):
         # Current EMI must exist and not be fully paid
         current_emi_amount = getattr(self, f'emi_{emi_number}_amount')
         return bool(current_emi_amount) and not self.is_emi_fully_paid(emi_number)
+
+
+class PaymentSequence(models.Model):
+    """
+    Last payment number issued (PMT0001, PMT0002, ...), see paymentdb.services.generate_payment_ids.
+    Allocating numbers increments this one row, so concurrent saves and bulk imports never
+    hand out the same payment ID.
+    """
+    prefix = models.CharField(max_length=10, unique=True, default='PMT')
+    current_sequence = models.PositiveIntegerField(default=0, help_text="The last used number")
+    last_updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.prefix} Sequence: {self.current_sequence}"
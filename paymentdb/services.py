@@ -0,0 +1,42 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Payment, PaymentSequence
+
+PAYMENT_ID_PREFIX = 'PMT'
+
+
+def _highest_issued():
+    highest = 0
+    for payment_id in Payment.objects.filter(payment_id__startswith=PAYMENT_ID_PREFIX).values_list('payment_id', flat=True).iterator():
+        number = payment_id[len(PAYMENT_ID_PREFIX):]
+        if number.isdigit():
+            highest = max(highest, int(number))
+    return highest
+
+
+def _create_sequence():
+    # First allocation: start after the IDs issued before the counter existed
+    try:
+        with transaction.atomic():
+            PaymentSequence.objects.create(prefix=PAYMENT_ID_PREFIX, current_sequence=_highest_issued())
+    except IntegrityError:
+        pass  # created concurrently
+
+
+def generate_payment_ids(count=1):
+    """
+    count new payment IDs (PMT0001, ...) reserved with one atomic increment of
+    the PaymentSequence row.
+    """
+    if count < 1:
+        return []
+    counter = PaymentSequence.objects.filter(prefix=PAYMENT_ID_PREFIX)
+    with transaction.atomic():
+        # The UPDATE row-locks the counter until commit; the read sees our increment
+        if not counter.update(current_sequence=F('current_sequence') + count, last_updated_at=timezone.now()):
+            _create_sequence()
+            counter.update(current_sequence=F('current_sequence') + count, last_updated_at=timezone.now())
+        last = counter.values_list('current_sequence', flat=True).get()
+    return [f"{PAYMENT_ID_PREFIX}{number:04d}" for number in range(last - count + 1, last + 1)]
@@ -1,18 +1,20 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
+from rest_framework_simplejwt.views import TokenVerifyView
 from .api_views import (
     RoleViewSet, 
     PermissionViewSet, 
     RolePermissionView,
     UserRoleAssignmentView,
     RBACTokenObtainPairView,
+    RBACTokenRefreshView,
     LogoutView,
     UserPermissionsView,
     SwitchRoleView,
     RoleImpactSummaryView,
     RoleDeactivateView,
     UserCreateView,
+    UserBulkCreateView,
     UserListView,
     OnboardingDropdownsView,
     OnboardRequestCreateView,
@@ -39,7 +41,7 @@ urlpatterns = [
     path('auth/switch-role/', SwitchRoleView.as_view(), name='rbac-switch-role'),
     path('auth/check-permissions/', CheckPermissionsView.as_view(), name='rbac-check-permissions'),
     path('auth/me/', UserPermissionsView.as_view(), name='rbac-me'),
-    path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/refresh/', RBACTokenRefreshView.as_view(), name='token_refresh'),
     path('auth/verify/', TokenVerifyView.as_view(), name='token_verify'),
     path('auth/logout/', LogoutView.as_view(), name='rbac-logout'),
     
@@ -48,6 +50,7 @@ urlpatterns = [
     path('roles/<int:pk>/deactivate/', RoleDeactivateView.as_view(), name='rbac-role-deactivate'),
     path('users/', UserListView.as_view(), name='rbac-user-list'),
     path('users/create/', UserCreateView.as_view(), name='rbac-user-create'),
+    path('users/bulk-create/', UserBulkCreateView.as_view(), name='rbac-user-bulk-create'),
     path('onboarding/options/', OnboardingDropdownsView.as_view(), name='onboarding_options'),
     path('onboard-requests/', OnboardRequestListView.as_view(), name='onboard-request-list'),
     path('onboard-requests/create/', OnboardRequestCreateView.as_view(), name='onboard-request-create'),
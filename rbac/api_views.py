@@ -7,14 +7,14 @@ from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.utils.decorators import method_decorator
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.cache import cache
 from django.db import transaction
 from django.utils import timezone
 
 from .models import Role, Permission, RolePermission, UserRole, OnboardRequest
-from .utils import get_user_permissions
+from .utils import get_request_permission_mask, set_session_active_role
+from . import bitsets
 from .serializers import (
     RoleSerializer, 
     PermissionSerializer, 
@@ -22,6 +22,7 @@ from .serializers import (
     AssignPermissionSerializer,
     UserRoleSerializer,
     RBACTokenObtainPairSerializer,
+    RBACTokenRefreshSerializer,
     RoleDeactivateSerializer,
     UserCreateSerializer,
     OnboardRequestCreateSerializer,
@@ -137,23 +138,17 @@ class RoleViewSet(viewsets.ModelViewSet):
             
         # --- STRICT INVARIANT VALIDATION END ---
         
-        # 1. Fetch Permission Objects
-        perms = Permission.objects.filter(code__in=permission_codes)
-        
-        # 2. Clear Existing
-        role.role_permissions.all().delete()
-        
-        # 3. Bulk Create
-        new_links = [RolePermission(role=role, permission=p) for p in perms]
-        RolePermission.objects.bulk_create(new_links)
-        
-        # Clear Cache for this Role
-        cache.delete(f"rbac_role_perms_{role.code}")
+        # Apply only the diff: one bulk insert, one delete, one audit event, one cache bump
+        from .services import sync_role_permissions
+        diff = sync_role_permissions(role, permission_codes, actor=request.user, request=request)
         
         return Response({
             "status": "success", 
             "role": role.code,
-            "permissions_set": len(new_links)
+            "permissions_set": diff["unchanged"] + len(diff["added"]),
+            "added": diff["added"],
+            "removed": diff["removed"],
+            "unknown": diff["unknown"],
         })
 
 @method_decorator(name='list', decorator=swagger_auto_schema(tags=["RBAC Core"]))
@@ -215,17 +210,20 @@ class RolePermissionView(generics.ListCreateAPIView):
 
         role = get_object_or_404(Role, id=role_id)
         
-        created_links = []
-        for pid in permission_ids:
-            permission = get_object_or_404(Permission, id=pid)
-            rp, created = RolePermission.objects.get_or_create(role=role, permission=permission)
-            created_links.append(rp)
+        codes = dict(Permission.objects.filter(id__in=permission_ids).values_list('id', 'code'))
+        missing = set(permission_ids) - set(codes)
+        if missing:
+            return Response(
+                {"detail": f"Permission(s) not found: {sorted(missing)}"},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        # Clear Cache for this Role
-        cache.delete(f"rbac_role_perms_{role.code}")
+        # Add-only diff: existing grants are kept, new ones are inserted in one statement
+        from .services import sync_role_permissions
+        sync_role_permissions(role, codes.values(), actor=request.user, request=request, remove_missing=False)
 
         return Response(
-            {"status": "success", "assigned_count": len(created_links)}, 
+            {"status": "success", "assigned_count": len(codes)}, 
             status=status.HTTP_201_CREATED
         )
 
@@ -240,8 +238,6 @@ class RolePermissionView(generics.ListCreateAPIView):
         serializer = RolePermissionSerializer(queryset, many=True)
         return Response(serializer.data)
 
-from .utils import get_user_permissions
-
 @method_decorator(name='get', decorator=swagger_auto_schema(tags=["RBAC Auth"]))
 class UserPermissionsView(views.APIView):
     """
@@ -289,6 +285,12 @@ class RBACTokenObtainPairView(TokenObtainPairView):
     """
     serializer_class = RBACTokenObtainPairSerializer
 
+class RBACTokenRefreshView(TokenRefreshView):
+    """
+    Token refresh that keeps the optional RBAC claims on the new access token.
+    """
+    serializer_class = RBACTokenRefreshSerializer
+
 class SwitchRoleView(views.APIView):
     """
     API Endpoint to switch active role without re-login.
@@ -330,12 +332,17 @@ class SwitchRoleView(views.APIView):
         if hasattr(user, 'last_active_role'):
             user.last_active_role = role_code
             user.save(update_fields=['last_active_role'])
+        # Browser sessions switch the role of the server-rendered pages too
+        session = getattr(request, 'session', None)
+        if session is not None and session.session_key:
+            set_session_active_role(request, role_code)
             
-        # 4. Generate New Token
-        refresh = RefreshToken.for_user(user)
+        # 4. Generate New Token (carries the role claims when RBAC_TOKEN_CLAIMS is on)
+        from .tokens import issue_tokens
+        refresh, access = issue_tokens(user, role_code)
         
         # 5. Merge Token into Context
-        auth_context['access'] = str(refresh.access_token)
+        auth_context['access'] = str(access)
         auth_context['refresh'] = str(refresh)
         
         return Response(auth_context)
@@ -379,16 +386,26 @@ class UserPermissionsView(views.APIView):
         }
     )
     def get(self, request):
-        from .services import build_auth_context
+        from django.utils.http import parse_etags
+        from .services import build_auth_context, auth_context_etag, get_auth_context_version
         
         user = request.user
         active_role_code = request.headers.get('X-Active-Role', None)
+
+        # Revalidation: the ETag is derived from the RBAC version counters (database rows
+        # shared by every worker), so an unchanged context is answered with 304 and no body.
+        version = get_auth_context_version(user, active_role_code)
+        etag = auth_context_etag(user, active_role_code, version)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache', 'Vary': 'Authorization, X-Active-Role'}
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
         
         # Use centralized service to build response
         # This ensures /me returns the EXACT same structure as /login
-        data = build_auth_context(user, active_role_code)
+        data = build_auth_context(user, active_role_code, version)
         
-        return Response(data)
+        return Response(data, headers=headers)
 
 class CheckPermissionsView(views.APIView):
     """
@@ -428,17 +445,13 @@ class CheckPermissionsView(views.APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        user = request.user
         active_role_code = request.headers.get('X-Active-Role', None)
         
-        # Optimization: Get all user permissions once
-        # get_user_permissions handles Superuser bypass and Caching internally.
-        user_perms = set(get_user_permissions(user, active_role_code))
+        # Optimization: Resolve the compiled permission bitmask once;
+        # every requested code is then a single bit test.
+        mask = get_request_permission_mask(request, active_role_code)
         
-        result = {
-            perm: perm in user_perms
-            for perm in requested_perms
-        }
+        result = bitsets.check_many(mask, requested_perms)
         
         return Response(result)
 
@@ -492,9 +505,7 @@ class RoleDeactivateView(views.APIView):
             role.deleted_by = request.user
             role.deletion_reason = data.get('reason') or ''
             role.save()
-
-            cache.delete(f"rbac_role_perms_{role.code}")
-            cache.delete(f"rbac_role_perms_{target_role.code}")
+            # Cached grants/assignments are invalidated by the Role and UserRole signals
 
         return Response({
             "status": "success",
@@ -627,6 +638,43 @@ class UserCreateView(views.APIView):
         return Response(result, status=status.HTTP_201_CREATED)
 
 
+class UserBulkCreateView(views.APIView):
+    permission_classes = [IsAuthenticated, HasRBACPermission]
+    required_permission = 'USER_MANAGEMENT_CREATE'
+
+    # Larger cohorts go through `manage.py bulk_provision_users`
+    MAX_ROWS = 5000
+
+    @swagger_auto_schema(
+        tags=["RBAC Management"],
+        operation_description="Create many Users with Role and Profile. Reports per-row errors.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['payloads'],
+            properties={
+                'payloads': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                'send_welcome_email': openapi.Schema(type=openapi.TYPE_BOOLEAN, default=False),
+            }
+        ),
+        responses={201: "At least one user created", 400: "No user created"}
+    )
+    def post(self, request):
+        from .services import bulk_provision_users
+
+        payloads = request.data.get('payloads')
+        if not isinstance(payloads, list) or not payloads:
+            return Response({"payloads": "A non-empty list is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(payloads) > self.MAX_ROWS:
+            return Response({"payloads": f"At most {self.MAX_ROWS} rows per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = bulk_provision_users(
+            request.user,
+            payloads,
+            send_welcome_email=bool(request.data.get('send_welcome_email', False)),
+        )
+        return Response(report, status=status.HTTP_201_CREATED if report["created"] else status.HTTP_400_BAD_REQUEST)
+
+
 from .services import build_onboard_request_token, onboard_request_expiry, build_onboard_registration_url
 import uuid
 
@@ -664,27 +712,26 @@ class OnboardRequestCreateView(views.APIView):
             nonce = uuid.uuid4().hex
             expires_at = onboard_request_expiry()
 
-            onboard_request = OnboardRequest.objects.create(
-                email=data["email"],
-                role=role,
-                status="INVITED",
-                initiated_by=request.user,
-                registration_nonce=nonce,
-                registration_token_sent_at=timezone.now(),
-                registration_expires_at=expires_at,
-            )
+            from accounts.utils import queue_email
+
+            with transaction.atomic():
+                onboard_request = OnboardRequest.objects.create(
+                    email=data["email"],
+                    role=role,
+                    status="INVITED",
+                    initiated_by=request.user,
+                    registration_nonce=nonce,
+                    registration_token_sent_at=timezone.now(),
+                    registration_expires_at=expires_at,
+                )
 
-            token = build_onboard_request_token(onboard_request)
-            registration_url = build_onboard_registration_url(request, token)
+                token = build_onboard_request_token(onboard_request)
+                registration_url = build_onboard_registration_url(request, token)
 
-            try:
-                from django.core.mail import send_mail
+                # Delivered by the run_outbox worker, never inline with the request
                 subject = "Complete your BelyvLMS Registration"
                 message = f"Registration Link: {registration_url}\nThis link expires at: {expires_at}"
-                send_mail(subject, message, None, [onboard_request.email], fail_silently=True)
-            except Exception as e:
-                # Log email error but don't fail request
-                print(f"Email sending failed: {e}")
+                queue_email(subject, message, [onboard_request.email], category="INVITE")
 
             resp = OnboardRequestSerializer(onboard_request).data
             resp["registration_url"] = registration_url
@@ -869,7 +916,7 @@ class OnboardRequestActionView(views.APIView):
         action_type = request.data.get("action")
         reason = request.data.get("reason", "")
         
-        from django.core.mail import send_mail
+        from accounts.utils import queue_email
         from .services import build_onboard_request_token, build_onboard_registration_url
         
         if action_type == "send_back":
@@ -885,10 +932,7 @@ class OnboardRequestActionView(views.APIView):
             
             subject = "Action Required: Please update your BelyvLMS registration"
             message = f"Admin has requested changes to your registration.\n\nReason: {reason}\n\nPlease update your details here: {url}"
-            try:
-                send_mail(subject, message, None, [onboard_request.email], fail_silently=True)
-            except:
-                pass
+            queue_email(subject, message, [onboard_request.email], category="INVITE")
                 
             return Response({"status": "success", "message": "Request sent back to user"})
 
@@ -906,10 +950,7 @@ class OnboardRequestActionView(views.APIView):
             # Send Email
             subject = "Registration Request Update"
             message = f"Your registration request for BelyvLMS has been closed/dropped.\n\nReason: {reason}"
-            try:
-                send_mail(subject, message, None, [onboard_request.email], fail_silently=True)
-            except:
-                pass
+            queue_email(subject, message, [onboard_request.email], category="ONBOARD_DROPPED")
                 
             return Response({"status": "success", "message": "Request dropped"})
 
@@ -0,0 +1,108 @@
+"""
+Compiled permission bitsets.
+
+Every Permission owns a stable bit position (its primary key, which never changes or
+gets reused), so a role's grants compile down to a single Python int. Checks and bulk
+checks become bitwise operations instead of list scans, and the cache stores one int
+per role instead of a few hundred permission codes.
+
+The code <-> bit catalogue is kept in-process and rebuilt when the catalogue version
+(an RBACVersion row bumped by the Permission signals) changes. Workers re-read that
+version every settings.RBAC_CATALOG_RECHECK_SECONDS, and at once when asked about a
+code or bit they do not know, so a new permission is usable right after it is created.
+"""
+import time
+
+from django.conf import settings
+
+from .models import Permission, RBACVersion
+
+# (version, {code: bit}, {bit: code}, monotonic time of the last version check) for the current process
+_catalog = (None, {}, {}, 0.0)
+
+
+def bump_catalog_version():
+    global _catalog
+    from .utils import _bump
+    _bump(RBACVersion.SCOPE_CATALOG)
+    # This process rereads on its next lookup; others within the recheck interval
+    _catalog = (None, {}, {}, 0.0)
+
+
+def get_catalog_version():
+    from .utils import _get_version
+    return _get_version(RBACVersion.SCOPE_CATALOG)
+
+
+def get_catalog(recheck=False):
+    """
+    Returns ({code: bit}, {bit: code}) for the current catalogue version.
+    recheck=True reads the version now instead of waiting for the recheck interval.
+    """
+    global _catalog
+
+    version, bits, codes, checked_at = _catalog
+    now = time.monotonic()
+    if recheck or version is None or now - checked_at >= getattr(settings, "RBAC_CATALOG_RECHECK_SECONDS", 5):
+        current = get_catalog_version()
+        if current != version:
+            rows = list(Permission.objects.values_list('id', 'code'))
+            bits, codes = {code: pk for pk, code in rows}, dict(rows)
+        _catalog = (current, bits, codes, now)
+    return bits, codes
+
+
+def _bits_for(codes):
+    bits, _ = get_catalog()
+    if any(code not in bits for code in codes):
+        bits, _ = get_catalog(recheck=True)
+    return bits
+
+
+def encode_ids(permission_ids):
+    mask = 0
+    for pk in permission_ids:
+        mask |= 1 << pk
+    return mask
+
+
+def encode_codes(codes):
+    codes = list(codes)
+    bits = _bits_for(codes)
+    return encode_ids(bits[code] for code in codes if code in bits)
+
+
+def decode(mask):
+    """Returns the permission codes set in mask, in bit (creation) order."""
+    if not mask:
+        return []
+    _, codes = get_catalog()
+    if mask.bit_length() > 1 + max(codes, default=-1):
+        _, codes = get_catalog(recheck=True)
+    result = []
+    bit = 0
+    while mask:
+        if mask & 1 and bit in codes:
+            result.append(codes[bit])
+        mask >>= 1
+        bit += 1
+    return result
+
+
+def mask_has(mask, code):
+    bit = _bits_for([code]).get(code)
+    return bit is not None and bool(mask >> bit & 1)
+
+
+def mask_has_any(mask, codes):
+    return bool(mask & encode_codes(codes))
+
+
+def check_many(mask, codes):
+    """Bulk check: returns {code: bool} for every requested code."""
+    codes = list(codes)
+    bits = _bits_for(codes)
+    return {
+        code: code in bits and bool(mask >> bits[code] & 1)
+        for code in codes
+    }
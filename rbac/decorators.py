@@ -2,12 +2,24 @@ from functools import wraps
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import redirect
 from django.contrib import messages
-from .models import UserRole, RolePermission
+from . import bitsets
+from .utils import get_session_permission_mask, resolve_session_role
+
+def get_template_active_role(request):
+    """
+    Active role for server-rendered views: the role stored in the session
+    (ACTIVE_ROLE_SESSION_KEY), falling back to the user's last_active_role and
+    then to their first assigned role. Returns the role code or None.
+    """
+    role = resolve_session_role(request)
+    return role[1] if role else None
 
 def rbac_required(permission_code):
     """
     Decorator for Function-Based Views (Django Templates).
     Checks if the user has the required RBAC permission.
+    The user's roles are read with their permission versions in one query, shared
+    with get_template_active_role; the active role's mask then comes from the cache.
     """
     def decorator(view_func):
         @wraps(view_func)
@@ -21,20 +33,8 @@ def rbac_required(permission_code):
             # if request.user.is_superuser:
             #     return view_func(request, *args, **kwargs)
 
-            # Check Permission
-            has_permission = False
-            try:
-                # 1. Get User's Role
-                user_role = UserRole.objects.select_related('role').get(user=request.user)
-                
-                # 2. Check if Role has the specific Permission
-                has_permission = RolePermission.objects.filter(
-                    role=user_role.role, 
-                    permission__code=permission_code
-                ).exists()
-
-            except UserRole.DoesNotExist:
-                has_permission = False
+            # Check Permission against the user's active role (session -> last_active_role -> first role)
+            has_permission = bitsets.mask_has(get_session_permission_mask(request), permission_code)
 
             if not has_permission:
                 # Option A: Raise 403 (Best for APIs)
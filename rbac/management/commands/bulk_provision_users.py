@@ -0,0 +1,66 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import CustomUser
+from rbac.services import bulk_provision_users, BULK_PROVISION_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Provisions users in bulk from a JSON array or NDJSON file of UserCreateSerializer '
+        'payloads (same shape as POST /api/rbac/users/create/).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON array or NDJSON (one payload per line) file')
+        parser.add_argument('--initiator', required=True, help='Email of the user recorded as the initiator')
+        parser.add_argument('--chunk-size', type=int, default=BULK_PROVISION_CHUNK_SIZE)
+        parser.add_argument('--send-welcome-email', action='store_true')
+        parser.add_argument('--report', help='Write the full JSON report (results and row errors) to this path')
+
+    def handle(self, *args, **options):
+        try:
+            initiator = CustomUser.objects.get(email=options['initiator'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"Initiator {options['initiator']} does not exist.")
+
+        payloads = self._load(options['path'])
+        self.stdout.write(f"Provisioning {len(payloads)} users...")
+
+        started = time.perf_counter()
+        report = bulk_provision_users(
+            initiator,
+            payloads,
+            send_welcome_email=options['send_welcome_email'],
+            chunk_size=options['chunk_size'],
+        )
+        elapsed = time.perf_counter() - started
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']} ({error['email']}): {json.dumps(error['errors'], default=str)}"))
+        if report['failed'] > 20:
+            self.stdout.write(self.style.WARNING(f"... {report['failed'] - 20} more row errors"))
+
+        if options['report']:
+            with open(options['report'], 'w') as fh:
+                json.dump(report, fh, indent=2, default=str)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} of {report['total']} users in {elapsed:.1f}s ({report['failed']} failed)."
+        ))
+
+    def _load(self, path):
+        try:
+            with open(path) as fh:
+                content = fh.read()
+        except OSError as e:
+            raise CommandError(str(e))
+
+        try:
+            if content.lstrip().startswith('['):
+                return json.loads(content)
+            return [json.loads(line) for line in content.splitlines() if line.strip()]
+        except ValueError as e:
+            raise CommandError(f"Invalid JSON: {e}")
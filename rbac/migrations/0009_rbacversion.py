@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rbac', '0008_alter_permission_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RBACVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('role', 'Role permissions'), ('user', 'User role assignments'), ('catalog', 'Permission catalogue')], max_length=10)),
+                ('object_id', models.PositiveIntegerField(default=0, help_text='Role or user id (0 for the catalogue)')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('scope', 'object_id')},
+            },
+        ),
+    ]
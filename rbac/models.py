@@ -98,6 +98,33 @@ class UserRole(models.Model):
         return f"{self.user} - {self.role.name}"
 
 
+class RBACVersion(models.Model):
+    """
+    Version counter behind the RBAC caches and token claims (see rbac/utils.py).
+    Kept in the database so every worker sees the same version; bumped in the
+    same transaction as the grant, assignment or catalogue change it tracks.
+    A missing row reads as version 0.
+    """
+    SCOPE_ROLE = 'role'
+    SCOPE_USER = 'user'
+    SCOPE_CATALOG = 'catalog'
+    SCOPE_CHOICES = [
+        (SCOPE_ROLE, 'Role permissions'),
+        (SCOPE_USER, 'User role assignments'),
+        (SCOPE_CATALOG, 'Permission catalogue'),
+    ]
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    object_id = models.PositiveIntegerField(default=0, help_text="Role or user id (0 for the catalogue)")
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('scope', 'object_id')
+
+    def __str__(self):
+        return f"{self.scope}:{self.object_id} v{self.version}"
+
+
 class OnboardRequest(models.Model):
     STATUS_CHOICES = [
         ('INVITED', 'Invited'),
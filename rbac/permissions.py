@@ -1,5 +1,6 @@
 from rest_framework import permissions
-from .utils import has_permission
+from .utils import get_request_permission_mask
+from . import bitsets
 
 class HasRBACPermission(permissions.BasePermission):
     """
@@ -37,12 +38,13 @@ class HasRBACPermission(permissions.BasePermission):
         # 3. Check against RBAC engine
         # Extract active role from request header if present
         active_role = request.headers.get('X-Active-Role', None)
-        
+
+        # Resolved once per request and memoized, so list checks and any later
+        # lookups in the view don't hit the resolver again.
+        mask = get_request_permission_mask(request, active_role_code=active_role)
+
         # Support for multiple allowed permissions (OR logic)
         if isinstance(required_perm, (list, tuple)):
-            for perm in required_perm:
-                if has_permission(request.user, perm, active_role_code=active_role):
-                    return True
-            return False
+            return bitsets.mask_has_any(mask, required_perm)
 
-        return has_permission(request.user, required_perm, active_role_code=active_role)
+        return bitsets.mask_has(mask, required_perm)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from .models import Role, Permission, RolePermission, UserRole, OnboardRequest
 from accounts.models import CustomUser
 from django.utils import timezone
@@ -39,9 +40,35 @@ class RBACTokenObtainPairSerializer(TokenObtainPairSerializer):
         
         # Add specific login flags
         data['must_change_password'] = getattr(user, 'must_change_password', False)
+
+        # Optional: stamp the resolved active role + RBAC versions onto the access token
+        from .tokens import token_claims_enabled, issue_tokens
+        if token_claims_enabled():
+            active_role = auth_context.get('active_role') or {}
+            refresh, access = issue_tokens(user, active_role.get('code'))
+            data['refresh'] = str(refresh)
+            data['access'] = str(access)
         
         return data
 
+class RBACTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that re-mints the RBAC claims (see rbac/tokens.py) for the user's
+    last active role, so clients recover from a stale-claims 401 with a plain refresh.
+    """
+    def validate(self, attrs):
+        data = super().validate(attrs)
+
+        from .tokens import token_claims_enabled, add_role_claims
+        if token_claims_enabled():
+            from rest_framework_simplejwt.tokens import AccessToken
+            access = AccessToken(data['access'])
+            user = CustomUser.objects.filter(**{jwt_settings.USER_ID_FIELD: access[jwt_settings.USER_ID_CLAIM]}).first()
+            if user:
+                data['access'] = str(add_role_claims(access, user))
+
+        return data
+
 class RolePermissionSerializer(serializers.ModelSerializer):
     role_name = serializers.ReadOnlyField(source='role.name')
     permission_code = serializers.ReadOnlyField(source='permission.code')
@@ -84,10 +111,12 @@ class UserCreateSerializer(serializers.Serializer):
             raise serializers.ValidationError("Email already exists")
         return value
 
+    def get_role(self, code):
+        return Role.objects.filter(code=code).first()
+
     def validate_role_code(self, value):
-        try:
-            role = Role.objects.get(code=value)
-        except Role.DoesNotExist:
+        role = self.get_role(value)
+        if role is None:
             raise serializers.ValidationError("Invalid role code")
         if hasattr(role, "is_active") and not role.is_active:
             raise serializers.ValidationError("Role is inactive")
@@ -96,9 +125,8 @@ class UserCreateSerializer(serializers.Serializer):
     def validate(self, attrs):
         role_code = attrs.get('role_code')
         profile = attrs.get('profile') or {}
-        try:
-            role = Role.objects.get(code=role_code)
-        except Role.DoesNotExist:
+        role = self.get_role(role_code)
+        if role is None:
             raise serializers.ValidationError({"role_code": "Invalid role code"})
         role_name = role.name
         if role_name == 'Student':
@@ -110,6 +138,22 @@ class UserCreateSerializer(serializers.Serializer):
         return attrs
 
 
+class BulkUserCreateSerializer(UserCreateSerializer):
+    """
+    UserCreateSerializer for bulk provisioning. Role and email checks run against
+    lookups resolved once per upload (context["roles"], context["taken_emails"])
+    instead of querying for every row.
+    """
+
+    def validate_email(self, value):
+        if value.lower() in self.context["taken_emails"]:
+            raise serializers.ValidationError("Email already exists")
+        return value
+
+    def get_role(self, code):
+        return self.context["roles"].get(code)
+
+
 class OnboardRequestCreateSerializer(serializers.Serializer):
     email = serializers.EmailField()
     role_code = serializers.CharField(max_length=50)
@@ -1,4 +1,7 @@
 from django.db import transaction
+from django.conf import settings
+import threading
+from contextvars import ContextVar
 from .models import Role, RoleSequence, UserRole
 from django.core.exceptions import ValidationError
 from django.core import signing
@@ -8,8 +11,15 @@ from urllib.parse import quote
 from .serializers import UserRoleSerializer, RoleSerializer
 # from accounts.serializers import UserSerializer  <-- This import was failing
 # Use CustomUserSerializer or define a minimal one locally to avoid circular deps
-from .utils import get_user_permissions
+from .utils import (
+    get_user_permissions,
+    get_versions,
+    RBAC_CACHE_TTL,
+)
+from .models import RBACVersion
 from django.core.cache import cache
+import hashlib
+import json
 
 def serialize_user_minimal(user):
     return {
@@ -20,33 +30,89 @@ def serialize_user_minimal(user):
         'is_staff': user.is_staff
     }
 
-def build_auth_context(user, active_role_code=None):
+def _clean_role_code(active_role_code):
+    if active_role_code in ['undefined', 'null', '']:
+        return None
+    return active_role_code
+
+
+def get_auth_context_version(user, active_role_code=None):
+    """
+    Version tuple identifying the role-dependent part of the auth context:
+    (user, role-assignment version, resolved role, role permission version, catalogue version).
+    Grant, assignment, role status and catalogue changes bump one of these (see rbac/signals.py).
+    The versions are RBACVersion rows, so every worker computes the same tuple; it costs
+    two queries (the user's roles with their versions, then the user and catalogue versions).
+    """
+    from .utils import _get_user_role_rows, _pick_active_role
+
+    role = _pick_active_role(_get_user_role_rows(user), user, _clean_role_code(active_role_code))
+    user_key = (RBACVersion.SCOPE_USER, user.pk)
+    catalog_key = (RBACVersion.SCOPE_CATALOG, 0)
+    versions = get_versions(user_key, catalog_key)
+    return (
+        user.pk,
+        versions[user_key],
+        role[0] if role else None,
+        role[2] if role else 0,
+        versions[catalog_key],
+    )
+
+
+def auth_context_etag(user, active_role_code=None, version=None):
+    """
+    Strong ETag for the /me response, derived from the context versions and the
+    user's own fields. Pass version (get_auth_context_version) to skip recomputing it.
+    """
+    if version is None:
+        version = get_auth_context_version(user, active_role_code)
+    raw = json.dumps(
+        [version, serialize_user_minimal(user)],
+        sort_keys=True,
+        default=str,
+    )
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def build_auth_context(user, active_role_code=None, version=None):
     """
     Builds a consistent auth response for Login, Get-Me, and Switch-Role.
+    The role-dependent part is cached per (user, active role, permission version).
     
     Args:
         user (CustomUser): The authenticated user.
         active_role_code (str, optional): The requested role code (e.g., 'TRN'). 
                                           If None or 'undefined', logic attempts to fallback.
+        version (tuple, optional): get_auth_context_version() already computed by the caller.
 
     Returns:
         dict: Standardized auth context containing user info, active role, available roles, and permissions.
     """
     
     # 1. Sanitize Input
-    if active_role_code in ['undefined', 'null', '']:
-        active_role_code = None
+    active_role_code = _clean_role_code(active_role_code)
+
+    if version is None:
+        version = get_auth_context_version(user, active_role_code)
+    cache_key = "rbac_auth_ctx_" + "_".join(str(v) for v in version)
+    role_context = cache.get(cache_key)
+    if role_context is None:
+        role_context = _build_role_context(user, active_role_code)
+        cache.set(cache_key, role_context, RBAC_CACHE_TTL)
+
+    return {
+        "user": serialize_user_minimal(user),
+        **role_context,
+    }
 
+
+def _build_role_context(user, active_role_code=None):
     # 2. Fetch User's Available Roles
     available_roles_data = []
-    
-    # Helper to resolve role object based on code
-    def get_role_by_code(code):
-        return None
 
     # Unified Logic: All users (including Superusers) only see roles explicitly assigned to them.
     # We fetch only the roles assigned in the UserRole table.
-    user_roles_qs = UserRole.objects.select_related('role').filter(user=user)
+    user_roles_qs = UserRole.objects.select_related('role').filter(user=user).order_by('id')
     user_roles = list(user_roles_qs) # Evaluate once to save DB calls
 
     for ur in user_roles:
@@ -102,22 +168,132 @@ def build_auth_context(user, active_role_code=None):
     permissions = get_user_permissions(user, target_role_code)
 
     return {
-        "user": serialize_user_minimal(user),
         "active_role": active_role_data,
         "available_roles": available_roles_data,
         "permissions": permissions
     }
 
+def sync_role_permissions(role, permission_codes, actor=None, request=None, remove_missing=True):
+    """
+    Applies the diff between a role's current grants and the desired permission codes.
+
+    Writes at most one bulk INSERT and one DELETE, emits a single aggregated audit
+    event and bumps the role's permission version once (per-row RolePermission
+    signals are bypassed on purpose).
+
+    Args:
+        role (Role): Role to update.
+        permission_codes (iterable): Desired permission codes. Unknown codes are ignored.
+        actor (CustomUser, optional): User performing the change (for the audit trail).
+        request (HttpRequest, optional): Request metadata for the audit trail.
+        remove_missing (bool): If False, only adds grants (assign mode).
+
+    Returns:
+        dict: added / removed codes, unchanged count and unknown codes.
+    """
+    from audit.utils import log_event
+    from .models import Permission, RolePermission
+    from .utils import bump_role_version
+
+    requested = set(permission_codes)
+
+    with transaction.atomic():
+        current = dict(
+            RolePermission.objects.filter(role=role).values_list('permission__code', 'permission_id')
+        )
+        known = dict(Permission.objects.filter(code__in=requested).values_list('code', 'id'))
+
+        to_add = sorted(set(known) - set(current))
+        to_remove = sorted(set(current) - requested) if remove_missing else []
+
+        if to_add:
+            RolePermission.objects.bulk_create(
+                [RolePermission(role=role, permission_id=known[code]) for code in to_add],
+                ignore_conflicts=True,
+            )
+        if to_remove:
+            # One plain DELETE: no rows are loaded and the per-row post_delete
+            # receivers (audit + cache) do not fire; both are handled below.
+            _delete_role_permissions(role.id, [current[c] for c in to_remove])
+
+        if to_add or to_remove:
+            bump_role_version(role.id)
+            actor_role = request.headers.get('X-Active-Role') if request is not None else None
+            log_event(
+                getattr(actor, 'id', None),
+                actor_role,
+                "PERMISSION_SYNC",
+                "Role",
+                role.id,
+                {"role": role.code, "revoked": to_remove},
+                {"role": role.code, "granted": to_add},
+                "API",
+                request,
+            )
+
+    return {
+        "added": to_add,
+        "removed": to_remove,
+        "unchanged": len(set(current) & requested),
+        "unknown": sorted(requested - set(known)),
+    }
+
+
+def _delete_role_permissions(role_id, permission_ids):
+    from django.db import connections, router
+    from .models import RolePermission
+
+    connection = connections[router.db_for_write(RolePermission)]
+    qn = connection.ops.quote_name
+    meta = RolePermission._meta
+    placeholders = ", ".join(["%s"] * len(permission_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {qn(meta.db_table)} "
+            f"WHERE {qn(meta.get_field('role').column)} = %s "
+            f"AND {qn(meta.get_field('permission').column)} IN ({placeholders})",
+            [role_id, *permission_ids],
+        )
+
+
 class IDGeneratorService:
     """
     Service to generate role-based IDs atomically.
     Usage:
         new_id = IDGeneratorService.generate_next_id('Student', user_obj)
         # Returns 'BTR0801'
+
+        new_ids = IDGeneratorService.generate_next_ids('Student', 500)
+        # Returns ['BTR0802', ..., 'BTR1301'] with a single locked update (importers)
+
+    Block (hi/lo) mode: with settings.RBAC_ID_BLOCK_SIZE > 1, generate_next_id reserves
+    a range of N numbers in one locked update and hands them out from process memory.
+    IDs stay unique but are no longer gap-free or strictly ordered across workers;
+    numbers left in a block when the process exits are simply skipped.
     """
-    
+
+    _lock = threading.Lock()
+    # role_name -> [prefix, next_number, last_number] reserved by committed transactions
+    _blocks = {}
+
+    @staticmethod
+    def format_id(prefix, number):
+        # Format: PREFIX + 4-digit Number (e.g., BTR0001)
+        # Note: Enterprise systems often use 0-padding
+        return f"{prefix}{number:04d}"
+
     @staticmethod
-    def generate_next_id(role_name, triggered_by_user=None):
+    def _reserve(role_name, count, triggered_by_user=None):
+        """
+        Reserves `count` consecutive numbers with one locked update.
+        Returns (prefix, first_number, last_number).
+        """
+        prefix, first, sequence = IDGeneratorService._reserve_on_sequence(role_name, count, triggered_by_user)
+        return prefix, first, sequence.current_sequence
+
+    @staticmethod
+    def _reserve_on_sequence(role_name, count, triggered_by_user=None):
+        """_reserve, returning (prefix, first_number, saved RoleSequence row)."""
         try:
             with transaction.atomic():
                 # 1. Lock the sequence row
@@ -125,8 +301,9 @@ class IDGeneratorService:
                 # Ensure sequence exists (it should, thanks to our seed script)
                 sequence, _ = RoleSequence.objects.select_for_update().get_or_create(role=role)
                 
-                # 2. Increment
-                sequence.current_sequence += 1
+                # 2. Increment by the whole range
+                first = sequence.current_sequence + 1
+                sequence.current_sequence += count
                 
                 # 3. Audit
                 if triggered_by_user and triggered_by_user.is_authenticated:
@@ -134,21 +311,112 @@ class IDGeneratorService:
                 
                 sequence.save()
                 
-                # 4. Format ID
-                # Use override if present, else use role code
+                # 4. Use override if present, else use role code
                 prefix = sequence.prefix_override if sequence.prefix_override else role.code
-                
-                # Format: PREFIX + 4-digit Number (e.g., BTR0001)
-                # Note: Enterprise systems often use 0-padding
-                formatted_id = f"{prefix}{sequence.current_sequence:04d}"
-                
-                return formatted_id
+                return prefix, first, sequence
                 
         except Role.DoesNotExist:
             raise ValidationError(f"Role '{role_name}' does not exist.")
         except Exception as e:
             raise ValidationError(f"ID Generation failed: {str(e)}")
 
+    @classmethod
+    def generate_next_ids(cls, role_name, count, triggered_by_user=None):
+        """Bulk API for importers: reserves `count` IDs in one locked update."""
+        if count < 1:
+            return []
+        prefix, first, last = cls._reserve(role_name, count, triggered_by_user)
+        return [cls.format_id(prefix, number) for number in range(first, last + 1)]
+
+    @classmethod
+    def generate_next_id(cls, role_name, triggered_by_user=None):
+        block_size = getattr(settings, 'RBAC_ID_BLOCK_SIZE', 1)
+        if block_size <= 1:
+            return cls.generate_next_ids(role_name, 1, triggered_by_user)[0]
+        return cls._next_from_block(role_name, block_size, triggered_by_user)
+
+    @classmethod
+    def _take(cls, block):
+        number = block[1]
+        block[1] += 1
+        return cls.format_id(block[0], number)
+
+    @classmethod
+    def _next_from_block(cls, role_name, block_size, triggered_by_user=None):
+        # 1. Committed block held by this process
+        with cls._lock:
+            block = cls._blocks.get(role_name)
+            if block and block[1] <= block[2]:
+                return cls._take(block)
+
+        # 2. Block reserved earlier in the still-open transaction. Its reservation is
+        #    only durable once that transaction commits, when its on_commit callable
+        #    promotes it; until then it is reused only while that callable is still
+        #    queued (a rolled-back savepoint drops it together with the row change).
+        pending_blocks = _pending_id_blocks.get()
+        pending = pending_blocks.get(role_name) if pending_blocks else None
+        if pending:
+            if pending.block[1] <= pending.block[2] and pending.is_live():
+                return cls._take(pending.block)
+            del pending_blocks[role_name]
+
+        # 3. Reserve a new block; outside a transaction on_commit promotes it at once
+        prefix, first, sequence = cls._reserve_on_sequence(role_name, block_size, triggered_by_user)
+        pending = _PendingIDBlock(role_name, [prefix, first, sequence.current_sequence])
+        new_id = cls._take(pending.block)
+        if pending_blocks is None:
+            pending_blocks = {}
+            _pending_id_blocks.set(pending_blocks)
+        pending_blocks[role_name] = pending
+        transaction.on_commit(pending)
+        return new_id
+
+    @classmethod
+    def _store_block(cls, role_name, block):
+        if block[1] > block[2]:
+            return
+        with cls._lock:
+            current = cls._blocks.get(role_name)
+            if not current or current[1] > current[2]:
+                cls._blocks[role_name] = block
+            # Otherwise the leftover numbers are skipped
+
+    @classmethod
+    def clear_blocks(cls):
+        """Drops every in-memory block (their remaining numbers are skipped)."""
+        with cls._lock:
+            cls._blocks.clear()
+        _pending_id_blocks.set(None)
+
+
+# role_name -> _PendingIDBlock reserved by a transaction that has not committed yet
+_pending_id_blocks = ContextVar("rbac_pending_id_blocks", default=None)
+
+
+class _PendingIDBlock:
+    """
+    on_commit callable holding a block reserved inside an open transaction.
+    Running it (on commit) hands the block's remaining numbers to the process;
+    a rollback drops it together with the reservation.
+    """
+    __slots__ = ("role_name", "block")
+
+    def __init__(self, role_name, block):
+        self.role_name = role_name
+        self.block = block
+
+    def is_live(self):
+        # Rolling back a savepoint or the transaction discards the on_commit callables
+        # registered in it, so a reservation is intact exactly while this one is queued
+        connection = transaction.get_connection()
+        return connection.in_atomic_block and any(hook[1] is self for hook in connection.run_on_commit)
+
+    def __call__(self):
+        pending_blocks = _pending_id_blocks.get()
+        if pending_blocks and pending_blocks.get(self.role_name) is self:
+            del pending_blocks[self.role_name]
+        IDGeneratorService._store_block(self.role_name, self.block)
+
 
 def build_onboard_request_token(onboard_request):
     return signing.dumps(
@@ -334,6 +602,52 @@ def merge_onboard_payload(role_code, email, user_payload, admin_payload):
     }
 
 
+def _pop_student_profile(profile_data):
+    """
+    Splits a Student profile payload into Student field values and the related
+    records (fees, professional profile, batch). Whatever remains in profile_data
+    is stored as Student.extra_data.
+    """
+    related = {
+        "fees_total": profile_data.pop("fees_total", None),
+        "fees_paid": profile_data.pop("fees_paid", None),
+        "payment_schedule": profile_data.pop("payment_schedule", []),
+        # Extract Professional Profile Data
+        "professional_profile": profile_data.pop("professional_profile", {}),
+        "batch_id": _sanitize_val(profile_data.pop("batch_id", None)),
+    }
+
+    location = profile_data.pop("location", None)
+    # Location Split
+    country = profile_data.pop("country", "India")
+    state = profile_data.pop("state", None)
+    city = profile_data.pop("city", None)
+    # Auto-construct location string if missing
+    if not location and city and state:
+        location = f"{city}, {state}, {country}"
+
+    fields = {
+        "phone": profile_data.pop("phone", None),
+        "alternative_phone": profile_data.pop("alternative_phone", None),
+        "country_code": profile_data.pop("country_code", "+91"),
+        # alternative_country_code logic if needed, defaulting to +91
+        "alternative_country_code": profile_data.pop("alternative_country_code", "+91"),
+        "location": location,
+        "country": country,
+        "state": state,
+        "city": city,
+        "mode_of_class": profile_data.pop("mode_of_class", "ON"),
+        "week_type": profile_data.pop("week_type", "WD"),
+        "course_id": _sanitize_int(profile_data.pop("course_id", None)),
+        "trainer_id": _sanitize_int(profile_data.pop("trainer_id", None)),
+        "course_status": profile_data.pop("course_status", "YTS"),
+        "pl_required": profile_data.pop("pl_required", False),
+        "consultant_id": _sanitize_int(profile_data.pop("consultant", None)),
+        "source_of_joining_id": _sanitize_int(profile_data.pop("source_of_joining", None)),
+    }
+    return fields, related
+
+
 def provision_user_from_payload(initiator_user, payload, send_welcome_email=True):
     from rest_framework.exceptions import ValidationError as DRFValidationError
     from accounts.models import CustomUser
@@ -341,7 +655,7 @@ def provision_user_from_payload(initiator_user, payload, send_welcome_email=True
     from trainersdb.models import Trainer
     from paymentdb.models import Payment
     from batchdb.models import Batch, BatchStudent, BatchTransaction
-    from django.core.mail import send_mail
+    from accounts.utils import queue_email
     from profiles.models import RoleProfileConfig, GenericProfile
     from .models import UserRole
     from .serializers import UserCreateSerializer
@@ -368,56 +682,20 @@ def provision_user_from_payload(initiator_user, payload, send_welcome_email=True
         generated_password = None
 
         if role.name == "Student":
-            fees_total = profile_data.pop("fees_total", None)
-            fees_paid = profile_data.pop("fees_paid", None)
-            payment_schedule = profile_data.pop("payment_schedule", [])
-
-            phone = profile_data.pop("phone", None)
-            alternative_phone = profile_data.pop("alternative_phone", None)
-            country_code = profile_data.pop("country_code", "+91")
-            # alternative_country_code logic if needed, defaulting to +91
-            alternative_country_code = profile_data.pop("alternative_country_code", "+91")
-            location = profile_data.pop("location", None)
-            
-            # Location Split
-            country = profile_data.pop("country", "India")
-            state = profile_data.pop("state", None)
-            city = profile_data.pop("city", None)
-            
-            # Auto-construct location string if missing
-            if not location and city and state:
-                location = f"{city}, {state}, {country}"
-            
-            # Extract Professional Profile Data
-            professional_profile_data = profile_data.pop("professional_profile", {})
-
-            pl_required = profile_data.pop("pl_required", False)
-            consultant_id = _sanitize_int(profile_data.pop("consultant", None))
-            soj_id = _sanitize_int(profile_data.pop("source_of_joining", None))
-            batch_id = _sanitize_val(profile_data.pop("batch_id", None))
+            student_fields, related = _pop_student_profile(profile_data)
+            fees_total = related["fees_total"]
+            fees_paid = related["fees_paid"]
+            payment_schedule = related["payment_schedule"]
+            professional_profile_data = related["professional_profile"]
+            batch_id = related["batch_id"]
 
             student = Student.objects.create(
                 user=user,
                 first_name=data["first_name"],
                 last_name=data.get("last_name") or "",
                 email=data["email"],
-                phone=phone,
-                alternative_phone=alternative_phone,
-                country_code=country_code,
-                alternative_country_code=alternative_country_code,
-                location=location,
-                country=country,
-                state=state,
-                city=city,
-                mode_of_class=profile_data.pop("mode_of_class", "ON"),
-                week_type=profile_data.pop("week_type", "WD"),
-                course_id=_sanitize_int(profile_data.pop("course_id", None)),
-                trainer_id=_sanitize_int(profile_data.pop("trainer_id", None)),
-                course_status=profile_data.pop("course_status", "YTS"),
-                pl_required=pl_required,
-                consultant_id=consultant_id,
-                source_of_joining_id=soj_id,
                 extra_data=profile_data,
+                **student_fields,
             )
             
             # Create StudentProfessionalProfile if data exists
@@ -504,16 +782,339 @@ def provision_user_from_payload(initiator_user, payload, send_welcome_email=True
         user.set_password(generated_password)
         user.save()
 
-    if send_welcome_email:
-        try:
-            subject = "Your BelyvLMS Account"
-            message = f"Login Email: {user.email}\nPassword: {generated_password}"
-            send_mail(subject, message, None, [user.email], fail_silently=True)
-        except Exception:
-            pass
+        if send_welcome_email:
+            # Delivered by the run_outbox worker once this transaction commits
+            queue_email(*_welcome_email(user.email, generated_password), category="WELCOME")
 
     return {
         "status": "success",
         "user": {"id": user.id, "email": user.email, "name": user.name},
         "primary_role": {"code": role.code, "name": role.name},
     }, user
+
+
+BULK_PROVISION_CHUNK_SIZE = 500
+
+
+def bulk_provision_users(initiator_user, payloads, send_welcome_email=False,
+                         chunk_size=BULK_PROVISION_CHUNK_SIZE, hash_workers=None):
+    """
+    Bulk variant of provision_user_from_payload for cohort onboarding.
+
+    - Rows are validated against lookups resolved once per upload (roles, taken
+      emails, courses, consultants, sources of joining, trainers, batches);
+      unknown references are reported as row errors.
+    - Students are written per chunk: one locked update reserves the chunk's
+      student IDs and every table is filled with bulk_create.
+    - A chunk that fails to insert is replayed row by row through
+      provision_user_from_payload, so one bad row never sinks its neighbours.
+    - Other roles go through provision_user_from_payload directly.
+
+    bulk_create skips model save() and signals, so the audit trail the signals
+    would have written (user CREATE, ROLE_ASSIGN, STUDENT_ADDED) is written here.
+    Welcome mails are queued in the outbox with their chunk.
+
+    Returns {"total", "created", "failed", "results": [...], "errors": [...]}.
+    """
+    import os
+    from accounts.models import CustomUser
+    from .serializers import BulkUserCreateSerializer
+
+    roles = {role.code: role for role in Role.objects.all()}
+    emails = [str(p.get("email") or "") for p in payloads if isinstance(p, dict)]
+    taken_emails = {
+        email.lower()
+        for email in CustomUser.objects.filter(email__in=emails).values_list("email", flat=True)
+    }
+    context = {"roles": roles, "taken_emails": taken_emails}
+
+    results, errors, students, others = [], [], [], []
+    for index, payload in enumerate(payloads):
+        serializer = BulkUserCreateSerializer(data=payload, context=context)
+        if not serializer.is_valid():
+            errors.append(_bulk_row_error(index, payload, serializer.errors))
+            continue
+        data = serializer.validated_data
+        # Later duplicates of an email in the same upload fail like existing ones
+        taken_emails.add(data["email"].lower())
+
+        role = roles[data["role_code"]]
+        if role.name != "Student":
+            others.append((index, payload))
+            continue
+
+        profile_data = dict(data.get("profile") or {})
+        student_fields, related = _pop_student_profile(profile_data)
+        students.append({
+            "row": index,
+            "payload": payload,
+            "data": data,
+            "role": role,
+            "fields": student_fields,
+            "related": related,
+            "extra_data": profile_data,
+        })
+
+    students = _check_student_references(students, errors)
+
+    hash_workers = hash_workers or min(8, os.cpu_count() or 1)
+    for start in range(0, len(students), chunk_size):
+        chunk = students[start:start + chunk_size]
+        try:
+            created = _bulk_insert_students(initiator_user, chunk, hash_workers, send_welcome_email)
+        except Exception:
+            # Replay the chunk one row at a time to pin down the failing rows
+            for row in chunk:
+                _provision_row(initiator_user, row["row"], row["payload"], send_welcome_email, results, errors)
+            continue
+        results.extend(created)
+
+    for index, payload in others:
+        _provision_row(initiator_user, index, payload, send_welcome_email, results, errors)
+
+    results.sort(key=lambda r: r["row"])
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "total": len(payloads),
+        "created": len(results),
+        "failed": len(errors),
+        "results": results,
+        "errors": errors,
+    }
+
+
+def _bulk_row_error(index, payload, detail):
+    email = payload.get("email") if isinstance(payload, dict) else None
+    return {"row": index, "email": email, "errors": detail}
+
+
+def _provision_row(initiator_user, index, payload, send_welcome_email, results, errors):
+    from rest_framework.exceptions import ValidationError as DRFValidationError
+
+    try:
+        _result, user = provision_user_from_payload(initiator_user, payload, send_welcome_email=send_welcome_email)
+    except DRFValidationError as e:
+        errors.append(_bulk_row_error(index, payload, e.detail))
+        return
+    except Exception as e:
+        errors.append(_bulk_row_error(index, payload, {"detail": str(e)}))
+        return
+
+    student = getattr(user, "student_profile", None)
+    results.append({
+        "row": index,
+        "id": user.id,
+        "email": user.email,
+        "student_id": student.student_id if student else None,
+    })
+
+
+def _check_student_references(rows, errors):
+    """
+    Resolves every course / consultant / source / trainer / batch referenced by
+    the rows with one query per table. Rows with unknown references are moved
+    to errors; the rest get row["batch_pk"] set.
+    """
+    from coursedb.models import Course
+    from consultantdb.models import Consultant
+    from settingsdb.models import SourceOfJoining
+    from trainersdb.models import Trainer
+    from batchdb.models import Batch
+
+    def ids(field):
+        return {row["fields"][field] for row in rows if row["fields"][field] is not None}
+
+    known = {
+        "course_id": set(Course.objects.filter(id__in=ids("course_id")).values_list("id", flat=True)),
+        "consultant_id": set(Consultant.objects.filter(id__in=ids("consultant_id")).values_list("id", flat=True)),
+        "source_of_joining_id": set(
+            SourceOfJoining.objects.filter(id__in=ids("source_of_joining_id")).values_list("id", flat=True)
+        ),
+        "trainer_id": set(Trainer.objects.filter(id__in=ids("trainer_id")).values_list("id", flat=True)),
+    }
+    batch_codes = {str(row["related"]["batch_id"]) for row in rows if row["related"]["batch_id"]}
+    batches = dict(Batch.objects.filter(batch_id__in=batch_codes).values_list("batch_id", "id"))
+
+    valid = []
+    for row in rows:
+        row_errors = {}
+        for field, existing in known.items():
+            value = row["fields"][field]
+            if value is not None and value not in existing:
+                row_errors[field] = f"Unknown id {value}"
+        batch_code = row["related"]["batch_id"]
+        if batch_code and str(batch_code) not in batches:
+            row_errors["batch_id"] = f"Unknown batch {batch_code}"
+
+        if row_errors:
+            errors.append(_bulk_row_error(row["row"], row["payload"], {"profile": row_errors}))
+            continue
+        row["batch_pk"] = batches.get(str(batch_code)) if batch_code else None
+        valid.append(row)
+    return valid
+
+
+def _bulk_insert_students(initiator_user, rows, hash_workers, send_welcome_email=False):
+    """
+    Inserts one chunk of pre-validated Student rows in a single transaction
+    and returns the per-row results.
+    """
+    import uuid
+    from concurrent.futures import ThreadPoolExecutor
+    from decimal import Decimal
+    from django.contrib.auth.hashers import make_password
+    from accounts.models import CustomUser
+    from studentsdb.models import Student, StudentProfessionalProfile
+    from paymentdb.models import Payment
+    from paymentdb.services import generate_payment_ids
+    from batchdb.models import BatchStudent, BatchTransaction
+    from batchdb.search import schedule_refresh as schedule_batch_search_refresh
+    from audit.models import AuditLog
+    from accounts.models import EmailOutbox
+    from settingsdb.signals import track_bulk_create
+    from .models import UserRole
+
+    now = timezone.now()
+
+    with transaction.atomic():
+        student_ids = IDGeneratorService.generate_next_ids("Student", len(rows), initiator_user)
+        passwords = [f"{student_id}@{now.year}" for student_id in student_ids]
+        # PBKDF2 releases the GIL, so hashing is the one step worth spreading over threads
+        with ThreadPoolExecutor(max_workers=hash_workers) as pool:
+            hashes = list(pool.map(make_password, passwords))
+
+        users = CustomUser.objects.bulk_create([
+            CustomUser(
+                email=CustomUser.objects.normalize_email(row["data"]["email"]),
+                name=f"{row['data']['first_name']} {row['data'].get('last_name') or ''}".strip(),
+                role=row["role"].name.lower(),
+                password=password_hash,
+                must_change_password=True,
+            )
+            for row, password_hash in zip(rows, hashes)
+        ])
+        user_roles = UserRole.objects.bulk_create([UserRole(user=user, role=row["role"]) for row, user in zip(rows, users)])
+
+        students = Student.objects.bulk_create([
+            Student(
+                user=user,
+                student_id=student_id,
+                first_name=row["data"]["first_name"],
+                last_name=row["data"].get("last_name") or "",
+                email=row["data"]["email"],
+                extra_data=row["extra_data"],
+                **row["fields"],
+            )
+            for row, user, student_id in zip(rows, users, student_ids)
+        ])
+
+        profiles = StudentProfessionalProfile.objects.bulk_create([
+            StudentProfessionalProfile(
+                student=student,
+                is_currently_employed=profile.get("is_currently_employed", False),
+                has_prior_work_experience=profile.get("has_prior_work_experience", False),
+                current_employment_details=profile.get("current_employment_details", {}),
+                prior_experience_details=profile.get("prior_experience_details", {}),
+                technical_experience_profile=profile.get("technical_experience_profile", {}),
+                fresher_readiness_profile=profile.get("fresher_readiness_profile", {}),
+            )
+            for row, student in zip(rows, students)
+            for profile in [row["related"]["professional_profile"]]
+            if profile
+        ])
+
+        # Batch enrollment: one STUDENT_ADDED transaction per batch for the whole chunk
+        by_batch = {}
+        for row, student in zip(rows, students):
+            if row["batch_pk"]:
+                by_batch.setdefault(row["batch_pk"], []).append(student)
+        memberships = BatchStudent.objects.bulk_create([
+            BatchStudent(batch_id=batch_pk, student=student, is_active=True, activated_at=now)
+            for batch_pk, enrolled in by_batch.items()
+            for student in enrolled
+        ])
+        batch_transactions = BatchTransaction.objects.bulk_create([
+            BatchTransaction(
+                batch_id=batch_pk,
+                transaction_type="STUDENT_ADDED",
+                user=initiator_user,
+                details={
+                    "student_count": len(enrolled),
+                    "student_ids": [student.id for student in enrolled],
+                    "student_names": [str(student) for student in enrolled],
+                    "activated_at": str(now),
+                },
+            )
+            for batch_pk, enrolled in by_batch.items()
+        ])
+        AffectedStudent = BatchTransaction.affected_students.through
+        AffectedStudent.objects.bulk_create([
+            AffectedStudent(batchtransaction_id=batch_transaction.id, student_id=student.id)
+            for batch_transaction, enrolled in zip(batch_transactions, by_batch.values())
+            for student in enrolled
+        ])
+        schedule_batch_search_refresh(by_batch)
+
+        # Payments, numbered from the same counter as Payment.save() with one increment
+        billed = [(row, student) for row, student in zip(rows, students) if row["related"]["fees_total"] is not None]
+        payment_ids = generate_payment_ids(len(billed))
+        payments = []
+        for (row, student), payment_id in zip(billed, payment_ids):
+            related = row["related"]
+            schedule = related["payment_schedule"] or []
+            emi_count = len(schedule)
+            total_fees = Decimal(str(related["fees_total"]))
+            amount_paid = Decimal(str(related["fees_paid"] or 0))
+            payment = Payment(
+                payment_id=payment_id,
+                student=student,
+                total_fees=total_fees,
+                amount_paid=amount_paid,
+                emi_type=str(emi_count) if 1 <= emi_count <= 4 else "NONE",
+                total_pending_amount=total_fees - amount_paid,
+            )
+            for i, item in enumerate(schedule[:4], start=1):
+                setattr(payment, f"emi_{i}_amount", item.get("amount"))
+                setattr(payment, f"emi_{i}_date", item.get("date"))
+            payments.append(payment)
+        Payment.objects.bulk_create(payments)
+
+        audit_rows = []
+        for row, user in zip(rows, users):
+            role = row["role"]
+            audit_rows.append(AuditLog(
+                actor_user_id=user.id, action_type="CREATE", entity_type="User", entity_id=str(user.id),
+                new_value={"email": user.email}, source="SYSTEM", correlation_id=str(uuid.uuid4()),
+            ))
+            audit_rows.append(AuditLog(
+                actor_user_id=user.id, actor_role=role.code, action_type="ROLE_ASSIGN", entity_type="Role",
+                entity_id=str(role.id), new_value={"role": role.code}, source="SYSTEM",
+                correlation_id=str(uuid.uuid4()),
+            ))
+        AuditLog.objects.bulk_create(audit_rows)
+
+        # bulk_create sends no post_save, so the transaction log entries are queued here
+        track_bulk_create(CustomUser, users)
+        track_bulk_create(UserRole, user_roles)
+        track_bulk_create(Student, students)
+        track_bulk_create(StudentProfessionalProfile, profiles)
+        track_bulk_create(BatchStudent, memberships)
+        track_bulk_create(BatchTransaction, batch_transactions)
+        track_bulk_create(Payment, payments)
+
+        if send_welcome_email:
+            welcome = [_welcome_email(user.email, password) for user, password in zip(users, passwords)]
+            EmailOutbox.objects.bulk_create([
+                EmailOutbox(category="WELCOME", subject=subject, body=body, to=to)
+                for subject, body, to in welcome
+            ])
+
+    return [
+        {"row": row["row"], "id": user.id, "email": user.email, "student_id": student.student_id}
+        for row, user, student in zip(rows, users, students)
+    ]
+
+
+def _welcome_email(email, password):
+    """(subject, body, to) of the welcome mail carrying the generated credentials."""
+    return "Your BelyvLMS Account", f"Login Email: {email}\nPassword: {password}", [email]
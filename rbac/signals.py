@@ -0,0 +1,51 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Role, Permission, RolePermission, UserRole
+from .utils import _get_user_role_rows, _pick_active_role, bump_role_version, bump_user_roles_version, set_session_active_role
+from .bitsets import bump_catalog_version
+
+
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+def invalidate_role_permissions(sender, instance, **kwargs):
+    bump_role_version(instance.role_id)
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permission_catalog(sender, instance, **kwargs):
+    # Bit positions are primary keys, so role masks stay valid; only the
+    # code <-> bit catalogue needs rebuilding.
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def invalidate_user_roles(sender, instance, **kwargs):
+    bump_user_roles_version(instance.user_id)
+
+
+@receiver(post_save, sender=Role)
+def invalidate_role_on_status_change(sender, instance, created, update_fields=None, **kwargs):
+    # Inactive roles resolve to an empty permission set, so an is_active flip
+    # must invalidate the cached grants.
+    if created:
+        return
+    if update_fields is None or 'is_active' in update_fields:
+        bump_role_version(instance.pk)
+
+
+@receiver(post_delete, sender=Role)
+def invalidate_deleted_role(sender, instance, **kwargs):
+    bump_role_version(instance.pk)
+
+
+@receiver(user_logged_in)
+def remember_active_role(sender, request, user, **kwargs):
+    # Server-rendered views act as this role until SwitchRoleView changes it
+    if request is None:
+        return
+    role = _pick_active_role(_get_user_role_rows(user), user)
+    set_session_active_role(request, role[1] if role else None)
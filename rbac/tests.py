@@ -1,5 +1,5 @@
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -130,3 +130,531 @@ class AuthMePermissionTestCase(TestCase):
         print(f"\n[Test Fallback] Requested: INVALID -> Got: {active_role['code']}")
         self.assertIn(active_role['code'], ['SAM', 'TRN'])
 
+
+class PermissionResolverTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='resolver@example.com',
+            name='Resolver User',
+            role='staff',
+            password='testpassword123',
+        )
+        self.role = Role.objects.create(code='STF', name='Staff Member')
+        self.perm_view = Permission.objects.create(code='COURSE_VIEW', name='View Courses', module='Courses')
+        self.perm_edit = Permission.objects.create(code='COURSE_EDIT', name='Edit Courses', module='Courses')
+        RolePermission.objects.create(role=self.role, permission=self.perm_view)
+        UserRole.objects.create(user=self.user, role=self.role)
+
+    def test_warm_cache_costs_one_query(self):
+        from rbac.utils import get_user_permissions
+        self.assertEqual(get_user_permissions(self.user, 'STF'), ['COURSE_VIEW'])
+        # Roles and the role's permission version are read together; the mask is cached
+        with self.assertNumQueries(2):
+            self.assertEqual(get_user_permissions(self.user, 'STF'), ['COURSE_VIEW'])
+            self.assertEqual(get_user_permissions(self.user), ['COURSE_VIEW'])
+
+    def test_assignments_are_not_cached(self):
+        from rbac.utils import get_user_permissions
+        self.assertEqual(get_user_permissions(self.user, 'STF'), ['COURSE_VIEW'])
+        other = Role.objects.create(code='OTH', name='Other')
+        # A queryset update fires no signals, as with a change made by another worker
+        UserRole.objects.filter(user=self.user).update(role=other)
+        self.assertEqual(get_user_permissions(self.user, 'STF'), [])
+
+    def test_versions_live_in_the_database(self):
+        from rbac.models import RBACVersion
+        from rbac.utils import get_role_version, bump_role_version
+        before = get_role_version(self.role.id)
+        bump_role_version(self.role.id)
+        cache.clear()
+        self.assertEqual(get_role_version(self.role.id), before + 1)
+        self.assertEqual(
+            RBACVersion.objects.get(scope=RBACVersion.SCOPE_ROLE, object_id=self.role.id).version,
+            before + 1,
+        )
+
+    def test_role_permission_change_invalidates(self):
+        from rbac.utils import get_user_permissions
+        self.assertNotIn('COURSE_EDIT', get_user_permissions(self.user, 'STF'))
+        rp = RolePermission.objects.create(role=self.role, permission=self.perm_edit)
+        self.assertIn('COURSE_EDIT', get_user_permissions(self.user, 'STF'))
+        rp.delete()
+        self.assertNotIn('COURSE_EDIT', get_user_permissions(self.user, 'STF'))
+
+    def test_role_assignment_and_status_invalidate(self):
+        from rbac.utils import get_user_permissions
+        self.assertEqual(get_user_permissions(self.user, 'STF'), ['COURSE_VIEW'])
+        self.role.is_active = False
+        self.role.save()
+        self.assertEqual(get_user_permissions(self.user, 'STF'), [])
+        self.role.is_active = True
+        self.role.save()
+        UserRole.objects.filter(user=self.user).delete()
+        self.assertEqual(get_user_permissions(self.user, 'STF'), [])
+
+    def test_request_memoization(self):
+        from django.test import RequestFactory
+        from rbac.utils import get_request_permission_mask, get_request_permissions
+        request = RequestFactory().get('/')
+        request.user = self.user
+        self.assertEqual(get_request_permissions(request, 'STF'), ['COURSE_VIEW'])
+        mask = get_request_permission_mask(request, 'STF')
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_request_permission_mask(request, 'STF'), mask)
+
+    def test_bitset_checks(self):
+        from rbac import bitsets
+        from rbac.utils import get_user_permission_mask
+        mask = get_user_permission_mask(self.user, 'STF')
+        self.assertTrue(bitsets.mask_has(mask, 'COURSE_VIEW'))
+        self.assertFalse(bitsets.mask_has(mask, 'COURSE_EDIT'))
+        self.assertFalse(bitsets.mask_has(mask, 'UNKNOWN_CODE'))
+        self.assertTrue(bitsets.mask_has_any(mask, ['COURSE_EDIT', 'COURSE_VIEW']))
+        self.assertEqual(
+            bitsets.check_many(mask, ['COURSE_VIEW', 'COURSE_EDIT', 'UNKNOWN_CODE']),
+            {'COURSE_VIEW': True, 'COURSE_EDIT': False, 'UNKNOWN_CODE': False},
+        )
+
+    def test_bulk_check_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        client.credentials(HTTP_X_ACTIVE_ROLE='STF')
+        response = client.post(
+            reverse('rbac-check-permissions'),
+            {'permissions': ['COURSE_VIEW', 'COURSE_EDIT']},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'COURSE_VIEW': True, 'COURSE_EDIT': False})
+
+
+@override_settings(RBAC_TOKEN_CLAIMS=True)
+class TokenClaimsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='claims@example.com',
+            name='Claims User',
+            role='staff',
+            password='testpassword123',
+        )
+        self.role = Role.objects.create(code='STF', name='Staff Member')
+        self.perm_view = Permission.objects.create(code='ROLE_VIEW', name='View Roles', module='RBAC')
+        self.perm_edit = Permission.objects.create(code='ROLE_UPDATE', name='Update Roles', module='RBAC')
+        RolePermission.objects.create(role=self.role, permission=self.perm_view)
+        UserRole.objects.create(user=self.user, role=self.role)
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.post(reverse('rbac-switch-role'), {'role_code': 'STF'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.access = response.json()['access']
+        self.refresh = response.json()['refresh']
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    def test_access_token_carries_claims(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        from rbac.tokens import CLAIM_ROLE, CLAIM_ROLE_ID
+        token = AccessToken(self.access)
+        self.assertEqual(token[CLAIM_ROLE], 'STF')
+        self.assertEqual(token[CLAIM_ROLE_ID], self.role.id)
+
+    def test_authorizes_without_role_queries(self):
+        url = reverse('rbac-check-permissions')
+        self.client.post(url, {'permissions': ['ROLE_VIEW']}, format='json')
+        # The JWT user lookup and one read of both version counters once the mask is cached
+        with self.assertNumQueries(2):
+            response = self.client.post(url, {'permissions': ['ROLE_VIEW', 'ROLE_UPDATE']}, format='json')
+        self.assertEqual(response.json(), {'ROLE_VIEW': True, 'ROLE_UPDATE': False})
+
+    def test_stale_claims_rejected_by_any_worker(self):
+        # A fresh worker: empty cache and nothing memoized in-process
+        from rbac.utils import bump_user_roles_version
+        bump_user_roles_version(self.user.id)
+        cache.clear()
+        response = self.client.post(reverse('rbac-check-permissions'), {'permissions': ['ROLE_VIEW']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_version_bump_invalidates_token(self):
+        url = reverse('rbac-check-permissions')
+        RolePermission.objects.create(role=self.role, permission=self.perm_edit)
+        response = self.client.post(url, {'permissions': ['ROLE_UPDATE']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        refreshed = APIClient().post(reverse('token_refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(refreshed.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed.json()['access']}")
+        response = self.client.post(url, {'permissions': ['ROLE_UPDATE']}, format='json')
+        self.assertEqual(response.json(), {'ROLE_UPDATE': True})
+
+
+class RBACRequiredDecoratorTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='templates@example.com',
+            name='Template User',
+            role='staff',
+            password='testpassword123',
+        )
+        self.role_stf = Role.objects.create(code='STF', name='Staff Member')
+        self.role_trn = Role.objects.create(code='TRN', name='Tutor')
+        perm = Permission.objects.create(code='BATCH_VIEW', name='View Batches', module='Batches')
+        RolePermission.objects.create(role=self.role_trn, permission=perm)
+        # Multi-role user: used to raise MultipleObjectsReturned
+        UserRole.objects.create(user=self.user, role=self.role_stf)
+        UserRole.objects.create(user=self.user, role=self.role_trn)
+
+        from django.http import HttpResponse
+        from rbac.decorators import rbac_required
+        self.view = rbac_required('BATCH_VIEW')(lambda request: HttpResponse('ok'))
+
+    def _request(self, session=None):
+        from django.test import RequestFactory
+        request = RequestFactory().get('/')
+        request.user = self.user
+        request.session = session or {}
+        return request
+
+    def test_session_active_role_is_used(self):
+        from rbac.decorators import get_template_active_role
+        from rbac.utils import ACTIVE_ROLE_SESSION_KEY
+        self.view(self._request({ACTIVE_ROLE_SESSION_KEY: 'TRN'}))
+        # The user's roles with their permission versions; the mask comes from the cache
+        request = self._request({ACTIVE_ROLE_SESSION_KEY: 'TRN'})
+        with self.assertNumQueries(1):
+            response = self.view(request)
+            self.assertEqual(get_template_active_role(request), 'TRN')
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_and_switch_role_write_the_session_role(self):
+        from rbac.utils import ACTIVE_ROLE_SESSION_KEY
+        self.user.last_active_role = 'STF'
+        self.user.save(update_fields=['last_active_role'])
+        self.client.login(email='templates@example.com', password='testpassword123')
+        self.assertEqual(self.client.session[ACTIVE_ROLE_SESSION_KEY], 'STF')
+
+        # The page calls the API with its token; the browser sends the session cookie along
+        from rest_framework_simplejwt.tokens import RefreshToken
+        token = RefreshToken.for_user(self.user).access_token
+        response = self.client.post(reverse('rbac-switch-role'), {'role_code': 'TRN'}, content_type='application/json',
+                                    HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.session[ACTIVE_ROLE_SESSION_KEY], 'TRN')
+
+    def test_last_active_role_fallback(self):
+        self.user.last_active_role = 'TRN'
+        self.assertEqual(self.view(self._request()).status_code, 200)
+
+    def test_denied_for_role_without_permission(self):
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from rbac.utils import ACTIVE_ROLE_SESSION_KEY
+        request = self._request({ACTIVE_ROLE_SESSION_KEY: 'STF'})
+        request._messages = FallbackStorage(request)
+        self.assertEqual(self.view(request).status_code, 302)
+
+
+class RolePermissionSyncTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email='matrix@example.com',
+            name='Matrix Admin',
+            role='admin',
+            password='testpassword123',
+        )
+        self.admin_role = Role.objects.create(code='ADM', name='Admin')
+        self.target = Role.objects.create(code='TRN', name='Tutor')
+        view = Permission.objects.create(code='ROLE_VIEW', name='View Roles', module='RBAC')
+        RolePermission.objects.create(role=self.admin_role, permission=view)
+        UserRole.objects.create(user=self.admin, role=self.admin_role)
+
+        self.codes = []
+        for i in range(20):
+            code = f'MODULE_{i}_VIEW'
+            Permission.objects.create(code=code, name=code, module='Bulk')
+            self.codes.append(code)
+        for code in self.codes[:10]:
+            RolePermission.objects.create(role=self.target, permission=Permission.objects.get(code=code))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.client.credentials(HTTP_X_ACTIVE_ROLE='ADM')
+
+    def test_service_applies_diff(self):
+        from audit.models import AuditLog
+        from rbac.services import sync_role_permissions
+        desired = self.codes[5:15] + ['NOT_A_PERMISSION']
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(7):
+                diff = sync_role_permissions(self.target, desired, actor=self.admin)
+        self.assertEqual(diff['added'], sorted(self.codes[10:15]))
+        self.assertEqual(diff['removed'], sorted(self.codes[:5]))
+        self.assertEqual(diff['unchanged'], 5)
+        self.assertEqual(diff['unknown'], ['NOT_A_PERMISSION'])
+        self.assertEqual(
+            set(RolePermission.objects.filter(role=self.target).values_list('permission__code', flat=True)),
+            set(self.codes[5:15]),
+        )
+        self.assertEqual(AuditLog.objects.filter(action_type='PERMISSION_SYNC').count(), 1)
+
+    def test_set_permissions_endpoint_invalidates_cache(self):
+        from rbac.utils import get_role_permissions
+        self.assertEqual(len(get_role_permissions(self.target.id)), 10)
+        url = reverse('rbac-roles-set-permissions', args=[self.target.id])
+        response = self.client.post(url, {'permissions': self.codes[:3]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['permissions_set'], 3)
+        self.assertEqual(sorted(get_role_permissions(self.target.id)), sorted(self.codes[:3]))
+
+
+class AuthContextETagTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='etag@example.com',
+            name='ETag User',
+            role='staff',
+            password='testpassword123',
+        )
+        self.role = Role.objects.create(code='STF', name='Staff Member')
+        self.perm = Permission.objects.create(code='COURSE_VIEW', name='View Courses', module='Courses')
+        UserRole.objects.create(user=self.user, role=self.role)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('rbac-me')
+
+    def test_repeat_load_is_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        etag = first['ETag']
+        with self.assertNumQueries(2):
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b'')
+
+    def test_cached_context_costs_version_reads_only(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()['active_role']['code'], 'STF')
+
+    def test_etag_is_the_same_in_every_worker(self):
+        etag = self.client.get(self.url)['ETag']
+        # Another worker (or a restart) starts with an empty cache
+        cache.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_grant_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        RolePermission.objects.create(role=self.role, permission=self.perm)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('COURSE_VIEW', response.json()['permissions'])
+
+
+class IDGeneratorBlockTestCase(TestCase):
+    def setUp(self):
+        from rbac.services import IDGeneratorService
+        from rbac.models import RoleSequence
+        self.service = IDGeneratorService
+        self.service.clear_blocks()
+        self.role = Role.objects.create(code='BTR', name='Student')
+        self.sequence = RoleSequence.objects.get_or_create(role=self.role)[0]
+
+    def tearDown(self):
+        self.service.clear_blocks()
+
+    def test_single_ids_stay_gap_free_by_default(self):
+        ids = [self.service.generate_next_id('Student') for _ in range(3)]
+        self.assertEqual(ids, ['BTR0001', 'BTR0002', 'BTR0003'])
+        self.sequence.refresh_from_db()
+        self.assertEqual(self.sequence.current_sequence, 3)
+
+    def test_bulk_ids_use_one_reservation(self):
+        ids = self.service.generate_next_ids('Student', 250)
+        self.assertEqual(len(ids), 250)
+        self.assertEqual(ids[0], 'BTR0001')
+        self.assertEqual(ids[-1], 'BTR0250')
+        self.sequence.refresh_from_db()
+        self.assertEqual(self.sequence.current_sequence, 250)
+        self.assertEqual(self.service.generate_next_ids('Student', 0), [])
+
+    @override_settings(RBAC_ID_BLOCK_SIZE=5)
+    def test_block_mode_reserves_range_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = [self.service.generate_next_id('Student')]
+            # The rest of the open transaction's block is served without a query
+            with self.assertNumQueries(0):
+                ids += [self.service.generate_next_id('Student') for _ in range(2)]
+        self.assertEqual(ids, ['BTR0001', 'BTR0002', 'BTR0003'])
+        self.sequence.refresh_from_db()
+        self.assertEqual(self.sequence.current_sequence, 5)
+
+        # The committed remainder is served from memory, then a new block is reserved
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = [self.service.generate_next_id('Student') for _ in range(3)]
+        self.assertEqual(ids, ['BTR0004', 'BTR0005', 'BTR0006'])
+        self.sequence.refresh_from_db()
+        self.assertEqual(self.sequence.current_sequence, 10)
+
+    @override_settings(RBAC_ID_BLOCK_SIZE=5)
+    def test_rolled_back_block_is_not_reused(self):
+        from django.db import transaction
+
+        class Abort(Exception):
+            pass
+
+        with self.assertRaises(Abort):
+            with transaction.atomic():
+                self.assertEqual(self.service.generate_next_id('Student'), 'BTR0001')
+                raise Abort()
+
+        # The reservation rolled back with the transaction, so the numbers are reserved
+        # again from the sequence row instead of being served from a stale block
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.service.generate_next_id('Student'), 'BTR0001')
+            self.assertEqual(self.service.generate_next_id('Student'), 'BTR0002')
+        self.sequence.refresh_from_db()
+        self.assertEqual(self.sequence.current_sequence, 5)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BulkProvisionTestCase(TestCase):
+    def setUp(self):
+        from datetime import date
+        from batchdb.models import Batch
+        from rbac.services import IDGeneratorService
+        IDGeneratorService.clear_blocks()
+        cache.clear()
+        self.student_role = Role.objects.create(code='BTR', name='Student')
+        self.initiator = User.objects.create_user(
+            email='ops@example.com', name='Ops', role='admin', password='testpassword123',
+        )
+        self.batch = Batch.objects.create(batch_id='PYAA', start_date=date(2026, 1, 1), end_date=date(2026, 3, 1))
+
+    def _payload(self, i, **profile):
+        return {
+            'first_name': f'Student{i}',
+            'last_name': 'Cohort',
+            'email': f'student{i}@corp.example.com',
+            'role_code': 'BTR',
+            'profile': {'mode_of_class': 'ON', 'week_type': 'WD', **profile},
+        }
+
+    def test_bulk_creates_students_and_related_rows(self):
+        from studentsdb.models import Student
+        from batchdb.models import BatchStudent, BatchTransaction
+        from paymentdb.models import Payment
+        from audit.models import AuditLog
+        from rbac.services import bulk_provision_users
+
+        payloads = [
+            self._payload(i, batch_id='PYAA', fees_total=30000, fees_paid=10000,
+                          payment_schedule=[{'amount': 10000, 'date': '2026-02-01'}, {'amount': 10000, 'date': '2026-03-01'}],
+                          professional_profile={'is_currently_employed': True})
+            for i in range(7)
+        ]
+        report = bulk_provision_users(self.initiator, payloads, chunk_size=3)
+
+        self.assertEqual((report['created'], report['failed']), (7, 0))
+        self.assertEqual([r['student_id'] for r in report['results']], [f'BTR{n:04d}' for n in range(1, 8)])
+
+        student = Student.objects.get(student_id='BTR0001')
+        self.assertEqual(student.user.email, 'student0@corp.example.com')
+        self.assertTrue(student.user.check_password(f'BTR0001@{student.enrollment_date.year}'))
+        self.assertTrue(student.user.must_change_password)
+        self.assertTrue(UserRole.objects.filter(user=student.user, role=self.student_role).exists())
+        self.assertTrue(student.professional_profile.is_currently_employed)
+
+        self.assertEqual(BatchStudent.objects.filter(batch=self.batch, is_active=True).count(), 7)
+        # One STUDENT_ADDED transaction per chunk (3 + 3 + 1)
+        transactions = BatchTransaction.objects.filter(batch=self.batch, transaction_type='STUDENT_ADDED')
+        self.assertEqual(transactions.count(), 3)
+        self.assertEqual(sum(t.affected_students.count() for t in transactions), 7)
+
+        payment = Payment.objects.get(student=student)
+        self.assertEqual(payment.emi_type, '2')
+        self.assertEqual(payment.total_pending_amount, 20000)
+        self.assertEqual(Payment.objects.filter(payment_id__startswith='PMT').values('payment_id').distinct().count(), 7)
+
+        self.assertEqual(AuditLog.objects.filter(action_type='ROLE_ASSIGN', entity_type='Role').count(), 7)
+
+    def test_bulk_payments_and_transaction_log(self):
+        from decimal import Decimal
+        from studentsdb.models import Student
+        from paymentdb.models import Payment
+        from settingsdb.models import TransactionLog
+        from settingsdb.signals import set_current_user
+        from rbac.services import bulk_provision_users
+
+        # A payment numbered before the counter row existed
+        existing = Student.objects.bulk_create([
+            Student(student_id='OLD0001', first_name='Old', mode_of_class='ON', week_type='WD'),
+        ])[0]
+        Payment.objects.bulk_create([Payment(
+            payment_id='PMT0005', student=existing, total_fees=Decimal('100'), amount_paid=Decimal('0'),
+            total_pending_amount=Decimal('100'),
+        )])
+
+        set_current_user(self.initiator)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                payloads = [self._payload(i, batch_id='PYAA', fees_total=1000) for i in range(3)]
+                report = bulk_provision_users(self.initiator, payloads)
+        finally:
+            set_current_user(None)
+
+        self.assertEqual(report['created'], 3)
+        self.assertEqual(
+            sorted(Payment.objects.exclude(student=existing).values_list('payment_id', flat=True)),
+            ['PMT0006', 'PMT0007', 'PMT0008'],
+        )
+        logged = TransactionLog.objects.filter(action='CREATE')
+        for table in ('CustomUser', 'Student', 'Payment', 'BatchStudent'):
+            self.assertEqual(logged.filter(table_name=table).count(), 3, table)
+
+    def test_bulk_reports_row_errors(self):
+        from rbac.services import bulk_provision_users
+
+        payloads = [
+            self._payload(0),
+            self._payload(1, batch_id='MISSING'),
+            {**self._payload(2), 'email': 'ops@example.com'},
+            self._payload(0),  # duplicate of row 0
+            {'first_name': 'NoRole', 'email': 'norole@example.com', 'role_code': 'NOPE'},
+            self._payload(5, consultant=999),
+        ]
+        report = bulk_provision_users(self.initiator, payloads)
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual([e['row'] for e in report['errors']], [1, 2, 3, 4, 5])
+        self.assertIn('batch_id', report['errors'][0]['errors']['profile'])
+        self.assertIn('email', report['errors'][1]['errors'])
+        self.assertIn('consultant_id', report['errors'][4]['errors']['profile'])
+
+    def test_bulk_create_endpoint(self):
+        admin_role = Role.objects.create(code='ADM', name='Admin')
+        create = Permission.objects.create(code='USER_MANAGEMENT_CREATE', name='Create Users', module='RBAC')
+        RolePermission.objects.create(role=admin_role, permission=create)
+        UserRole.objects.create(user=self.initiator, role=admin_role)
+
+        client = APIClient()
+        client.force_authenticate(user=self.initiator)
+        response = client.post(
+            reverse('rbac-user-bulk-create'),
+            {'payloads': [self._payload(i) for i in range(3)], 'send_welcome_email': True},
+            format='json',
+            HTTP_X_ACTIVE_ROLE='ADM',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 3)
+
+        from accounts.models import EmailOutbox
+        self.assertEqual(EmailOutbox.objects.filter(category='WELCOME', status='PENDING').count(), 3)
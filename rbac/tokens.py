@@ -0,0 +1,92 @@
+"""
+Optional RBAC claims for SimpleJWT access tokens (settings.RBAC_TOKEN_CLAIMS).
+
+When enabled, access tokens carry the active role plus the role's permission version
+and the user's role-assignment version at issue time. HasRBACPermission can then
+authorize from the token alone: both versions are compared against the RBACVersion
+rows (bumped by rbac/signals.py) with one query, so a revoked grant or assignment
+invalidates every outstanding token in every worker, across restarts, without
+reading UserRole on the hot path. A stale token is rejected with 401, and the client
+recovers through the regular refresh endpoint, which mints fresh claims.
+"""
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import RBACVersion
+from .utils import resolve_active_role, get_versions, get_role_mask
+
+CLAIM_ROLE = "rbac_role"
+CLAIM_ROLE_ID = "rbac_role_id"
+CLAIM_ROLE_VERSION = "rbac_rv"
+CLAIM_USER_VERSION = "rbac_uv"
+
+
+def token_claims_enabled():
+    return getattr(settings, "RBAC_TOKEN_CLAIMS", False)
+
+
+def add_role_claims(access_token, user, role_code=None):
+    """
+    Stamps the RBAC claims for the user's active role onto an AccessToken.
+    Role priority matches build_auth_context: requested code, then last_active_role,
+    then the first assigned role. Leaves the token untouched if the user has no role.
+    """
+    role = resolve_active_role(user, role_code)
+    if not role:
+        return access_token
+
+    role_id, code = role
+    role_version, user_version = _get_claim_versions(user.pk, role_id)
+    access_token[CLAIM_ROLE] = code
+    access_token[CLAIM_ROLE_ID] = role_id
+    access_token[CLAIM_ROLE_VERSION] = role_version
+    access_token[CLAIM_USER_VERSION] = user_version
+    return access_token
+
+
+def _get_claim_versions(user_id, role_id):
+    """(role permission version, user role-assignment version), read with one query."""
+    role_key = (RBACVersion.SCOPE_ROLE, role_id)
+    user_key = (RBACVersion.SCOPE_USER, user_id)
+    versions = get_versions(role_key, user_key)
+    return versions[role_key], versions[user_key]
+
+
+def issue_tokens(user, role_code=None):
+    """Returns (refresh, access) for the user, with RBAC claims when enabled."""
+    refresh = RefreshToken.for_user(user)
+    access = refresh.access_token
+    if token_claims_enabled():
+        add_role_claims(access, user, role_code)
+    return refresh, access
+
+
+def get_claims_permission_mask(request, active_role_code=None):
+    """
+    Returns the permission bitmask authorized by the request's access token claims,
+    or None when claims mode is off or the token carries no usable claims
+    (the caller then falls back to the regular resolver).
+
+    Raises AuthenticationFailed when the claims are stale.
+    """
+    if not token_claims_enabled():
+        return None
+
+    token = getattr(request, "auth", None)
+    if token is None or not hasattr(token, "get"):
+        return None
+
+    role_code = token.get(CLAIM_ROLE)
+    role_id = token.get(CLAIM_ROLE_ID)
+    if not role_code or role_id is None:
+        return None
+    if active_role_code and active_role_code != role_code:
+        # An explicit X-Active-Role header for another role wins over the token
+        return None
+
+    role_version, user_version = _get_claim_versions(request.user.pk, role_id)
+    if token.get(CLAIM_USER_VERSION) != user_version or token.get(CLAIM_ROLE_VERSION) != role_version:
+        raise AuthenticationFailed("Role permissions have changed. Please refresh your token.", code="rbac_token_stale")
+
+    return get_role_mask(role_id, role_version)
@@ -1,56 +1,287 @@
-from .models import UserRole, RolePermission, Permission
 from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 
-def get_user_permissions(user, active_role_code=None):
+from .models import UserRole, RolePermission, Permission, RBACVersion
+
+from . import bitsets
+
+# Compiled role masks are cached under the role's permission version instead of being
+# deleted one key at a time. Versions are RBACVersion rows, bumped by rbac/signals.py in
+# the same transaction as the change they track, so every worker reads the same version
+# and stale entries are simply never looked up again (they expire with their TTL).
+RBAC_CACHE_TTL = 60 * 60 * 24  # 24 hours
+
+# Attribute used to memoize resolved permissions on the underlying HttpRequest
+REQUEST_CACHE_ATTR = "_rbac_permission_cache"
+
+# Session key holding the active role for server-rendered (template) views; written
+# at login and by SwitchRoleView (set_session_active_role)
+ACTIVE_ROLE_SESSION_KEY = "rbac_active_role"
+# Attribute used to memoize the session's resolved active role on the HttpRequest
+SESSION_ROLE_ATTR = "_rbac_session_role"
+
+
+def get_versions(*keys):
     """
-    Fetches all permission codes for a given user based on their assigned Role.
+    Returns {(scope, object_id): version} for the requested keys with one query.
+    Keys without a counter row read as 0.
+    """
+    versions = dict.fromkeys(keys, 0)
+    if keys:
+        condition = Q()
+        for scope, object_id in keys:
+            condition |= Q(scope=scope, object_id=object_id)
+        for scope, object_id, version in RBACVersion.objects.filter(condition).values_list('scope', 'object_id', 'version'):
+            versions[(scope, object_id)] = version
+    return versions
+
+
+def _get_version(scope, object_id=0):
+    return get_versions((scope, object_id))[(scope, object_id)]
+
+
+def _bump(scope, object_id=0):
+    # The UPDATE row-locks the counter until commit, so concurrent readers see the
+    # new version exactly when they can see the change it stands for.
+    counter = RBACVersion.objects.filter(scope=scope, object_id=object_id)
+    if counter.update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            RBACVersion.objects.create(scope=scope, object_id=object_id, version=1)
+    except IntegrityError:
+        # Another transaction created the row first
+        counter.update(version=F('version') + 1)
+
+
+def _role_version_subquery(role_ref):
+    return Coalesce(
+        Subquery(
+            RBACVersion.objects.filter(scope=RBACVersion.SCOPE_ROLE, object_id=OuterRef(role_ref)).values('version')[:1]
+        ),
+        0,
+        output_field=BigIntegerField(),
+    )
+
+
+def get_role_version(role_id):
+    return _get_version(RBACVersion.SCOPE_ROLE, role_id)
+
+
+def bump_role_version(role_id):
+    """Invalidate the cached permission set of a role (grants or is_active changed)."""
+    _bump(RBACVersion.SCOPE_ROLE, role_id)
+
+
+def get_user_roles_version(user_id):
+    return _get_version(RBACVersion.SCOPE_USER, user_id)
+
+
+def bump_user_roles_version(user_id):
+    """Mark the role assignments of a user as changed (invalidates /me and token claims)."""
+    _bump(RBACVersion.SCOPE_USER, user_id)
+
+
+def _get_user_role_rows(user):
+    """(role_id, role_code, role permission version) per assigned role, in assignment order."""
+    return list(
+        UserRole.objects.filter(user_id=user.pk)
+        .order_by('id')
+        .annotate(role_version=_role_version_subquery('role_id'))
+        .values_list('role_id', 'role__code', 'role_version')
+    )
+
+
+def get_user_roles(user):
+    """
+    Returns the user's assigned roles as a list of (role_id, role_code) tuples,
+    in assignment order. Read from the database on every call (not cached), so a
+    revoked assignment takes effect on the next request in every worker.
+    """
+    return list(
+        UserRole.objects.filter(user_id=user.pk)
+        .order_by('id')
+        .values_list('role_id', 'role__code')
+    )
+
+
+def _pick_role(roles, active_role_code=None):
+    if active_role_code:
+        return next((r for r in roles if r[1] == active_role_code), None)
+    return roles[0] if roles else None
+
+
+def get_role_mask(role_id, version=None):
+    """
+    Returns the compiled permission bitmask of a role (0 for inactive roles).
+    Cached per role under the role's permission version (read from the database
+    unless the caller already has it); see rbac/bitsets.py.
+    """
+    if version is None:
+        version = get_role_version(role_id)
+    cache_key = f"rbac_role_mask_{role_id}_v{version}"
+    mask = cache.get(cache_key)
+    if mask is None:
+        mask = bitsets.encode_ids(
+            RolePermission.objects.filter(role_id=role_id, role__is_active=True)
+            .values_list('permission_id', flat=True)
+        )
+        cache.set(cache_key, mask, RBAC_CACHE_TTL)
+    return mask
+
+
+def get_role_permissions(role_id):
+    """
+    Returns the permission codes granted to a role (empty for inactive roles).
+    """
+    return bitsets.decode(get_role_mask(role_id))
+
+
+def resolve_role(user, active_role_code=None):
+    """
+    Resolves the (role_id, role_code) the user is acting as, or None.
+    - If active_role_code is provided, it must be one of the user's roles.
+    - If active_role_code is None, defaults to the FIRST assigned role (Compatibility).
+    """
+    return _pick_role(get_user_roles(user), active_role_code)
+
+
+def resolve_active_role(user, requested_role_code=None):
+    """
+    Resolves the active (role_id, role_code) with the same priority as build_auth_context:
+    the requested code, then user.last_active_role, then the first assigned role.
+    """
+    return _pick_active_role(get_user_roles(user), user, requested_role_code)
+
+
+def _pick_active_role(roles, user, requested_role_code=None):
+    for code in (requested_role_code, getattr(user, 'last_active_role', None)):
+        if code:
+            role = _pick_role(roles, code)
+            if role:
+                return role
+    return _pick_role(roles)
+
+
+def set_session_active_role(request, role_code):
+    """Stores the active role read by server-rendered views (None clears it)."""
+    session = getattr(request, 'session', None)
+    if session is None:
+        return
+    if role_code:
+        session[ACTIVE_ROLE_SESSION_KEY] = role_code
+    else:
+        session.pop(ACTIVE_ROLE_SESSION_KEY, None)
+
+
+def resolve_session_role(request):
+    """
+    (role_id, role_code, role permission version) the user acts as in server-rendered
+    views: the session's ACTIVE_ROLE_SESSION_KEY, then last_active_role, then the
+    first assigned role; None without roles. One query, memoized on the request.
+    """
+    http_request = getattr(request, '_request', request)
+    if not hasattr(http_request, SESSION_ROLE_ATTR):
+        session = getattr(http_request, 'session', None)
+        requested = session.get(ACTIVE_ROLE_SESSION_KEY) if session is not None else None
+        role = _pick_active_role(_get_user_role_rows(request.user), request.user, requested)
+        setattr(http_request, SESSION_ROLE_ATTR, role)
+    return getattr(http_request, SESSION_ROLE_ATTR)
+
+
+def get_session_permission_mask(request):
+    """
+    Permission bitmask of the session's active role (see resolve_session_role),
+    memoized with the other masks of the request.
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return 0
+    role = resolve_session_role(request)
+    if not role:
+        return 0
+
+    http_request = getattr(request, '_request', request)
+    memo = getattr(http_request, REQUEST_CACHE_ATTR, None)
+    if memo is None:
+        memo = {}
+        setattr(http_request, REQUEST_CACHE_ATTR, memo)
+    key = (user.pk, role[1])
+    if key not in memo:
+        memo[key] = get_role_mask(role[0], role[2])
+    return memo[key]
+
+
+def get_user_permission_mask(user, active_role_code=None):
+    """
+    Returns the compiled permission bitmask for the user's active role.
     Supports Multi-Role Context:
     - If active_role_code is provided, checks permissions for THAT role.
     - If active_role_code is None, defaults to the FIRST assigned role (Compatibility).
     """
     if not user.is_authenticated:
-        return []
+        return 0
 
     # 1. REMOVED SUPERUSER BYPASS (GOD MODE)
-    # Rationale: Enterprise RBAC requires all users, including admins, 
+    # Rationale: Enterprise RBAC requires all users, including admins,
     # to have explicit roles defined in the matrix.
     # if user.is_superuser: ... (Removed)
 
-    # 2. Fetch User's Role (Multi-Role Logic)
-    # We don't cache the "User -> Role" mapping here to ensure instant revocation if user is removed from role.
-    # The DB query is fast (indexed).
-    try:
-        if active_role_code:
-            # Specific Role Context
-            user_role = UserRole.objects.select_related('role').get(user=user, role__code=active_role_code)
-        else:
-            # Default Role (First one)
-            user_role = UserRole.objects.select_related('role').filter(user=user).first()
-            
-        if not user_role:
-            return []
-            
-        role = user_role.role
-    except UserRole.DoesNotExist:
-        return []
-
-    if not getattr(role, "is_active", True):
-        return []
-
-    # 3. Fetch Permissions for that Role (Cached by Role)
-    # This ensures that if we update Role permissions, ALL users get updated immediately (after cache clear).
-    role_cache_key = f"rbac_role_perms_{role.code}"
-    cached_role_perms = cache.get(role_cache_key)
-    
-    if cached_role_perms is not None:
-        return cached_role_perms
-
-    permission_codes = RolePermission.objects.filter(role=role).values_list('permission__code', flat=True)
-    
-    perms_list = list(permission_codes)
-    cache.set(role_cache_key, perms_list, 60 * 60 * 24) # Cache for 24 hours
-
-    return perms_list
+    # 2. Resolve User's Role (Multi-Role Logic)
+    # The "User -> Role" mapping is read uncached (one query, together with the role
+    # permission versions), so revocation is immediate in every worker.
+    role = _pick_role(_get_user_role_rows(user), active_role_code)
+    if not role:
+        return 0
+
+    # 3. Fetch the compiled grants for that Role (Cached by Role version)
+    return get_role_mask(role[0], role[2])
+
+
+def get_user_permissions(user, active_role_code=None):
+    """
+    Fetches all permission codes for a given user based on their assigned Role.
+    See get_user_permission_mask for the role resolution rules.
+    """
+    return bitsets.decode(get_user_permission_mask(user, active_role_code))
+
+
+def get_request_permission_mask(request, active_role_code=None, user=None):
+    """
+    Request-scoped variant of get_user_permission_mask.
+    Memoizes the resolved bitmask on the request so repeated checks during
+    the same request (permission classes, list-of-codes checks, views) resolve once.
+    Accepts either a DRF Request or a Django HttpRequest.
+    """
+    user = user or request.user
+    if not user or not user.is_authenticated:
+        return 0
+
+    http_request = getattr(request, '_request', request)
+    memo = getattr(http_request, REQUEST_CACHE_ATTR, None)
+    if memo is None:
+        memo = {}
+        setattr(http_request, REQUEST_CACHE_ATTR, memo)
+
+    key = (user.pk, active_role_code)
+    if key not in memo:
+        # Token claims (settings.RBAC_TOKEN_CLAIMS) skip the role lookup entirely
+        from .tokens import get_claims_permission_mask
+        mask = get_claims_permission_mask(request, active_role_code)
+        if mask is None:
+            mask = get_user_permission_mask(user, active_role_code)
+        memo[key] = mask
+    return memo[key]
+
+
+def get_request_permissions(request, active_role_code=None, user=None):
+    """
+    Returns the permission codes resolved for this request (memoized, see above).
+    """
+    return bitsets.decode(get_request_permission_mask(request, active_role_code, user))
+
 
 def has_permission(user, permission_code, active_role_code=None):
     """
@@ -59,5 +290,4 @@ def has_permission(user, permission_code, active_role_code=None):
     # REMOVED SUPERUSER BYPASS
     # if user.is_superuser: return True
 
-    perms = get_user_permissions(user, active_role_code)
-    return permission_code in perms
+    return bitsets.mask_has(get_user_permission_mask(user, active_role_code), permission_code)
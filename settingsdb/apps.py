@@ -6,3 +6,10 @@ class SettingsdbConfig(AppConfig):
 
     def ready(self):
         import settingsdb.signals  # required to hook the signal
+        from .tracking import register_default_models
+        register_default_models()
+
+        from django.conf import settings
+        if getattr(settings, 'SIGNAL_PROFILING', False):
+            from .signal_profiler import enable
+            enable()
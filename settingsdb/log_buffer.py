@@ -0,0 +1,140 @@
+"""
+Buffered TransactionLog writer used by settingsdb.signals.track_save / track_delete.
+
+- Entries go through a core.commit_buffer.CommitBuffer, so rolled-back work
+  (rolled-back savepoints included) never reaches the log.
+- Inside a request (CaptureUserMiddleware opens a commit_buffer.request_scope)
+  the buffer is written with bulk_create when the request ends, or earlier once
+  it reaches TRANSACTION_LOG_FLUSH_SIZE. Outside a scope entries are written as
+  soon as their transaction commits.
+- With settings.TRANSACTION_LOG_SPILL_DIR set, the buffer may grow to
+  TRANSACTION_LOG_SPILL_THRESHOLD entries; flushes that large are written to an
+  NDJSON file instead and loaded later by `manage.py ingest_transaction_logs`.
+"""
+import json
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.commit_buffer import CommitBuffer
+
+from .log_rendering import describe_activity, summarize_changes
+from .models import TransactionLog
+
+logger = logging.getLogger(__name__)
+
+SPILL_SUFFIX = ".ndjson"
+
+
+def _flush_size():
+    return getattr(settings, "TRANSACTION_LOG_FLUSH_SIZE", 500)
+
+
+def _spill_dir():
+    return getattr(settings, "TRANSACTION_LOG_SPILL_DIR", None)
+
+
+def _spill_threshold():
+    return getattr(settings, "TRANSACTION_LOG_SPILL_THRESHOLD", 2000)
+
+
+def queue_log(user, table_name, object_id, action, changes):
+    entry = TransactionLog(
+        user=user,
+        table_name=table_name,
+        object_id=str(object_id),
+        action=action,
+        changes=changes,
+        timestamp=timezone.now(),
+        description=describe_activity(table_name, action, changes),
+        summary=summarize_changes(action, changes),
+    )
+    _buffer.add(entry)
+
+
+def _buffer_limit():
+    # With spilling enabled the buffer grows to the spill threshold so large imports land on disk
+    return _spill_threshold() if _spill_dir() else _flush_size()
+
+
+def flush():
+    """Writes every entry buffered in the current scope. Returns the number of entries flushed."""
+    return _buffer.flush()
+
+
+def _write(entries):
+    spill_dir = _spill_dir()
+    if spill_dir and len(entries) >= _spill_threshold():
+        spill(entries, spill_dir)
+        return len(entries)
+
+    try:
+        TransactionLog.objects.bulk_create(entries, batch_size=_flush_size())
+    except Exception:
+        if not spill_dir:
+            logger.exception("Failed to write %d transaction log entries", len(entries))
+            return 0
+        spill(entries, spill_dir)
+    return len(entries)
+
+
+_buffer = CommitBuffer("transaction_log", _write, flush_size=_buffer_limit)
+
+
+def _to_record(entry):
+    return {
+        "user_id": entry.user_id,
+        "table_name": entry.table_name,
+        "object_id": entry.object_id,
+        "action": entry.action,
+        "changes": entry.changes,
+        "timestamp": entry.timestamp.isoformat(),
+        "description": str(entry.description),
+        "summary": entry.summary,
+    }
+
+
+def spill(entries, spill_dir):
+    """Writes entries to a new NDJSON file, atomically renamed into spill_dir."""
+    os.makedirs(spill_dir, exist_ok=True)
+    name = f"txlog-{timezone.now():%Y%m%d%H%M%S}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    tmp_path = os.path.join(spill_dir, name + ".tmp")
+    with open(tmp_path, "w") as fh:
+        for entry in entries:
+            fh.write(json.dumps(_to_record(entry), cls=DjangoJSONEncoder))
+            fh.write("\n")
+    path = os.path.join(spill_dir, name + SPILL_SUFFIX)
+    os.replace(tmp_path, path)
+    return path
+
+
+def ingest_spill_file(path, batch_size=1000):
+    """Loads one spill file into TransactionLog and deletes it. Returns the row count."""
+    entries = []
+    with open(path) as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record["timestamp"] = parse_datetime(record["timestamp"])
+            entries.append(TransactionLog(**record))
+
+    with transaction.atomic():
+        TransactionLog.objects.bulk_create(entries, batch_size=batch_size)
+    os.remove(path)
+    return len(entries)
+
+
+def pending_spill_files(spill_dir=None):
+    spill_dir = spill_dir or _spill_dir()
+    if not spill_dir or not os.path.isdir(spill_dir):
+        return []
+    return sorted(
+        os.path.join(spill_dir, name) for name in os.listdir(spill_dir) if name.endswith(SPILL_SUFFIX)
+    )
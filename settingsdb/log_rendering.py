@@ -0,0 +1,296 @@
+"""
+Human-readable rendering of TransactionLog entries.
+
+The text is rendered once, when the entry is written (settingsdb.log_buffer),
+and stored on the row as `description` (HTML) and `summary` (plain text), so
+list pages never re-parse `changes`. The log_filters template filters fall back
+to these functions for rows written before the columns existed; those rows can
+be backfilled with `manage.py render_transaction_logs`.
+"""
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+SUMMARY_MAX_LENGTH = 2000
+# Keys that are bookkeeping rather than data
+SUMMARY_SKIP_KEYS = {'app', 'diff', 'csrfmiddlewaretoken'}
+
+
+def describe_activity(table_name, action, changes):
+    """Short HTML sentence describing the change; values from `changes` are escaped."""
+    changes_dict = changes if isinstance(changes, dict) else {}
+
+    def _get(key, default='N/A'):
+        return conditional_escape(changes_dict.get(key, default))
+
+    description = ""
+    try:
+        # Handle different models with specific formatting
+        if table_name == 'Student':
+            student_id = _get('student_id', 'N/A')
+            full_name = f"{_get('first_name', '')} {_get('last_name', '')}".strip()
+            if action == 'CREATE':
+                description = f"Enrolled new student <strong>{full_name}</strong> with ID <strong>{student_id}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated profile for student <strong>{full_name}</strong> (ID: <strong>{student_id}</strong>)"
+            elif action == 'DELETE':
+                description = f"Removed student <strong>{full_name}</strong> (ID: <strong>{student_id}</strong>)"
+
+        elif table_name == 'Payment':
+            payment_id = _get('payment_id', 'N/A')
+            student_name = _get('student', 'N/A')
+            if action == 'CREATE':
+                description = f"Created new payment record <strong>{payment_id}</strong> for student <strong>{student_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated payment details for <strong>{payment_id}</strong> (Student: <strong>{student_name}</strong>)"
+            elif action == 'DELETE':
+                description = f"Deleted payment record <strong>{payment_id}</strong> for student <strong>{student_name}</strong>"
+
+        elif table_name == 'Batch':
+            batch_id = _get('batch_id', 'N/A')
+            course_name = _get('course', 'N/A')
+            if action == 'CREATE':
+                description = f"Created new batch <strong>{batch_id}</strong> for course <strong>{course_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated batch <strong>{batch_id}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted batch <strong>{batch_id}</strong>"
+
+        elif table_name == 'Placement':
+            student_name = _get('student', 'N/A')
+            if action == 'CREATE':
+                description = f"Initiated placement process for <strong>{student_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated placement status for <strong>{student_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Removed placement record for <strong>{student_name}</strong>"
+
+        elif table_name == 'Course':
+            course_name = _get('course_name', 'N/A')
+            course_code = _get('code', 'N/A')
+            if action == 'CREATE':
+                description = f"Added new course <strong>{course_name}</strong> with code <strong>{course_code}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated course details for <strong>{course_name}</strong> (Code: <strong>{course_code}</strong>)"
+            elif action == 'DELETE':
+                description = f"Deleted course <strong>{course_name}</strong> (Code: <strong>{course_code}</strong>)"
+
+        elif table_name == 'CourseCategory':
+            category_name = _get('name', 'N/A')
+            category_code = _get('code', 'N/A')
+            if action == 'CREATE':
+                description = f"Created new course category <strong>{category_name}</strong> with code <strong>{category_code}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated course category <strong>{category_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted course category <strong>{category_name}</strong>"
+
+        elif table_name == 'Consultant':
+            consultant_name = _get('name', 'N/A')
+            consultant_id = _get('consultant_id', 'N/A')
+            if action == 'CREATE':
+                description = f"Onboarded new consultant <strong>{consultant_name}</strong> with ID <strong>{consultant_id}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated profile for consultant <strong>{consultant_name}</strong> (ID: <strong>{consultant_id}</strong>)"
+            elif action == 'DELETE':
+                description = f"Removed consultant <strong>{consultant_name}</strong> (ID: <strong>{consultant_id}</strong>)"
+
+        elif table_name == 'Company':
+            company_name = _get('company_name', 'N/A')
+            company_code = _get('company_code', 'N/A')
+            if action == 'CREATE':
+                description = f"Registered new company <strong>{company_name}</strong> with code <strong>{company_code}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated profile for company <strong>{company_name}</strong> (Code: <strong>{company_code}</strong>)"
+            elif action == 'DELETE':
+                description = f"Deleted company <strong>{company_name}</strong> (Code: <strong>{company_code}</strong>)"
+
+        elif table_name == 'Trainer':
+            trainer_name = _get('name', 'N/A')
+            trainer_id = _get('trainer_id', 'N/A')
+            if action == 'CREATE':
+                description = f"Onboarded new trainer <strong>{trainer_name}</strong> with ID <strong>{trainer_id}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated profile for trainer <strong>{trainer_name}</strong> (ID: <strong>{trainer_id}</strong>)"
+            elif action == 'DELETE':
+                description = f"Removed trainer <strong>{trainer_name}</strong> (ID: <strong>{trainer_id}</strong>)"
+
+        elif table_name == 'CustomUser':
+            user_name = _get('name', 'N/A')
+            user_role = _get('role', 'N/A')
+            if action == 'CREATE':
+                description = f"Created new user <strong>{user_name}</strong> with role <strong>{user_role}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated profile for user <strong>{user_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted user <strong>{user_name}</strong>"
+
+        elif table_name == 'CourseModule':
+            module_name = _get('name', 'N/A')
+            course_name = _get('course', 'N/A')
+            if action == 'CREATE':
+                description = f"Added new module <strong>{module_name}</strong> to course <strong>{course_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated module <strong>{module_name}</strong> in course <strong>{course_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted module <strong>{module_name}</strong> from course <strong>{course_name}</strong>"
+
+        elif table_name == 'Topic':
+            topic_name = _get('name', 'N/A')
+            module_name = _get('module', 'N/A')
+            if action == 'CREATE':
+                description = f"Added new topic <strong>{topic_name}</strong> to module <strong>{module_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated topic <strong>{topic_name}</strong> in module <strong>{module_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted topic <strong>{topic_name}</strong> from module <strong>{module_name}</strong>"
+
+        elif table_name == 'ConsultantProfile':
+            user_name = _get('user', 'N/A')
+            consultant_name = _get('consultant', 'N/A')
+            if action == 'CREATE':
+                description = f"Linked user <strong>{user_name}</strong> to consultant profile <strong>{consultant_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated consultant profile for <strong>{consultant_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Unlinked user from consultant profile <strong>{consultant_name}</strong>"
+
+        elif table_name == 'Goal':
+            goal_title = _get('title', 'N/A')
+            consultant_name = _get('consultant', 'N/A')
+            if action == 'CREATE':
+                description = f"Set new goal '<strong>{goal_title}</strong>' for consultant <strong>{consultant_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated goal '<strong>{goal_title}</strong>' for consultant <strong>{consultant_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted goal '<strong>{goal_title}</strong>' for consultant <strong>{consultant_name}</strong>"
+
+        elif table_name == 'Achievement':
+            achievement_title = _get('title', 'N/A')
+            consultant_name = _get('consultant', 'N/A')
+            if action == 'CREATE':
+                description = f"Recorded new achievement '<strong>{achievement_title}</strong>' for consultant <strong>{consultant_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated achievement '<strong>{achievement_title}</strong>' for consultant <strong>{consultant_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted achievement '<strong>{achievement_title}</strong>' for consultant <strong>{consultant_name}</strong>"
+
+        elif table_name == 'CompanyInterview':
+            company_name = _get('company', 'N/A')
+            student_name = _get('student', 'N/A')
+            interview_round = _get('interview_round', 'N/A')
+            if action == 'CREATE':
+                description = f"Scheduled <strong>{interview_round}</strong> interview for <strong>{student_name}</strong> with <strong>{company_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated <strong>{interview_round}</strong> interview details for <strong>{student_name}</strong> with <strong>{company_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Canceled <strong>{interview_round}</strong> interview for <strong>{student_name}</strong> with <strong>{company_name}</strong>"
+
+        elif table_name == 'ResumeSharedStatus':
+            company_name = _get('company', 'N/A')
+            status = _get('status', 'N/A')
+            if action == 'CREATE':
+                description = f"Shared resume with <strong>{company_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated resume status to <strong>{status}</strong> for company <strong>{company_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted resume sharing status for <strong>{company_name}</strong>"
+
+        elif table_name == 'Interview':
+            company_name = _get('company', 'N/A')
+            applying_role = _get('applying_role', 'N/A')
+            interview_round = _get('interview_round', 'N/A')
+            if action == 'CREATE':
+                description = f"Scheduled <strong>{interview_round}</strong> interview for <strong>{applying_role}</strong> at <strong>{company_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated <strong>{interview_round}</strong> interview details for <strong>{applying_role}</strong> at <strong>{company_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Canceled <strong>{interview_round}</strong> interview for <strong>{applying_role}</strong> at <strong>{company_name}</strong>"
+
+        elif table_name == 'InterviewStudent':
+            student_name = _get('student', 'N/A')
+            interview_role = _get('interview', 'N/A')
+            status = _get('status', 'N/A')
+            if action == 'CREATE':
+                description = f"Added <strong>{student_name}</strong> to the interview for <strong>{interview_role}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated interview status for <strong>{student_name}</strong> to <strong>{status}</strong> for the <strong>{interview_role}</strong> role"
+            elif action == 'DELETE':
+                description = f"Removed <strong>{student_name}</strong> from the interview for <strong>{interview_role}</strong>"
+
+        elif table_name == 'SourceOfJoining':
+            source_name = _get('name', 'N/A')
+            if action == 'CREATE':
+                description = f"Added new joining source: <strong>{source_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated joining source to <strong>{source_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted joining source: <strong>{source_name}</strong>"
+
+        elif table_name == 'PaymentAccount':
+            account_name = _get('name', 'N/A')
+            if action == 'CREATE':
+                description = f"Added new payment account: <strong>{account_name}</strong>"
+            elif action == 'UPDATE':
+                description = f"Updated payment account: <strong>{account_name}</strong>"
+            elif action == 'DELETE':
+                description = f"Deleted payment account: <strong>{account_name}</strong>"
+
+        elif table_name == 'UserSettings':
+            user_name = _get('user', 'N/A')
+            enable_2fa = changes_dict.get('enable_2fa', False)
+            if action == 'CREATE':
+                description = f"Configured initial settings for user <strong>{user_name}</strong>"
+            elif action == 'UPDATE':
+                status = "enabled" if enable_2fa else "disabled"
+                description = f"Updated settings for user <strong>{user_name}</strong> (2FA is now <strong>{status}</strong>)"
+            elif action == 'DELETE':
+                description = f"Deleted all settings for user <strong>{user_name}</strong>"
+
+    except Exception:
+        description = ""
+
+    # Default fallback if no specific formatting is defined
+    if not description:
+        if action == 'CREATE':
+            description = f"Created new {table_name}"
+        elif action == 'UPDATE':
+            description = f"Updated {table_name}"
+        elif action == 'DELETE':
+            description = f"Deleted {table_name}"
+        else:
+            description = f"{action} {table_name}"
+    return mark_safe(description)
+
+
+def _display(value):
+    if isinstance(value, list):
+        return ', '.join(map(str, value))
+    return value
+
+
+def summarize_changes(action, changes):
+    """Plain-text lines: the field diff of an update, the logged values otherwise."""
+    if not isinstance(changes, dict):
+        return str(changes or '')[:SUMMARY_MAX_LENGTH]
+
+    lines = []
+    if action == 'UPDATE' and isinstance(changes.get('diff'), dict):
+        for key, value in changes['diff'].items():
+            if key in SUMMARY_SKIP_KEYS or not isinstance(value, dict):
+                continue
+            key_display = key.replace('_', ' ').title()
+            old_value, new_value = _display(value.get('old')), _display(value.get('new'))
+            if old_value is None or old_value == '':
+                lines.append(f"Set {key_display} to '{new_value}'")
+            else:
+                lines.append(f"Changed {key_display} from '{old_value}' to '{new_value}'")
+    else:
+        for key, value in changes.items():
+            if key in SUMMARY_SKIP_KEYS or value in (None, '', [], {}):
+                continue
+            lines.append(f"{key.replace('_', ' ').title()}: {_display(value)}")
+
+    summary = "\n".join(lines)
+    if len(summary) > SUMMARY_MAX_LENGTH:
+        summary = summary[:SUMMARY_MAX_LENGTH - 1] + '…'
+    return summary
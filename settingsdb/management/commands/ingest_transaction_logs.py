@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from settingsdb.log_buffer import pending_spill_files, ingest_spill_file
+
+
+class Command(BaseCommand):
+    help = 'Loads transaction log entries spilled to NDJSON (TRANSACTION_LOG_SPILL_DIR) into TransactionLog.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='Spill directory (defaults to settings.TRANSACTION_LOG_SPILL_DIR)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--watch', action='store_true', help='Keep polling for new files')
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            for path in pending_spill_files(options['dir']):
+                count = ingest_spill_file(path, options['batch_size'])
+                self.stdout.write(f"Ingested {count} entries from {path}")
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
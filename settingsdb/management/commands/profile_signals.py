@@ -0,0 +1,69 @@
+import json
+import shlex
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from settingsdb import signal_profiler
+
+
+class Command(BaseCommand):
+    help = (
+        'Reports per-model save/delete cost and per-receiver signal cost (time and queries). '
+        'Either profiles a workload in-process (--run "<command> <args>") or shows the window '
+        'published by workers running with SIGNAL_PROFILING enabled.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run', help='Management command (with arguments) to execute under the profiler')
+        parser.add_argument('--reset', action='store_true', help='Clear the aggregates of the current window')
+        parser.add_argument('--json', action='store_true', help='Print the raw snapshot as JSON')
+        parser.add_argument('--limit', type=int, default=20, help='Rows per section')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            signal_profiler.reset()
+
+        if options['run']:
+            argv = shlex.split(options['run'])
+            if not argv:
+                raise CommandError('--run needs a command name')
+            signal_profiler.reset()
+            was_enabled = signal_profiler.is_enabled()
+            signal_profiler.enable()
+            try:
+                call_command(*argv, stdout=self.stderr)
+            finally:
+                if not was_enabled:
+                    signal_profiler.disable()
+            report = signal_profiler.snapshot(include_workers=False)
+        else:
+            report = signal_profiler.snapshot()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self._print(report, options['limit'])
+
+    def _print(self, report, limit):
+        if not report['writes'] and not report['receivers']:
+            self.stdout.write('No profiled writes in the current window.')
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Writes ({report['workers']} worker(s), slowest total first)"))
+        self.stdout.write(f"{'model':40} {'op':7} {'calls':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>8} {'avg q':>6}")
+        for row in report['writes'][:limit]:
+            self.stdout.write(
+                f"{row['model']:40} {row['operation']:7} {row['calls']:>7} {row['total_ms']:>10.1f} "
+                f"{row['avg_ms']:>8.2f} {row['max_ms']:>8.2f} {row['avg_queries']:>6.1f}"
+            )
+
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING('Receivers (slowest total first)'))
+        self.stdout.write(f"{'model':28} {'signal':12} {'receiver':60} {'calls':>7} {'total ms':>10} {'avg q':>6} {'% save':>7}")
+        for row in report['receivers'][:limit]:
+            share = f"{row['share_of_save'] * 100:.0f}%" if row['share_of_save'] is not None else '-'
+            self.stdout.write(
+                f"{row['model'][:28]:28} {row['signal']:12} {row['receiver'][-60:]:60} {row['calls']:>7} "
+                f"{row['total_ms']:>10.1f} {row['avg_queries']:>6.1f} {share:>7}"
+            )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from settingsdb.log_rendering import describe_activity, summarize_changes
+from settingsdb.models import TransactionLog
+
+
+class Command(BaseCommand):
+    help = 'Stores the rendered description and summary on transaction log rows written before they were rendered at write time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true', help='Re-render every row, not only rows missing a description or summary')
+
+    def handle(self, *args, **options):
+        queryset = TransactionLog.objects.only('id', 'table_name', 'action', 'changes').order_by('id')
+        if not options['all']:
+            queryset = queryset.filter(Q(description='') | Q(summary__isnull=True))
+
+        last_id = 0
+        total = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:options['batch_size']])
+            if not batch:
+                break
+            for log in batch:
+                log.description = describe_activity(log.table_name, log.action, log.changes)
+                log.summary = summarize_changes(log.action, log.changes)
+            TransactionLog.objects.bulk_update(batch, ['description', 'summary'])
+            last_id = batch[-1].id
+            total += len(batch)
+            self.stdout.write(f"Rendered {total} entries...")
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {total} transaction log entries."))
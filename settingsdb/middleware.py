@@ -1,33 +1,29 @@
 # settingsdb/middleware.py
 from django.shortcuts import redirect
-from django.urls import reverse
-from .signals import set_current_user
-from threading import local
-
-_user = local()
+from accounts.route_table import get_route_table
+from core import commit_buffer, request_context
 
 class CaptureUserMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        self.route_table = get_route_table()
 
     def __call__(self, request):
-        if request.user.is_authenticated:
-            set_current_user(request.user)
-            
-            # Role-based access control logic
-            if request.user.role == 'batch_coordinator':
-                restricted_paths = [
-                    reverse('coursedb:category_list'),
-                    reverse('coursedb:category_create'),
-                ]
-                # Also handle dynamic URLs like category_update and category_delete
-                if request.path in restricted_paths or 'category/update' in request.path or 'category/delete' in request.path:
-                    return redirect('accounts:batch_coordination_dashboard')
-        else:
-            set_current_user(None)
-            
-        response = self.get_response(request)
-        
-        # Clear user after response to avoid leaking user data between requests
-        set_current_user(None)
-        return response
+        # User, role and client metadata for every log written while handling the request.
+        # The context is reset on exit, so nothing leaks into the next request on this worker.
+        with request_context.activate(request):
+            if request.user.is_authenticated:
+                # Role-based access control logic
+                if request.user.role == 'batch_coordinator':
+                    restricted_paths = [
+                        self.route_table.url('coursedb:category_list'),
+                        self.route_table.url('coursedb:category_create'),
+                    ]
+                    # Also handle dynamic URLs like category_update and category_delete
+                    if request.path in restricted_paths or 'category/update' in request.path or 'category/delete' in request.path:
+                        return redirect('accounts:batch_coordination_dashboard')
+
+            # Transaction log entries, audit events and other commit-time work
+            # (core.commit_buffer) are handled in bulk at the end of the request
+            with commit_buffer.request_scope():
+                return self.get_response(request)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('settingsdb', '0002_dbbackupimport'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transactionlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('settingsdb', '0003_transactionlog_timestamp_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transactionlog',
+            index=models.Index(fields=['table_name', 'object_id', 'timestamp'], name='txlog_object_time_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('settingsdb', '0004_transactionlog_txlog_object_time_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactionlog',
+            name='description',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='transactionlog',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddIndex(
+            model_name='transactionlog',
+            index=models.Index(fields=['timestamp', 'id'], name='txlog_time_id_idx'),
+        ),
+    ]
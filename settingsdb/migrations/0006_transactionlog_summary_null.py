@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:22
+
+from django.db import migrations, models
+
+
+def mark_unrendered(apps, schema_editor):
+    # '' used to mean both "not rendered yet" and "nothing changed"; NULL now marks the
+    # former, so render_transaction_logs (or the page, on the fly) renders them once more
+    TransactionLog = apps.get_model('settingsdb', 'TransactionLog')
+    TransactionLog.objects.filter(summary='').update(summary=None)
+
+
+def unmark_unrendered(apps, schema_editor):
+    TransactionLog = apps.get_model('settingsdb', 'TransactionLog')
+    TransactionLog.objects.filter(summary__isnull=True).update(summary='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('settingsdb', '0005_transactionlog_rendered_text'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transactionlog',
+            name='summary',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_unrendered, unmark_unrendered),
+    ]
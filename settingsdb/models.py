@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 import os
 from datetime import datetime
 
@@ -26,8 +27,19 @@ class TransactionLog(models.Model):
     table_name = models.CharField(max_length=100)
     object_id = models.CharField(max_length=100)
     action = models.CharField(max_length=10, choices=ACTION_CHOICES)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the change happens; entries are written later in bulk (settingsdb.log_buffer)
+    timestamp = models.DateTimeField(default=timezone.now)
     changes = models.JSONField()
+    # Rendered once at write time (settingsdb.log_rendering) so list pages never re-parse `changes`.
+    # summary is NULL until rendered; an empty summary (no-op update) is stored as ''.
+    description = models.TextField(blank=True, default='')
+    summary = models.TextField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['table_name', 'object_id', 'timestamp'], name='txlog_object_time_idx'),
+            models.Index(fields=['timestamp', 'id'], name='txlog_time_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.timestamp} | {self.table_name} | {self.action}"
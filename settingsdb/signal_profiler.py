@@ -0,0 +1,258 @@
+"""
+Opt-in profiler for model writes: how long each save()/delete() takes end to
+end, and how much of that each signal receiver costs (wall time and queries).
+
+enable() wraps:
+- send() of the model signals (pre/post init, save, delete and m2m_changed),
+  so every receiver call is timed and its queries counted;
+- save() and delete() of every model, including the custom overrides
+  (Batch.save, Payment.save, ...). Only the outermost call per instance is
+  recorded, so an override calling super().save() counts once, while nested
+  writes of other rows (Batch.save writing a BatchTransaction) show up on
+  their own and inside their parent's total.
+
+Stats are aggregated per process over SIGNAL_PROFILING_WINDOW seconds and
+published to the cache every few seconds; snapshot() merges every worker
+sharing the cache backend. Turned on by settings.SIGNAL_PROFILING (see
+SettingsdbConfig.ready()), `manage.py profile_signals --run ...`, or enable().
+"""
+import os
+import socket
+import threading
+import time
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Model
+from django.db.models import signals as model_signals
+from django.dispatch.dispatcher import NO_RECEIVERS
+
+PROFILED_SIGNALS = ("pre_init", "post_init", "pre_save", "post_save", "pre_delete", "post_delete", "m2m_changed")
+PUBLISH_INTERVAL = 5.0
+CACHE_PREFIX = "signal_profile"
+WORKERS_KEY = f"{CACHE_PREFIX}:workers"
+
+_lock = threading.RLock()
+_local = threading.local()
+_patched = []  # (owner, attribute, original or None when it was not set on the owner)
+
+_stats = {"receivers": {}, "writes": {}}
+_window_started = time.time()
+_last_published = 0.0
+
+
+def is_enabled():
+    return bool(_patched)
+
+
+def _window():
+    return getattr(settings, "SIGNAL_PROFILING_WINDOW", 300)
+
+
+def _worker_key():
+    return f"{CACHE_PREFIX}:{socket.gethostname()}:{os.getpid()}"
+
+
+def _callable_name(func):
+    func = getattr(func, "__func__", func)
+    return f"{getattr(func, '__module__', '?')}.{getattr(func, '__qualname__', repr(func))}"
+
+
+def _sender_name(sender):
+    meta = getattr(sender, "_meta", None)
+    return meta.label if meta is not None else _callable_name(sender)
+
+
+class _QueryCounter:
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _timed_call(func, args, kwargs):
+    """Calls func; returns (result, elapsed ms, queries issued)."""
+    counter = _QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        result = func(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000, counter.count
+
+
+def _record(kind, key, elapsed_ms, queries):
+    global _window_started
+    now = time.time()
+    with _lock:
+        if now - _window_started > _window():
+            _stats["receivers"].clear()
+            _stats["writes"].clear()
+            _window_started = now
+        entry = _stats[kind].get(key)
+        if entry is None:
+            entry = _stats[kind][key] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "queries": 0}
+        entry["calls"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["queries"] += queries
+        if now - _last_published > PUBLISH_INTERVAL:
+            publish()
+
+
+def _make_send(signal, signal_name):
+    original = signal.send
+
+    def send(sender, **named):
+        # Same dispatch as Signal.send, one timed call per receiver
+        if not signal.receivers or signal.sender_receivers_cache.get(sender) is NO_RECEIVERS:
+            return []
+        sync_receivers, async_receivers = signal._live_receivers(sender)
+        if async_receivers:
+            return original(sender, **named)
+        sender_name = _sender_name(sender)
+        responses = []
+        for receiver in sync_receivers:
+            response, elapsed_ms, queries = _timed_call(receiver, (), dict(signal=signal, sender=sender, **named))
+            _record("receivers", (sender_name, signal_name, _callable_name(receiver)), elapsed_ms, queries)
+            responses.append((receiver, response))
+        return responses
+
+    return send
+
+
+def _make_write(method, operation):
+    @wraps(method)
+    def write(self, *args, **kwargs):
+        active = getattr(_local, "active", None)
+        if active is None:
+            active = _local.active = set()
+        key = (operation, id(self))
+        if key in active:
+            return method(self, *args, **kwargs)  # super() call of an override
+        active.add(key)
+        try:
+            result, elapsed_ms, queries = _timed_call(method, (self, *args), kwargs)
+        finally:
+            active.discard(key)
+        _record("writes", (type(self)._meta.label, operation), elapsed_ms, queries)
+        return result
+
+    return write
+
+
+def _patch(owner, attribute, replacement):
+    _patched.append((owner, attribute, owner.__dict__.get(attribute)))
+    setattr(owner, attribute, replacement)
+
+
+def enable():
+    """Installs the instrumentation (idempotent)."""
+    with _lock:
+        if _patched:
+            return
+        for name in PROFILED_SIGNALS:
+            signal = getattr(model_signals, name)
+            _patch(signal, "send", _make_send(signal, name))
+
+        for owner in (Model, *apps.get_models()):
+            for operation in ("save", "delete"):
+                method = owner.__dict__.get(operation)
+                if method is not None:
+                    _patch(owner, operation, _make_write(method, operation))
+
+
+def disable():
+    with _lock:
+        while _patched:
+            owner, attribute, original = _patched.pop()
+            if original is None:
+                delattr(owner, attribute)
+            else:
+                setattr(owner, attribute, original)
+
+
+def reset():
+    global _window_started
+    with _lock:
+        _stats["receivers"].clear()
+        _stats["writes"].clear()
+        _window_started = time.time()
+    cache.delete(_worker_key())
+
+
+def _local_snapshot():
+    with _lock:
+        return {
+            "window_started": _window_started,
+            "receivers": [dict(zip(("model", "signal", "receiver"), key), **value) for key, value in _stats["receivers"].items()],
+            "writes": [dict(zip(("model", "operation"), key), **value) for key, value in _stats["writes"].items()],
+        }
+
+
+def publish():
+    """Stores this worker's aggregates in the cache for snapshot() in other processes."""
+    global _last_published
+    _last_published = time.time()
+    key = _worker_key()
+    cache.set(key, _local_snapshot(), _window() * 2)
+    workers = set(cache.get(WORKERS_KEY) or ())
+    if key not in workers:
+        workers.add(key)
+        cache.set(WORKERS_KEY, sorted(workers), None)
+
+
+def _merge(rows, key_fields):
+    merged = {}
+    for row in rows:
+        key = tuple(row[field] for field in key_fields)
+        entry = merged.get(key)
+        if entry is None:
+            merged[key] = dict(row)
+            continue
+        entry["calls"] += row["calls"]
+        entry["total_ms"] += row["total_ms"]
+        entry["max_ms"] = max(entry["max_ms"], row["max_ms"])
+        entry["queries"] += row["queries"]
+    result = []
+    for row in merged.values():
+        row["total_ms"] = round(row["total_ms"], 3)
+        row["max_ms"] = round(row["max_ms"], 3)
+        row["avg_ms"] = round(row["total_ms"] / row["calls"], 3)
+        row["avg_queries"] = round(row["queries"] / row["calls"], 2)
+        result.append(row)
+    return sorted(result, key=lambda row: row["total_ms"], reverse=True)
+
+
+def snapshot(include_workers=True):
+    """Aggregates of this process, merged with the other workers' published ones, slowest first."""
+    snapshots = [_local_snapshot()]
+    if include_workers:
+        own_key = _worker_key()
+        for key in cache.get(WORKERS_KEY) or ():
+            if key != own_key:
+                published = cache.get(key)
+                if published:
+                    snapshots.append(published)
+
+    writes = _merge([row for snap in snapshots for row in snap["writes"]], ("model", "operation"))
+    receivers = _merge([row for snap in snapshots for row in snap["receivers"]], ("model", "signal", "receiver"))
+    # Share of each model's write time spent in a receiver
+    write_totals = {(row["model"]): row["total_ms"] for row in writes if row["operation"] == "save"}
+    for row in receivers:
+        total = write_totals.get(row["model"])
+        row["share_of_save"] = round(row["total_ms"] / total, 3) if total and row["signal"] in ("pre_save", "post_save") else None
+
+    return {
+        "enabled": is_enabled(),
+        "workers": len(snapshots),
+        "window_seconds": _window(),
+        "window_started": min(snap["window_started"] for snap in snapshots),
+        "writes": writes,
+        "receivers": receivers,
+    }
@@ -0,0 +1,180 @@
+"""
+Compiled per-model plans behind settingsdb.signals.serialize_model_instance.
+
+A plan is built once per model: the field list, a converter per field and, for
+foreign keys, how the related row is labelled. Serializing an instance then only
+walks the plan:
+
+- foreign keys record the raw id under the attname (e.g. "course_id") and a
+  display label under the field name (e.g. "course"). The label comes from the
+  related object if it is already cached on the instance, then from the label
+  cache, and only then from a single-column query. Relations are never loaded
+  just to be logged.
+- many-to-many membership is captured only for fields opted in through
+  tracking.track_changes(model, m2m=...), as ids from one values_list query.
+"""
+from datetime import datetime, date, time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import FileField, DateField, TimeField, DecimalField
+
+from . import tracking
+
+LABEL_CACHE_TTL = 60 * 60  # 1 hour; tracked models refresh their own label on save
+
+# model class -> _Plan
+_plans = {}
+# related model class -> label column name, or None to label the object itself
+_label_columns = {}
+
+
+def _date_value(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def _time_value(value):
+    return value.strftime('%H:%M:%S') if isinstance(value, time) else value
+
+
+def _decimal_value(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _file_value(value):
+    if value and getattr(value, 'name', None):
+        try:
+            return value.url
+        except ValueError:
+            return None  # No file associated
+    return None
+
+
+def _converter(field):
+    # DateTimeField subclasses DateField
+    if isinstance(field, DateField):
+        return _date_value
+    if isinstance(field, TimeField):
+        return _time_value
+    if isinstance(field, DecimalField):
+        return _decimal_value
+    if isinstance(field, FileField):
+        return _file_value
+    return None
+
+
+def display_label(obj):
+    """Human-readable identifier of a related object (same priority as before the plans)."""
+    if hasattr(obj, 'get_display_name'):
+        return obj.get_display_name()
+    if hasattr(obj, 'name'):
+        return obj.name
+    if hasattr(obj, 'course_name'):
+        return obj.course_name
+    return str(obj)
+
+
+def _label_column(model):
+    """A concrete column equal to display_label(obj), or None when the object itself is needed."""
+    try:
+        return _label_columns[model]
+    except KeyError:
+        pass
+
+    column = None
+    concrete = {f.attname for f in model._meta.concrete_fields}
+    if not hasattr(model, 'get_display_name'):
+        if 'name' in concrete:
+            column = 'name'
+        elif not hasattr(model, 'name') and 'course_name' in concrete:
+            column = 'course_name'
+    _label_columns[model] = column
+    return column
+
+
+def _label_key(model, pk):
+    return f"txlog_label_{model._meta.label_lower}_{pk}"
+
+
+def remember_label(instance):
+    """Refreshes the cached label of a saved instance, so renames show up immediately."""
+    model = type(instance)
+    key = _label_key(model, instance.pk)
+    column = _label_column(model)
+    if column and column in instance.__dict__:
+        cache.set(key, instance.__dict__[column], LABEL_CACHE_TTL)
+    else:
+        # str() may follow relations; let the next lookup rebuild it
+        cache.delete(key)
+
+
+def related_label(instance, field):
+    pk = instance.__dict__.get(field.attname)
+    if pk is None:
+        return None
+
+    model = field.related_model
+    related = instance._state.fields_cache.get(field.name)
+    if related is not None and related.pk == pk:
+        label = display_label(related)
+        cache.set(_label_key(model, pk), label, LABEL_CACHE_TTL)
+        return label
+
+    key = _label_key(model, pk)
+    label = cache.get(key)
+    if label is None:
+        column = _label_column(model)
+        manager = model._base_manager
+        if column:
+            label = manager.filter(pk=pk).values_list(column, flat=True).first()
+        else:
+            obj = manager.filter(pk=pk).first()
+            label = display_label(obj) if obj is not None else None
+        if label is not None:
+            cache.set(key, label, LABEL_CACHE_TTL)
+    return label
+
+
+class _Plan:
+    def __init__(self, model):
+        self.values = []        # (name, attname, converter)
+        self.foreign_keys = []  # field
+        for field in model._meta.concrete_fields:
+            if field.is_relation:
+                self.foreign_keys.append(field)
+            else:
+                self.values.append((field.name, field.attname, _converter(field)))
+        m2m = set(tracking.tracked_m2m_fields(model))
+        self.many_to_many = [f.name for f in model._meta.local_many_to_many if f.name in m2m]
+
+    def serialize(self, instance):
+        data = {}
+        values = instance.__dict__
+        for name, attname, convert in self.values:
+            if attname not in values:
+                continue  # deferred
+            value = values[attname]
+            data[name] = convert(value) if convert else value
+
+        for field in self.foreign_keys:
+            if field.attname not in values:
+                continue
+            data[field.attname] = values[field.attname]
+            data[field.name] = related_label(instance, field)
+
+        if instance.pk is not None:
+            for name in self.many_to_many:
+                data[name] = sorted(getattr(instance, name).values_list('pk', flat=True))
+        return data
+
+
+def get_plan(model):
+    plan = _plans.get(model)
+    if plan is None:
+        plan = _plans[model] = _Plan(model)
+    return plan
+
+
+def clear_plans():
+    _plans.clear()
+    _label_columns.clear()
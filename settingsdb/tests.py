@@ -143,3 +143,464 @@ class DBBackupImportTest(TestCase):
         
         # Check that no DBBackupImport record was created
         self.assertEqual(DBBackupImport.objects.count(), 0)
+
+
+class ChangeTrackingTest(TestCase):
+    def setUp(self):
+        from .signals import set_current_user
+        self.user = User.objects.create_user(email='tracker@example.com', name='Tracker', role='admin', password='pw')
+        set_current_user(self.user)
+
+    def tearDown(self):
+        from .signals import set_current_user
+        set_current_user(None)
+
+    def test_update_diffs_against_snapshot_without_select(self):
+        from .models import SourceOfJoining, TransactionLog
+
+        source = SourceOfJoining.objects.create(name='Referral')
+        source = SourceOfJoining.objects.get(pk=source.pk)
+        source.name = 'Walk-in'
+        # UPDATE + TransactionLog INSERT on commit, no re-fetch of the old row
+        with self.assertNumQueries(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                source.save()
+
+        log = TransactionLog.objects.filter(table_name='SourceOfJoining', action='UPDATE').get()
+        self.assertEqual(log.changes['diff'], {'name': {'old': 'Referral', 'new': 'Walk-in'}})
+
+        # The saved state becomes the baseline of the next save
+        source.name = 'Website'
+        with self.captureOnCommitCallbacks(execute=True):
+            source.save()
+        log = TransactionLog.objects.filter(table_name='SourceOfJoining', action='UPDATE').latest('id')
+        self.assertEqual(log.changes['diff'], {'name': {'old': 'Walk-in', 'new': 'Website'}})
+
+    def test_interleaved_saves_keep_their_own_state(self):
+        from .models import SourceOfJoining, PaymentAccount, TransactionLog
+
+        source = SourceOfJoining.objects.create(name='Referral')
+        account = PaymentAccount.objects.create(name='HDFC')
+        source = SourceOfJoining.objects.get(pk=source.pk)
+        account = PaymentAccount.objects.get(pk=account.pk)
+
+        source.name = 'Walk-in'
+        account.name = 'ICICI'
+        with self.captureOnCommitCallbacks(execute=True):
+            account.save()
+            source.save()
+
+        self.assertEqual(
+            TransactionLog.objects.get(table_name='SourceOfJoining', action='UPDATE').changes['diff'],
+            {'name': {'old': 'Referral', 'new': 'Walk-in'}},
+        )
+        self.assertEqual(
+            TransactionLog.objects.get(table_name='PaymentAccount', action='UPDATE').changes['diff'],
+            {'name': {'old': 'HDFC', 'new': 'ICICI'}},
+        )
+
+    def test_in_place_json_mutation_is_detected(self):
+        from datetime import date
+        from batchdb.models import Batch
+        from .models import TransactionLog
+
+        Batch.objects.create(batch_id='PYAA', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1), days=['Mon'])
+        batch = Batch.objects.get(batch_id='PYAA')
+        batch.days.append('Wed')
+        with self.captureOnCommitCallbacks(execute=True):
+            batch.save()
+
+        log = TransactionLog.objects.filter(table_name='Batch', action='UPDATE').get()
+        self.assertEqual(log.changes['diff']['days'], {'old': ['Mon'], 'new': ['Mon', 'Wed']})
+
+    def test_instance_built_in_memory_is_diffed_against_stored_row(self):
+        from .models import SourceOfJoining, TransactionLog
+
+        stored = SourceOfJoining.objects.create(name='Referral')
+        with self.captureOnCommitCallbacks(execute=True):
+            SourceOfJoining(pk=stored.pk, name='Campus').save()
+
+        log = TransactionLog.objects.filter(table_name='SourceOfJoining', action='UPDATE').get()
+        self.assertEqual(log.changes['diff'], {'name': {'old': 'Referral', 'new': 'Campus'}})
+
+    def test_only_loaded_rows_are_snapshotted(self):
+        from .models import SourceOfJoining
+        from .tracking import SNAPSHOT_ATTR
+
+        built = SourceOfJoining(name='Walk-in')
+        self.assertNotIn(SNAPSHOT_ATTR, built.__dict__)
+        built.save()
+        self.assertEqual(built.__dict__[SNAPSHOT_ATTR]['name'], 'Walk-in')
+
+        loaded = SourceOfJoining.objects.get(pk=built.pk)
+        self.assertEqual(loaded.__dict__[SNAPSHOT_ATTR]['name'], 'Walk-in')
+
+    def test_models_logged_before_the_registry_are_tracked(self):
+        from django.apps import apps
+        from .tracking import is_tracked
+
+        for label in (
+            'batchdb.TransferRequest', 'batchdb.TrainerHandover', 'batchdb.BatchTransaction',
+            'studentsdb.StudentProfessionalProfile', 'trainersdb.TrainerProfile',
+            'rbac.Role', 'rbac.Permission', 'rbac.RolePermission', 'rbac.UserRole',
+            'rbac.OnboardRequest', 'rbac.RoleSequence', 'settingsdb.DBBackupImport',
+            'profiles.RoleProfileConfig', 'profiles.GenericProfile', 'locations.Country',
+            'locations.City', 'ui_engine.UIModule', 'ui_engine.UserUIPreference',
+        ):
+            self.assertTrue(is_tracked(apps.get_model(label)), label)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            from rbac.models import Role
+            Role.objects.create(code='TMP', name='Temp')
+        from .models import TransactionLog
+        self.assertTrue(TransactionLog.objects.filter(table_name='Role', action='CREATE').exists())
+
+    def test_excluded_models_are_not_logged(self):
+        from django.apps import apps
+        from accounts.models import EmailOutbox
+        from accounts.utils import queue_email
+        from .models import TransactionLog
+        from .tracking import is_tracked
+
+        self.assertFalse(is_tracked(TransactionLog))
+        self.assertFalse(is_tracked(EmailOutbox))
+        for label in (
+            'batchdb.BatchImportJob', 'batchdb.BatchExportJob', 'batchdb.BatchSequence',
+            'batchdb.BatchSearchDocument', 'paymentdb.PaymentSequence',
+        ):
+            self.assertFalse(is_tracked(apps.get_model(label)), label)
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_email('Welcome', 'Password: secret', ['new@example.com'])
+        self.assertFalse(TransactionLog.objects.filter(table_name='EmailOutbox').exists())
+
+
+class SnapshotPlanTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from coursedb.models import Course, CourseCategory
+        from trainersdb.models import Trainer
+        from .signals import set_current_user
+
+        cache.clear()
+        self.user = User.objects.create_user(email='plans@example.com', name='Plans', role='admin', password='pw')
+        set_current_user(self.user)
+        category = CourseCategory.objects.create(name='Programming', code='C1')
+        self.course = Course.objects.create(course_name='Python', code='PY', category=category, total_duration=40)
+        self.trainer = Trainer.objects.create(trainer_id='TR0001', name='Asha', employment_type='FT')
+
+    def tearDown(self):
+        from .signals import set_current_user
+        set_current_user(None)
+
+    def test_foreign_keys_are_logged_as_id_and_cached_label(self):
+        from datetime import date
+        from django.core.cache import cache
+        from batchdb.models import Batch
+        from .signals import serialize_model_instance
+
+        Batch.objects.create(
+            batch_id='PYAB', course=self.course, trainer=self.trainer,
+            start_date=date(2026, 1, 1), end_date=date(2026, 2, 1),
+        )
+        cache.clear()
+        batch = Batch.objects.get(batch_id='PYAB')
+
+        # One single-column query per related label, relations stay unloaded
+        with self.assertNumQueries(2):
+            data = serialize_model_instance(batch)
+        self.assertEqual(data['course_id'], self.course.pk)
+        self.assertEqual(data['course'], 'Python')
+        self.assertEqual(data['trainer_id'], self.trainer.pk)
+        self.assertEqual(data['trainer'], 'Asha')
+        self.assertEqual(data['start_date'], '2026-01-01')
+        self.assertNotIn('students', data)
+        self.assertFalse(batch._state.fields_cache)
+
+        # Labels are cached for the next serialization
+        with self.assertNumQueries(0):
+            serialize_model_instance(batch)
+
+    def test_saving_a_related_object_refreshes_its_label(self):
+        from datetime import date
+        from batchdb.models import Batch
+        from .signals import serialize_model_instance
+
+        batch = Batch.objects.create(
+            batch_id='PYAC', course=self.course, start_date=date(2026, 1, 1), end_date=date(2026, 2, 1),
+        )
+        batch = Batch.objects.get(pk=batch.pk)
+        self.course.course_name = 'Advanced Python'
+        self.course.save()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(serialize_model_instance(batch)['course'], 'Advanced Python')
+
+    def test_many_to_many_is_opt_in_and_read_with_one_query(self):
+        from .signals import serialize_model_instance
+        from .tracking import tracked_m2m_fields
+
+        self.assertEqual(tracked_m2m_fields(type(self.trainer)), ('stack',))
+        self.trainer.stack.set([self.course])
+        with self.assertNumQueries(1):
+            data = serialize_model_instance(self.trainer)
+        self.assertEqual(data['stack'], [self.course.pk])
+
+
+class TransactionLogBufferTest(TestCase):
+    def setUp(self):
+        from .signals import set_current_user
+        self.user = User.objects.create_user(email='buffer@example.com', name='Buffer', role='admin', password='pw')
+        set_current_user(self.user)
+
+    def tearDown(self):
+        from .signals import set_current_user
+        set_current_user(None)
+
+    def test_request_scope_writes_committed_entries_in_one_insert(self):
+        from django.db import transaction
+        from core import commit_buffer
+        from .models import SourceOfJoining, TransactionLog
+        from . import log_buffer
+
+        with commit_buffer.request_scope():
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(50):
+                    SourceOfJoining.objects.create(name=f'Source {i}')
+                try:
+                    with transaction.atomic():
+                        SourceOfJoining.objects.create(name='Rolled back')
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+            # Nothing written until the scope ends
+            self.assertEqual(TransactionLog.objects.count(), 0)
+            with self.assertNumQueries(1):
+                log_buffer.flush()
+
+        self.assertEqual(TransactionLog.objects.filter(table_name='SourceOfJoining', action='CREATE').count(), 50)
+        self.assertFalse(TransactionLog.objects.filter(changes__name='Rolled back').exists())
+
+    def test_large_flush_spills_to_ndjson_and_is_ingested(self):
+        import tempfile
+        from django.core.management import call_command
+        from django.test import override_settings
+        from io import StringIO
+        from core import commit_buffer
+        from .models import SourceOfJoining, TransactionLog
+        from . import log_buffer
+
+        with tempfile.TemporaryDirectory() as spill_dir:
+            with override_settings(TRANSACTION_LOG_SPILL_DIR=spill_dir, TRANSACTION_LOG_SPILL_THRESHOLD=10):
+                with commit_buffer.request_scope():
+                    with self.captureOnCommitCallbacks(execute=True):
+                        for i in range(25):
+                            SourceOfJoining.objects.create(name=f'Source {i}')
+
+                # Two full buffers spilled; the 5-entry remainder went straight to the table
+                self.assertEqual(TransactionLog.objects.count(), 5)
+                self.assertEqual(len(log_buffer.pending_spill_files()), 2)
+
+                call_command('ingest_transaction_logs', stdout=StringIO())
+
+            self.assertEqual(log_buffer.pending_spill_files(spill_dir), [])
+        self.assertEqual(TransactionLog.objects.filter(table_name='SourceOfJoining').count(), 25)
+        self.assertEqual(TransactionLog.objects.filter(user=self.user).count(), 25)
+
+
+class TransactionLogPageTest(TestCase):
+    def setUp(self):
+        from .signals import set_current_user
+        self.user = User.objects.create_user(email='logs@example.com', name='Logs', role='admin', password='pw', is_staff=True)
+        set_current_user(self.user)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        from .signals import set_current_user
+        set_current_user(None)
+
+    def test_description_is_rendered_when_the_entry_is_written(self):
+        from .models import SourceOfJoining, TransactionLog
+
+        with self.captureOnCommitCallbacks(execute=True):
+            source = SourceOfJoining.objects.create(name='<b>Referral</b>')
+            source.name = 'Walk-in'
+            source.save()
+
+        created = TransactionLog.objects.get(action='CREATE')
+        self.assertEqual(created.description, 'Added new joining source: <strong>&lt;b&gt;Referral&lt;/b&gt;</strong>')
+        updated = TransactionLog.objects.get(action='UPDATE')
+        self.assertEqual(updated.summary, "Changed Name from '<b>Referral</b>' to 'Walk-in'")
+
+    def test_page_loads_more_without_counting(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import SourceOfJoining
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(45):
+                SourceOfJoining.objects.create(name=f'Source {i}')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('transaction_log'))
+        self.assertFalse([q for q in queries if 'COUNT(' in q['sql'].upper()])
+        self.assertFalse([q for q in queries if 'changes' in q['sql'] and 'settingsdb_transactionlog' in q['sql']])
+        self.assertEqual(len(response.context['logs']), 20)
+        self.assertContains(response, 'Added new joining source: <strong>Source 44</strong>', html=True)
+
+        seen = [log.pk for log in response.context['logs']]
+        cursor = response.context['next_cursor']
+        while cursor:
+            response = self.client.get(reverse('transaction_log'), {'before': cursor, 'partial': 1})
+            seen += [log.pk for log in response.context['logs']]
+            cursor = response.context['next_cursor']
+        self.assertEqual(len(seen), 45)
+        self.assertEqual(len(set(seen)), 45)
+
+    def test_no_op_updates_do_not_load_changes(self):
+        from .models import SourceOfJoining, TransactionLog
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(20):
+                source = SourceOfJoining.objects.create(name=f'Source {i}')
+                source.save()  # nothing changed: an UPDATE with an empty summary
+        self.assertEqual(TransactionLog.objects.filter(action='UPDATE', summary='').count(), 20)
+
+        self.client.get(reverse('transaction_log'))
+        # Session and user, then the page query; no per-row load of `changes`
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('transaction_log'))
+        self.assertEqual(len(response.context['logs']), 20)
+
+    def test_backfill_command_renders_older_rows(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import TransactionLog
+
+        TransactionLog.objects.create(user=self.user, table_name='PaymentAccount', object_id='1', action='CREATE', changes={'name': 'HDFC'})
+        TransactionLog.objects.create(
+            user=self.user, table_name='PaymentAccount', object_id='1', action='UPDATE',
+            changes={'name': 'HDFC', 'diff': {}}, description='Updated payment account',
+        )
+        call_command('render_transaction_logs', stdout=StringIO())
+        created, updated = TransactionLog.objects.order_by('id')
+        self.assertEqual(created.description, 'Added new payment account: <strong>HDFC</strong>')
+        self.assertEqual(created.summary, 'Name: HDFC')
+        # A rendered no-op update keeps an empty summary instead of NULL
+        self.assertEqual(updated.summary, '')
+
+
+class SignalProfilerTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from . import signal_profiler
+        from .signals import set_current_user
+
+        cache.clear()
+        self.user = User.objects.create_user(email='profiler@example.com', name='Profiler', role='admin', password='pw', is_staff=True)
+        set_current_user(self.user)
+        signal_profiler.reset()
+        signal_profiler.enable()
+        self.addCleanup(signal_profiler.disable)
+
+    def tearDown(self):
+        from .signals import set_current_user
+        set_current_user(None)
+
+    def test_saves_and_receivers_are_timed(self):
+        from datetime import date
+        from django.db.models import Model
+        from batchdb.models import Batch
+        from . import signal_profiler
+        from .models import SourceOfJoining
+
+        SourceOfJoining.objects.create(name='Referral')
+        Batch.objects.create(batch_id='PYPF', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1))
+        report = signal_profiler.snapshot()
+
+        writes = {(row['model'], row['operation']): row for row in report['writes']}
+        self.assertEqual(writes[('settingsdb.SourceOfJoining', 'save')]['calls'], 1)
+        # Batch.save calls super().save(); the override is counted once
+        self.assertEqual(writes[('batchdb.Batch', 'save')]['calls'], 1)
+        self.assertGreaterEqual(writes[('batchdb.Batch', 'save')]['queries'], 1)
+
+        receivers = {(row['model'], row['signal'], row['receiver']) for row in report['receivers']}
+        self.assertIn(('settingsdb.SourceOfJoining', 'post_save', 'settingsdb.signals.track_save'), receivers)
+
+        signal_profiler.disable()
+        self.assertFalse(signal_profiler.is_enabled())
+        self.assertFalse(hasattr(Batch.save, '__wrapped__'))
+        self.assertFalse(hasattr(Model.save, '__wrapped__'))
+
+    def test_staff_endpoint_returns_the_snapshot(self):
+        from .models import SourceOfJoining
+
+        SourceOfJoining.objects.create(name='Website')
+        self.client.force_login(self.user)
+        data = self.client.get(reverse('signal_profile')).json()
+        self.assertTrue(data['enabled'])
+        self.assertTrue(any(row['model'] == 'settingsdb.SourceOfJoining' for row in data['writes']))
+
+        self.client.post(reverse('signal_profile'))
+        self.assertEqual(self.client.get(reverse('signal_profile')).json()['writes'], [])
+
+
+class RequestContextTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='context@example.com', name='Context', role='admin', password='pw')
+
+    def _middleware(self, view):
+        from .middleware import CaptureUserMiddleware
+        return CaptureUserMiddleware(view)
+
+    def test_logs_of_a_request_share_its_context(self):
+        from django.contrib.auth.models import AnonymousUser
+        from django.test import RequestFactory
+        from audit.models import AuditLog
+        from audit.utils import log_event
+        from core import request_context
+        from .models import SourceOfJoining, TransactionLog
+
+        request = RequestFactory().post('/', HTTP_X_FORWARDED_FOR='10.1.1.1', HTTP_USER_AGENT='tests', HTTP_X_ACTIVE_ROLE='ADMIN')
+        request.user = AnonymousUser()
+
+        def view(request):
+            # Authenticated inside the view, the way DRF's JWT authentication does it
+            request.user = self.user
+            SourceOfJoining.objects.create(name='Referral')
+            log_event(None, None, 'UPDATE', 'Config', 1, source='API', actor_from_context=True)
+            log_event(None, None, 'FAILED_LOGIN', 'Auth', 1, source='UI')
+            return None
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._middleware(view)(request)
+
+        self.assertEqual(TransactionLog.objects.get(table_name='SourceOfJoining').user, self.user)
+        event = AuditLog.objects.get(entity_type='Config')
+        self.assertEqual((event.actor_user_id, event.actor_role), (self.user.pk, 'ADMIN'))
+        self.assertEqual((event.ip_address, event.user_agent), ('10.1.1.1', 'tests'))
+        self.assertEqual(event.correlation_id, request._request_context.correlation_id)
+        self.assertIsNone(AuditLog.objects.get(action_type='FAILED_LOGIN').actor_user_id)
+        # Nothing outlives the request
+        self.assertIsNone(request_context.get_current_user())
+
+    def test_context_follows_async_views_and_worker_threads(self):
+        from asgiref.sync import async_to_sync, sync_to_async
+        from concurrent.futures import ThreadPoolExecutor
+        from contextvars import copy_context
+        from django.test import RequestFactory
+        from core import request_context
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+
+        async def view():
+            with request_context.activate(request):
+                return await sync_to_async(request_context.get_current_user)()
+
+        self.assertEqual(async_to_sync(view)(), self.user)
+
+        with request_context.activate(request):
+            with ThreadPoolExecutor(1) as pool:
+                offloaded = pool.submit(copy_context().run, request_context.get_current_user).result()
+        self.assertEqual(offloaded, self.user)
+        self.assertIsNone(request_context.get_current_user())
@@ -0,0 +1,140 @@
+"""
+Opt-in change tracking for TransactionLog (see settingsdb.signals).
+
+A tracked model snapshots its concrete field values when a row is loaded through
+from_db (plain queries and select_for_update alike), and again after every save.
+Instances built in memory take no snapshot until they are saved. The previous
+state of an update is rebuilt in memory from that snapshot, so an update no
+longer re-SELECTs its row. The snapshot lives on the instance, so nested saves
+cannot clobber each other's state.
+
+Models are registered with track_changes(), which also works as a class decorator.
+SettingsdbConfig.ready() registers every installed model except UNTRACKED_MODELS,
+so the transaction log keeps covering everything it always did.
+"""
+import copy
+
+from django.apps import apps
+from django.db.models.signals import post_save, pre_delete, pre_save
+
+SNAPSHOT_ATTR = "_tracking_snapshot"
+
+# Models left out of the transaction log; everything else installed is tracked
+UNTRACKED_MODELS = {
+    # Log tables: logging their rows would only duplicate the trail
+    'settingsdb.TransactionLog',
+    'audit.AuditLog',
+    'admin.LogEntry',
+    # Session data, rewritten on every authenticated request
+    'sessions.Session',
+    # Queued mail bodies carry generated passwords and OTPs
+    'accounts.EmailOutbox',
+    # Counters bumped on every allocation; the rows they number are logged themselves
+    'rbac.RBACVersion',
+    'batchdb.BatchSequence',
+    'paymentdb.PaymentSequence',
+    # Job progress, rewritten with every chunk and heartbeat
+    'batchdb.BatchImportJob',
+    'batchdb.BatchExportJob',
+    # Derived search text, rebuilt from the batch and enrollment rows that are logged
+    'batchdb.BatchSearchDocument',
+}
+
+# Many-to-many fields whose membership is captured (one values_list query per save)
+DEFAULT_TRACKED_M2M = {
+    'trainersdb.Trainer': ('stack',),
+}
+
+# model class -> tuple of concrete attnames
+_registry = {}
+# model class -> tuple of opted-in many-to-many field names
+_m2m_fields = {}
+
+
+def is_tracked(model):
+    return model in _registry
+
+
+def tracked_m2m_fields(model):
+    return _m2m_fields.get(model, ())
+
+
+def track_changes(model, m2m=()):
+    """
+    Registers a model (class or "app_label.Model") for change tracking.
+    m2m names the many-to-many fields whose membership should be logged too.
+    """
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    if m2m:
+        _m2m_fields[model] = tuple(m2m)
+    if model in _registry:
+        return model
+
+    from .signals import capture_unloaded_instance, track_save, track_delete
+
+    _registry[model] = tuple(field.attname for field in model._meta.concrete_fields)
+    _snapshot_on_load(model)
+    uid = f"settingsdb_tracking_{model._meta.label_lower}"
+    pre_save.connect(capture_unloaded_instance, sender=model, dispatch_uid=uid)
+    post_save.connect(track_save, sender=model, dispatch_uid=uid)
+    pre_delete.connect(track_delete, sender=model, dispatch_uid=uid)
+    return model
+
+
+def register_default_models():
+    for model in apps.get_models():
+        label = model._meta.label
+        if label not in UNTRACKED_MODELS:
+            track_changes(model, m2m=DEFAULT_TRACKED_M2M.get(label, ()))
+
+
+def take_snapshot(instance, source=None):
+    """Records the current (or source's) field values as the instance's saved state."""
+    values = (source or instance).__dict__
+    snapshot = {}
+    for attname in _registry[type(instance)]:
+        if attname in values:
+            value = values[attname]
+            # JSON values are mutable in place, so keep a private copy
+            snapshot[attname] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+    instance.__dict__[SNAPSHOT_ATTR] = snapshot
+
+
+def _snapshot_on_load(model):
+    """Wraps model.from_db so only rows read from the database are snapshotted."""
+    own = model.__dict__.get("from_db")
+    if getattr(own, "__func__", None) is not None and getattr(own.__func__, "_tracking", False):
+        return
+
+    def from_db(cls, db, field_names, values):
+        if own is not None:
+            instance = own.__func__(cls, db, field_names, values)
+        else:
+            instance = super(model, cls).from_db(db, field_names, values)
+        if SNAPSHOT_ATTR not in instance.__dict__ and type(instance) in _registry:
+            take_snapshot(instance)
+        return instance
+
+    from_db._tracking = True
+    model.from_db = classmethod(from_db)
+
+
+def get_previous_instance(instance):
+    """
+    Returns a copy of the instance holding the field values it was loaded with
+    (or last saved with), or None when there is no snapshot. Related objects
+    are reused from the instance's cache unless the foreign key changed.
+    """
+    snapshot = instance.__dict__.get(SNAPSHOT_ATTR)
+    if snapshot is None:
+        return None
+
+    previous = copy.copy(instance)
+    for field in type(instance)._meta.concrete_fields:
+        attname = field.attname
+        if attname in snapshot and previous.__dict__.get(attname) != snapshot[attname]:
+            previous.__dict__[attname] = snapshot[attname]
+            if field.is_relation:
+                previous._state.fields_cache.pop(field.name, None)
+    return previous
@@ -5,7 +5,7 @@ from .models import SourceOfJoining, PaymentAccount, TransactionLog, UserSetting
 from .forms import SourceForm, PaymentAccountForm, UserSettingsForm, DBBackupImportForm
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 import pandas as pd
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from io import BytesIO
 import csv
 from django.db import IntegrityError, models, connections
@@ -13,6 +13,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.apps import apps
 from django.contrib import messages
 from django.utils import timezone
+from datetime import datetime, timezone as dt_timezone
 
 from coursedb.models import Course, CourseCategory
 from studentsdb.models import Student
@@ -84,38 +85,56 @@ def remove_payment_account(request, pk):
     account.delete()
     return redirect('payment_account_list')
 
-def clean_transaction_data(details_json):
+
+TRANSACTION_LOG_PAGE_SIZE = 20
+_LOG_CURSOR_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def _encode_log_cursor(log):
+    return f"{log.timestamp.astimezone(dt_timezone.utc):{_LOG_CURSOR_FORMAT}}-{log.pk}"
+
+
+def _decode_log_cursor(value):
     try:
-        raw_data = json.loads(details_json)
-        cleaned_lines = []
-        for field, value in raw_data.items():
-            if field == 'csrfmiddlewaretoken':
-                continue
-            if isinstance(value, list):
-                value = value[0]
-            cleaned_lines.append(f"{field}: {value}")
-        return "\n".join(cleaned_lines)
-    except Exception as e:
-        return f"Error parsing details: {e}"
+        stamp, pk = value.split('-')
+        return datetime.strptime(stamp, _LOG_CURSOR_FORMAT).replace(tzinfo=dt_timezone.utc), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
 
 @staff_member_required
 def transaction_log(request):
-    log_list = TransactionLog.objects.select_related('user').order_by('-timestamp')
-    
-    # Pagination
-    paginator = Paginator(log_list, 20)  # Show 20 logs per page
-    page = request.GET.get('page')
-    try:
-        logs = paginator.page(page)
-    except PageNotAnInteger:
-        logs = paginator.page(1)
-    except EmptyPage:
-        logs = paginator.page(paginator.num_pages)
-
-    for log in logs:
-        log.cleaned_details = clean_transaction_data(log.changes)
-        
-    return render(request, 'settingsdb/transaction_log.html', {'logs': logs})
+    # Keyset "load more" over (timestamp, id): no COUNT(*), and `changes` is never loaded
+    # because the description and summary were rendered when the entry was written.
+    log_list = (
+        TransactionLog.objects.select_related('user')
+        .only('timestamp', 'action', 'table_name', 'description', 'summary', 'user__name')
+        .order_by('-timestamp', '-id')
+    )
+    cursor = _decode_log_cursor(request.GET.get('before'))
+    if cursor:
+        timestamp, pk = cursor
+        log_list = log_list.filter(models.Q(timestamp__lt=timestamp) | models.Q(timestamp=timestamp, id__lt=pk))
+
+    logs = list(log_list[:TRANSACTION_LOG_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(logs) > TRANSACTION_LOG_PAGE_SIZE:
+        logs = logs[:TRANSACTION_LOG_PAGE_SIZE]
+        next_cursor = _encode_log_cursor(logs[-1])
+
+    context = {'logs': logs, 'next_cursor': next_cursor, 'is_first_page': cursor is None}
+    if request.GET.get('partial'):
+        return render(request, 'settingsdb/_transaction_log_rows.html', context)
+    return render(request, 'settingsdb/transaction_log.html', context)
+
+@staff_member_required
+def signal_profile(request):
+    """Per-model write cost and per-receiver signal cost (settingsdb.signal_profiler). POST resets the window."""
+    from . import signal_profiler
+
+    if request.method == 'POST':
+        signal_profiler.reset()
+    return JsonResponse(signal_profiler.snapshot())
 
 @staff_member_required
 def export_data(request):
@@ -184,10 +184,6 @@ def update_student(request, student_id):
                 if not updated_student.end_date:
                     updated_student.end_date = updated_student.enrollment_date + relativedelta(months=4)
 
-                # Set current user for transaction logging
-                from settingsdb.signals import set_current_user
-                set_current_user(request.user)
-                
                 updated_student.save()
                 if placement_form and any(field in request.POST for field in placement_form.fields):
                     placement_form.save()